@@ -0,0 +1,161 @@
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence
+
+from .metrics import stage
+from .models import PayrollReport, SIFRequest
+from .registry import BankRegistry
+from .sif import build_preview_json, dump_constructed, format_fixed, parse_fixed, request_pipeline
+
+MAX_LISTED_ROWS = 1000
+
+# Upper bounds (baisa) of the deduction histogram buckets; the last bucket is open-ended.
+DEDUCTION_BUCKETS = (0, 10_000, 50_000, 100_000, 250_000, 500_000)
+
+
+def _baisa(amount: str) -> Optional[int]:
+    """Baisa of a normalized amount, or ``None`` when it is not a finite number ("NaN")."""
+    if amount == "0.000":
+        # Most optional amounts are zero; skip the parse for them.
+        return 0
+    scaled = parse_fixed(amount, 3)
+    if scaled is None and amount.startswith("-") and not amount.strip("-0."):
+        # parse_fixed leaves negative zero to Decimal.
+        return 0
+    return scaled
+
+
+class AmountStats:
+    """Count, sum, min/max and a fixed-bucket histogram of one amount column, in baisa."""
+
+    def __init__(self, buckets: Sequence[int] = DEDUCTION_BUCKETS) -> None:
+        self.bounds = tuple(buckets)
+        self.buckets = [0] * (len(self.bounds) + 1)
+        self._zero_bucket = bisect_left(self.bounds, 0)
+        self.count = 0
+        self.total = 0
+        self.minimum: Optional[int] = None
+        self.maximum: Optional[int] = None
+
+    def add(self, value: int) -> None:
+        if value == 0:
+            # Most rows carry no deduction; skip the bisect for them.
+            self.buckets[self._zero_bucket] += 1
+            return
+        self.buckets[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if self.minimum is None or value < self.minimum:
+            self.minimum = value
+        if self.maximum is None or value > self.maximum:
+            self.maximum = value
+
+    def as_dict(self) -> Dict:
+        return {
+            "count": self.count,
+            "total": format_fixed(self.total, 3),
+            "minimum": None if self.minimum is None else format_fixed(self.minimum, 3),
+            "maximum": None if self.maximum is None else format_fixed(self.maximum, 3),
+            "mean": None if not self.count else format_fixed((self.total * 2 + self.count) // (self.count * 2), 3),
+            "buckets": [
+                {"up_to": None if bound is None else format_fixed(bound, 3), "count": count}
+                for bound, count in zip(self.bounds + (None,), self.buckets)
+            ],
+        }
+
+
+class PayrollAggregator:
+    """Breakdowns of a payroll, fed each normalized row by ``PayrollNormalizer.add``.
+
+    Groups keep ``[count, net baisa]`` so nothing is re-parsed after the pass. Rows with an
+    amount that is not a finite number are left out of the breakdowns and listed instead.
+    """
+
+    def __init__(self) -> None:
+        self.banks: Dict[str, List[int]] = {}
+        self.frequencies: Dict[str, List[int]] = {}
+        self.id_types: Dict[str, List[int]] = {}
+        self.zero_net_count = 0
+        self.zero_net_rows: List[int] = []
+        self.unparsed_count = 0
+        self.unparsed_rows: List[int] = []
+        self.deductions = AmountStats()
+        self.social_security = AmountStats()
+
+    def add(self, index: int, row: Sequence[str], net_baisa: Optional[int]) -> None:
+        net = net_baisa if net_baisa is not None else _baisa(row[8])
+        deductions = _baisa(row[12])
+        social_security = _baisa(row[13])
+        if net is None or deductions is None or social_security is None:
+            self.unparsed_count += 1
+            if len(self.unparsed_rows) < MAX_LISTED_ROWS:
+                self.unparsed_rows.append(index)
+            return
+        _tally(self.banks, row[4], net)
+        _tally(self.frequencies, row[6], net)
+        _tally(self.id_types, row[0], net)
+        if net == 0:
+            self.zero_net_count += 1
+            if len(self.zero_net_rows) < MAX_LISTED_ROWS:
+                self.zero_net_rows.append(index)
+        self.deductions.add(deductions)
+        self.social_security.add(social_security)
+
+    def report(self, registry: Optional[BankRegistry] = None) -> Dict:
+        banks = []
+        for bic, (count, net) in sorted(self.banks.items(), key=lambda item: -item[1][1]):
+            bank = registry.by_bic.get(bic) if registry is not None else None
+            banks.append(
+                {
+                    "employee_bic_code": bic,
+                    "short_name": bank.short_name if bank else None,
+                    "bank_name": bank.bank_name if bank else None,
+                    "number_of_records": count,
+                    "total_salaries": format_fixed(net, 3),
+                }
+            )
+        return {
+            "by_bank": banks,
+            "by_frequency": _groups(self.frequencies),
+            "by_id_type": _groups(self.id_types),
+            "zero_net_count": self.zero_net_count,
+            "zero_net_rows": self.zero_net_rows,
+            "unparsed_count": self.unparsed_count,
+            "unparsed_rows": self.unparsed_rows,
+            "deductions": self.deductions.as_dict(),
+            "social_security_deductions": self.social_security.as_dict(),
+        }
+
+
+def _tally(groups: Dict[str, List[int]], key: str, net: int) -> None:
+    group = groups.get(key)
+    if group is None:
+        groups[key] = [1, net]
+    else:
+        group[0] += 1
+        group[1] += net
+
+
+def _groups(groups: Dict[str, List[int]]) -> List[Dict]:
+    return [
+        {"value": key, "number_of_records": count, "total_salaries": format_fixed(net, 3)}
+        for key, (count, net) in sorted(groups.items())
+    ]
+
+
+def build_report_json(request: SIFRequest, registry: Optional[BankRegistry] = None) -> str:
+    """Aggregate the payroll in one normalization pass without keeping its rows."""
+    aggregator = PayrollAggregator()
+    pipeline = request_pipeline(request, registry, aggregator=aggregator)
+    with stage("normalize"):
+        for _ in pipeline.employee_rows():
+            pass
+    report = PayrollReport.model_construct(
+        number_of_records=pipeline.number_of_records,
+        total_salaries=pipeline.total_salaries,
+        **aggregator.report(registry),
+    )
+    return dump_constructed(report)
+
+
+def build_preview_report_json(request: SIFRequest, registry: Optional[BankRegistry] = None) -> str:
+    return build_preview_json(request, registry, PayrollAggregator())
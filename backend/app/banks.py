@@ -0,0 +1,60 @@
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from .registry import Bank, BankRegistry
+from .sif import load_banks
+
+BANKS_CACHE_CONTROL = "public, max-age=300"
+
+
+class BankSnapshot(NamedTuple):
+    registry: BankRegistry
+    body: bytes
+    etag: str
+    mtime_ns: int
+
+
+def build_snapshot(path: Path) -> BankSnapshot:
+    stat = path.stat()
+    data = load_banks(path)
+    body = json.dumps({"banks": data}, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    registry = BankRegistry(Bank(item["short_name"], item["bic"], item["bank_name"]) for item in data)
+    etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+    return BankSnapshot(registry=registry, body=body, etag=etag, mtime_ns=stat.st_mtime_ns)
+
+
+class BankDirectory:
+    """Bank list parsed once, with a pre-serialized body, reloaded only when the file's mtime changes."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._snapshot: Optional[BankSnapshot] = None
+        self._lock = threading.Lock()
+
+    def snapshot(self) -> BankSnapshot:
+        current = self._snapshot
+        try:
+            mtime_ns = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            if current is None:
+                raise
+            # Keep serving the last good copy if the file vanishes mid-deploy.
+            return current
+        if current is not None and current.mtime_ns == mtime_ns:
+            return current
+        with self._lock:
+            if self._snapshot is None or self._snapshot.mtime_ns != mtime_ns:
+                self._snapshot = build_snapshot(self.path)
+            return self._snapshot
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    # If-None-Match uses weak comparison, so W/"x" matches "x".
+    return "*" in candidates or any(candidate.replace("W/", "", 1) == etag for candidate in candidates)
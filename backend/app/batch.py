@@ -0,0 +1,176 @@
+import json
+import os
+from concurrent.futures import Executor
+from decimal import Decimal
+from itertools import repeat
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from .models import SIFHeader, SIFRequest
+from .registry import BankRegistry
+from .settings import env_int
+from .sif import SIFPipeline, build_output_bytes, format_total, parse_fixed, request_records, safe_text
+from .xlsx import iter_zip_chunks
+
+MANIFEST_NAME = "manifest.json"
+
+MAX_SEQ = 999
+
+_process_pool: Optional[Executor] = None
+
+
+class SplitError(ValueError):
+    pass
+
+
+class SplitChunk(NamedTuple):
+    """One file of a split payroll: a header-only copy of the request (own ``seq``) and its records."""
+
+    header: SIFHeader
+    records: List[tuple]
+    group: Optional[str] = None
+
+
+def batch_workers() -> int:
+    return env_int("SIF_BATCH_WORKERS", os.cpu_count() or 1)
+
+
+def split_max_records() -> int:
+    return env_int("SIF_SPLIT_MAX_RECORDS", 5000)
+
+
+def get_process_pool() -> Executor:
+    global _process_pool
+    if _process_pool is None:
+        from concurrent.futures import ProcessPoolExecutor
+
+        _process_pool = ProcessPoolExecutor(max_workers=batch_workers())
+    return _process_pool
+
+
+def build_sif_file(payload: SIFRequest, registry: Optional[BankRegistry] = None) -> Tuple[str, bytes, Dict]:
+    return build_records_file(payload, request_records(payload), registry, payload.format or "xlsx")
+
+
+def build_records_file(
+    header: SIFHeader,
+    records: Iterable[Sequence],
+    registry: Optional[BankRegistry] = None,
+    format_name: str = "xlsx",
+    group: Optional[str] = None,
+) -> Tuple[str, bytes, Dict]:
+    # Runs inside a worker process; everything it returns must be picklable.
+    pipeline = SIFPipeline(header, records, registry)
+    content = build_output_bytes(pipeline.rows(), header.sheet_name, format_name)
+    filename = pipeline.filename(format_name)
+    summary = {
+        "filename": filename,
+        "employer_cr": safe_text(pipeline.header.employer_cr, 32),
+        "payer_bank_short": safe_text(pipeline.header.payer_bank_short, 16),
+        "salary_year": header.salary_year,
+        "salary_month": header.salary_month,
+        "seq": header.seq,
+        "total_salaries": pipeline.total_salaries,
+        "number_of_records": pipeline.number_of_records,
+        "issue_count": pipeline.normalizer.issue_count,
+        "size_bytes": len(content),
+    }
+    if group is not None:
+        summary["employee_bic_code"] = group
+    return filename, content, summary
+
+
+def build_manifest(summaries: List[Dict]) -> Dict:
+    total_baisa = 0
+    # File totals that are not plain amounts (huge or NaN) are summed as Decimals, like the normalizer's.
+    spill: Optional[Decimal] = None
+    for summary in summaries:
+        baisa = parse_fixed(summary["total_salaries"], 3)
+        if baisa is None:
+            spill = (spill or Decimal(0)) + Decimal(summary["total_salaries"])
+        else:
+            total_baisa += baisa
+    return {
+        "file_count": len(summaries),
+        "total_salaries": format_total(total_baisa, spill),
+        "number_of_records": sum(summary["number_of_records"] for summary in summaries),
+        "files": summaries,
+    }
+
+
+def iter_batch_entries(results: Iterable[Tuple[str, bytes, Dict]]) -> Iterator[Tuple[str, bytes]]:
+    summaries = []
+    for filename, content, summary in results:
+        summaries.append(summary)
+        yield filename, content
+    yield MANIFEST_NAME, json.dumps(build_manifest(summaries), indent=2, ensure_ascii=False).encode("utf-8")
+
+
+def _bic_groups(records: Iterable[tuple], registry: Optional[BankRegistry]) -> Dict[str, List[tuple]]:
+    # Grouped by the BIC the file will carry, so registry corrections land in their bank's files.
+    groups: Dict[str, List[tuple]] = {}
+    resolved: Dict[str, str] = {}
+    for record in records:
+        raw = safe_text(record[4], 70)
+        bic = resolved.get(raw)
+        if bic is None:
+            bic = safe_text(raw, 11).upper()
+            if registry is not None:
+                resolution = registry.resolve_bic(raw)
+                if resolution.corrected:
+                    bic = resolution.value
+            resolved[raw] = bic
+        groups.setdefault(bic, []).append(record)
+    return groups
+
+
+def split_request(
+    request: SIFRequest, max_records: int, group_by_bic: bool = False, registry: Optional[BankRegistry] = None
+) -> List[SplitChunk]:
+    """Partition the employees into files of at most ``max_records``, numbered from ``request.seq``.
+
+    With ``group_by_bic`` each file holds one employee bank, in order of first appearance.
+    """
+    records = list(request_records(request))
+    if group_by_bic:
+        groups: List[Tuple[Optional[str], List[tuple]]] = list(_bic_groups(records, registry).items())
+    else:
+        groups = [(None, records)]
+
+    parts = []
+    for group, group_records in groups:
+        for start in range(0, len(group_records), max_records):
+            parts.append((group, group_records[start : start + max_records]))
+    if not parts:
+        parts.append((None, []))
+
+    last_seq = request.seq + len(parts) - 1
+    if last_seq > MAX_SEQ:
+        raise SplitError(
+            f"Splitting into {len(parts)} files starting at seq {request.seq} would pass seq {MAX_SEQ}; "
+            "raise max_records or lower seq."
+        )
+    header = SIFHeader.model_validate(request.model_dump(include=set(SIFHeader.model_fields)))
+    return [
+        SplitChunk(header.model_copy(update={"seq": request.seq + index}), chunk_records, group)
+        for index, (group, chunk_records) in enumerate(parts)
+    ]
+
+
+def iter_split_zip(
+    chunks: List[SplitChunk], registry: Optional[BankRegistry] = None, format_name: str = "xlsx"
+) -> Iterator[bytes]:
+    results = get_process_pool().map(
+        build_records_file,
+        [chunk.header for chunk in chunks],
+        [chunk.records for chunk in chunks],
+        repeat(registry),
+        repeat(format_name),
+        [chunk.group for chunk in chunks],
+    )
+    return iter_zip_chunks(iter_batch_entries(results))
+
+
+def iter_batch_zip(payloads: List[SIFRequest], registry: Optional[BankRegistry] = None) -> Iterator[bytes]:
+    # map() keeps request order while workbooks build concurrently across processes.
+    results = get_process_pool().map(build_sif_file, payloads, repeat(registry))
+    return iter_zip_chunks(iter_batch_entries(results))
@@ -0,0 +1,167 @@
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import AsyncGenerator, AsyncIterator, Dict, Iterable, Optional, Sequence
+
+from starlette.concurrency import run_in_threadpool
+
+from .executor import close_stream
+from .settings import env_int
+
+# Bump when the writer's byte output or the key layout changes so stale entries stop matching.
+CACHE_KEY_VERSION = "sif-2"
+
+
+class RowDigest:
+    """Incremental ``content_key``. Rows may be fed in any fixed order, so a deferred-header
+    pipeline can hash employee rows as they are normalized and the header rows last."""
+
+    def __init__(self, output_format: str, sheet_name: str) -> None:
+        self._digest = hashlib.sha256()
+        self._digest.update(f"{CACHE_KEY_VERSION}\x1e{output_format}\x1e{sheet_name}\x1e".encode("utf-8"))
+
+    def update(self, row: Sequence[str]) -> None:
+        self._digest.update("\x1f".join(row).encode("utf-8"))
+        self._digest.update(b"\x1e")
+
+    def hexdigest(self) -> str:
+        return self._digest.hexdigest()
+
+
+def content_key(output_format: str, sheet_name: str, rows: Iterable[Sequence[str]]) -> str:
+    """Hash of everything that determines the generated file's bytes."""
+    digest = RowDigest(output_format, sheet_name)
+    for row in rows:
+        digest.update(row)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """LRU cache of generated files bounded by total bytes, with an optional on-disk tier."""
+
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        max_entry_bytes: int = 8 * 1024 * 1024,
+        directory: Optional[Path] = None,
+        max_disk_bytes: int = 512 * 1024 * 1024,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if directory is not None:
+            directory.mkdir(parents=True, exist_ok=True)
+
+    @classmethod
+    def from_env(cls) -> "ResultCache":
+        directory = os.getenv("SIF_CACHE_DIR", "").strip()
+        return cls(
+            max_bytes=env_int("SIF_CACHE_BYTES", 64 * 1024 * 1024, minimum=0),
+            max_entry_bytes=env_int("SIF_CACHE_ENTRY_BYTES", 8 * 1024 * 1024),
+            directory=Path(directory) if directory else None,
+            max_disk_bytes=env_int("SIF_CACHE_DISK_BYTES", 512 * 1024 * 1024, minimum=0),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0 or self.directory is not None
+
+    def _path(self, key: str) -> Path:
+        assert self.directory is not None
+        return self.directory / f"{key}.bin"
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            content = self._entries.get(key)
+            if content is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return content
+        if self.directory is not None:
+            path = self._path(key)
+            try:
+                content = path.read_bytes()
+                os.utime(path)
+            except FileNotFoundError:
+                content = None
+            if content is not None:
+                self._remember(key, content)
+                with self._lock:
+                    self.hits += 1
+                return content
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, content: bytes) -> None:
+        if len(content) > self.max_entry_bytes:
+            return
+        self._remember(key, content)
+        if self.directory is not None:
+            self._write_disk(key, content)
+
+    def _remember(self, key: str, content: bytes) -> None:
+        if len(content) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._entries[key] = content
+            self._size += len(content)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def _write_disk(self, key: str, content: bytes) -> None:
+        assert self.directory is not None
+        handle, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(handle, "wb") as stream:
+            stream.write(content)
+        os.replace(temp_path, self._path(key))
+
+        files = [(path.stat(), path) for path in self.directory.glob("*.bin")]
+        total = sum(stat.st_size for stat, _ in files)
+        for stat, path in sorted(files, key=lambda item: item[0].st_mtime):
+            if total <= self.max_disk_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= stat.st_size
+
+    async def tee(self, key: str, chunks: AsyncIterator[bytes]) -> AsyncGenerator[bytes, None]:
+        """Pass chunks through and store the whole body once it completes within the entry limit."""
+        collected = []
+        size = 0
+        try:
+            async for chunk in chunks:
+                if collected is not None:
+                    size += len(chunk)
+                    if size <= self.max_entry_bytes:
+                        collected.append(chunk)
+                    else:
+                        collected = None
+                yield chunk
+        finally:
+            await close_stream(chunks)
+        if collected is not None:
+            # The disk tier writes and sweeps its directory; keep that off the event loop.
+            await run_in_threadpool(self.put, key, b"".join(collected))
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
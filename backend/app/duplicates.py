@@ -0,0 +1,50 @@
+from typing import Dict, List, Sequence, Tuple
+
+MAX_LISTED_GROUPS = 1000
+
+# Normalized row positions of the values a bank expects to be unique within one file.
+DUPLICATE_FIELDS: Tuple[Tuple[str, int], ...] = (
+    ("employee_id", 1),
+    ("employee_account", 5),
+    ("reference_number", 2),
+)
+
+
+class DuplicateDetector:
+    """Hash indexes over normalized rows that collect every group of rows sharing a value.
+
+    Each field keeps ``value -> first row`` (the values are the row's own strings, so
+    the index adds one dict slot per row) and, only for values seen again, the full
+    list of rows. Blank values never collide.
+    """
+
+    def __init__(self) -> None:
+        self._first: List[Dict[str, int]] = [{} for _ in DUPLICATE_FIELDS]
+        self._groups: List[Dict[str, List[int]]] = [{} for _ in DUPLICATE_FIELDS]
+
+    def add(self, index: int, row: Sequence[str]) -> None:
+        for (_, position), first, groups in zip(DUPLICATE_FIELDS, self._first, self._groups):
+            value = row[position]
+            if not value:
+                continue
+            seen = first.setdefault(value, index)
+            if seen != index:
+                rows = groups.get(value)
+                if rows is None:
+                    groups[value] = [seen, index]
+                else:
+                    rows.append(index)
+
+    @property
+    def group_count(self) -> int:
+        return sum(len(groups) for groups in self._groups)
+
+    def groups(self, limit: int = MAX_LISTED_GROUPS) -> List[Dict]:
+        """Colliding groups ordered by their first row, at most ``limit`` of them."""
+        found = [
+            {"field": field, "value": value, "rows": rows}
+            for (field, _), groups in zip(DUPLICATE_FIELDS, self._groups)
+            for value, rows in groups.items()
+        ]
+        found.sort(key=lambda group: (group["rows"][0], group["rows"][1]))
+        return found[:limit]
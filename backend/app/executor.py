@@ -0,0 +1,214 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor
+from contextvars import copy_context
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional
+
+from .metrics import Profiler, ProfileSession
+from .settings import env_int
+
+EXECUTOR_MODES = ("thread", "process", "inline")
+
+
+class ExecutorSaturated(Exception):
+    def __init__(self, retry_after: int) -> None:
+        super().__init__("SIF generation queue is full.")
+        self.retry_after = retry_after
+
+
+def _join_chunks(fn: Callable[..., Iterator[bytes]], *args) -> bytes:
+    # Process mode cannot hand an iterator back across the boundary; build the body there.
+    return b"".join(fn(*args))
+
+
+async def close_stream(chunks: object) -> None:
+    """Close a chunk stream that may not have been read to the end (frees its executor slot)."""
+    aclose = getattr(chunks, "aclose", None)
+    if aclose is not None:
+        await aclose()
+
+
+class SIFExecutor:
+    """Bounded execution backend for CPU-bound SIF work.
+
+    At most ``max_concurrency`` jobs run at once and at most ``queue_limit`` more may
+    wait; anything beyond that is rejected with ``ExecutorSaturated`` so the caller can
+    answer 429 instead of piling work onto the event loop.
+    """
+
+    def __init__(self, mode: str = "thread", max_concurrency: int = 4, queue_limit: int = 16, retry_after: int = 2):
+        if mode not in EXECUTOR_MODES:
+            raise ValueError(f"Unknown SIF executor mode {mode!r}; expected one of {', '.join(EXECUTOR_MODES)}.")
+        self.mode = mode
+        self.max_concurrency = max_concurrency
+        self.queue_limit = queue_limit
+        self.retry_after = retry_after
+        self._lock = threading.Lock()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+        self._process_pool: Optional[Executor] = None
+        self.running = 0
+        self.queued = 0
+        self.completed = 0
+        self.rejected = 0
+        self.peak_queued = 0
+        self.profiler: Optional[Profiler] = None
+
+    @classmethod
+    def from_env(cls) -> "SIFExecutor":
+        executor = cls(
+            mode=os.getenv("SIF_EXECUTOR", "thread").strip().lower() or "thread",
+            max_concurrency=env_int("SIF_MAX_CONCURRENCY", min(4, os.cpu_count() or 1)),
+            queue_limit=env_int("SIF_QUEUE_LIMIT", 16),
+            retry_after=env_int("SIF_RETRY_AFTER", 2),
+        )
+        executor.profiler = Profiler.from_env()
+        return executor
+
+    def _pool(self, local: bool) -> Optional[Executor]:
+        if self.mode == "inline":
+            return None
+        if self.mode == "process" and not local:
+            if self._process_pool is None:
+                # Imported on first use: it pulls in multiprocessing, which thread mode never needs.
+                from concurrent.futures import ProcessPoolExecutor
+
+                self._process_pool = ProcessPoolExecutor(max_workers=self.max_concurrency)
+            return self._process_pool
+        if self._thread_pool is None:
+            self._thread_pool = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="sif")
+        return self._thread_pool
+
+    def is_process_pool(self, pool: Optional[Executor]) -> bool:
+        return pool is not None and pool is self._process_pool
+
+    async def _acquire(self) -> None:
+        with self._lock:
+            if self.queued >= self.queue_limit and self.running >= self.max_concurrency:
+                self.rejected += 1
+                raise ExecutorSaturated(self.retry_after)
+            self.queued += 1
+            self.peak_queued = max(self.peak_queued, self.queued)
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        try:
+            await self._semaphore.acquire()
+        finally:
+            with self._lock:
+                self.queued -= 1
+        with self._lock:
+            self.running += 1
+
+    def _release(self) -> None:
+        with self._lock:
+            self.running -= 1
+            self.completed += 1
+        if self._semaphore is not None:
+            self._semaphore.release()
+
+    async def _call(self, pool: Optional[Executor], fn: Callable, *args) -> Any:
+        if pool is None:
+            return fn(*args)
+        if isinstance(pool, ThreadPoolExecutor):
+            # Carry the request's context (stage timings) into the worker thread.
+            return await asyncio.get_running_loop().run_in_executor(pool, partial(copy_context().run, fn, *args))
+        return await asyncio.get_running_loop().run_in_executor(pool, partial(fn, *args))
+
+    def _profile(self, pool: Optional[Executor], fn: Callable) -> Optional[ProfileSession]:
+        if self.profiler is None or self.is_process_pool(pool):
+            return None
+        return self.profiler.start(getattr(fn, "__name__", "job"))
+
+    async def run(self, fn: Callable, *args, local: bool = False) -> Any:
+        """Run ``fn(*args)`` on the backend. ``local`` keeps unpicklable work out of processes."""
+        await self._acquire()
+        pool = self._pool(local)
+        session = self._profile(pool, fn)
+        try:
+            if session is not None:
+                return await self._call(pool, session.call, fn, *args)
+            return await self._call(pool, fn, *args)
+        finally:
+            if session is not None:
+                session.finish()
+            self._release()
+
+    async def stream(self, fn: Callable[..., Iterator[bytes]], *args, local: bool = False) -> AsyncIterator[bytes]:
+        """Admit a streaming job now and return its chunks; the slot is held until exhausted."""
+        await self._acquire()
+        return _SlotStream(self, fn, args, local)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "max_concurrency": self.max_concurrency,
+                "queue_limit": self.queue_limit,
+                "running": self.running,
+                "queued": self.queued,
+                "peak_queued": self.peak_queued,
+                "completed": self.completed,
+                "rejected": self.rejected,
+            }
+
+    def shutdown(self) -> None:
+        if self._thread_pool is not None:
+            self._thread_pool.shutdown(wait=False)
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False)
+
+
+class _SlotStream:
+    # Async iterator rather than an async generator so aclose releases the slot even when
+    # iteration never started.
+    def __init__(self, executor: SIFExecutor, fn: Callable, args: tuple, local: bool) -> None:
+        self._executor = executor
+        self._fn = fn
+        self._args = args
+        self._pool = executor._pool(local)
+        self._profile = executor._profile(self._pool, fn)
+        self._iterator: Optional[Iterator[bytes]] = None
+        self._done = False
+        self._released = False
+
+    def __aiter__(self) -> "_SlotStream":
+        return self
+
+    def _release(self) -> None:
+        if not self._released:
+            self._released = True
+            if self._profile is not None:
+                self._profile.finish()
+            self._executor._release()
+
+    async def _call(self, fn: Callable, *args) -> Any:
+        if self._profile is not None:
+            return await self._executor._call(self._pool, self._profile.call, fn, *args)
+        return await self._executor._call(self._pool, fn, *args)
+
+    async def __anext__(self) -> bytes:
+        if self._done:
+            self._release()
+            raise StopAsyncIteration
+        try:
+            if self._executor.is_process_pool(self._pool):
+                self._done = True
+                return await self._executor._call(self._pool, _join_chunks, self._fn, *self._args)
+            if self._iterator is None:
+                self._iterator = await self._call(lambda: iter(self._fn(*self._args)))
+            chunk = await self._call(next, self._iterator, None)
+        except BaseException:
+            self._release()
+            raise
+        if chunk is None:
+            self._release()
+            raise StopAsyncIteration
+        return chunk
+
+    async def aclose(self) -> None:
+        self._release()
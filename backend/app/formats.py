@@ -0,0 +1,96 @@
+import csv
+import io
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from .xlsx import CHUNK_SIZE, XLSX_MEDIA_TYPE, iter_xlsx_chunks
+
+CSV_MEDIA_TYPE = "text/csv; charset=utf-8"
+DEFAULT_FORMAT = "xlsx"
+
+
+class UnknownFormat(ValueError):
+    pass
+
+
+class OutputFormat(NamedTuple):
+    name: str
+    media_type: str
+    extension: str
+    # write(rows, sheet_name) -> byte chunks; must be deterministic for a given input.
+    write: Callable[[Iterable[Sequence[str]], str], Iterator[bytes]]
+
+
+def iter_csv_chunks(rows: Iterable[Sequence[str]], sheet_name: str = "") -> Iterator[bytes]:
+    """UTF-8 CSV (no BOM, CRLF line endings, minimal quoting). CSV has no sheets, so the name is unused."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\r\n")
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+OUTPUT_FORMATS: Dict[str, OutputFormat] = {}
+
+
+def register_format(output_format: OutputFormat) -> None:
+    OUTPUT_FORMATS[output_format.name] = output_format
+
+
+register_format(OutputFormat("xlsx", XLSX_MEDIA_TYPE, ".xlsx", iter_xlsx_chunks))
+register_format(OutputFormat("csv", CSV_MEDIA_TYPE, ".csv", iter_csv_chunks))
+
+
+def get_format(name: Optional[str]) -> OutputFormat:
+    key = (name or DEFAULT_FORMAT).strip().lower()
+    if key not in OUTPUT_FORMATS:
+        raise UnknownFormat(f"Unknown output format {name!r}; expected one of {', '.join(OUTPUT_FORMATS)}.")
+    return OUTPUT_FORMATS[key]
+
+
+def _accepted_media_types(accept: str) -> List[Tuple[float, int, str]]:
+    ranges = []
+    for position, part in enumerate(accept.split(",")):
+        media_type, *params = [piece.strip() for piece in part.split(";")]
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if media_type and quality > 0:
+            ranges.append((-quality, position, media_type.lower()))
+    return sorted(ranges)
+
+
+def negotiate_format(requested: Optional[str], accept: Optional[str]) -> OutputFormat:
+    """An explicit ``format`` wins; otherwise the best match in the Accept header, defaulting to xlsx.
+
+    Accept headers that name no SIF type (``application/json`` from fetch or axios defaults)
+    get the default too, as they did before negotiation existed; only an explicit unknown
+    ``format`` is an error.
+    """
+    if requested:
+        return get_format(requested)
+    if not accept:
+        return get_format(DEFAULT_FORMAT)
+    for _, _, media_type in _accepted_media_types(accept):
+        if media_type in ("*/*", "application/*"):
+            return get_format(DEFAULT_FORMAT)
+        for output_format in OUTPUT_FORMATS.values():
+            if output_format.media_type.split(";", 1)[0] == media_type:
+                return output_format
+        if media_type == "text/*":
+            return get_format("csv")
+    return get_format(DEFAULT_FORMAT)
+
+
+def output_filename(filename: str, output_format: OutputFormat) -> str:
+    stem = filename[: -len(".xlsx")] if filename.endswith(".xlsx") else filename
+    return stem + output_format.extension
@@ -0,0 +1,200 @@
+import os
+import secrets
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional
+
+from .executor import ExecutorSaturated
+from .models import JobState, JobStatus, SIFRequest
+from .registry import BankRegistry
+from .settings import env_int
+from .sif import PayrollNormalizer, SIFPipeline, iter_sif_chunks, request_pipeline, safe_text, sif_filename
+
+PROGRESS_EVERY = 1000
+
+
+class JobNotFound(KeyError):
+    pass
+
+
+class JobRunning(ValueError):
+    pass
+
+
+class Job:
+    """State of one background generation; counters are written by the worker and read by pollers."""
+
+    def __init__(self, job_id: str, filename: str, rows_total: int, format_name: str = "xlsx") -> None:
+        self.job_id = job_id
+        self.status: JobState = "queued"
+        self.filename = filename
+        self.format_name = format_name
+        self.rows_total = rows_total
+        self.rows_normalized = 0
+        self.rows_written = 0
+        self.size_bytes: Optional[int] = None
+        self.error: Optional[str] = None
+        self.path: Optional[Path] = None
+        self.finished_at: Optional[float] = None
+
+    def status_model(self, ttl_seconds: int, now: float) -> JobStatus:
+        expires_in = None
+        if self.finished_at is not None:
+            expires_in = max(0, int(self.finished_at + ttl_seconds - now))
+        return JobStatus(
+            job_id=self.job_id,
+            status=self.status,
+            filename=self.filename,
+            rows_total=self.rows_total,
+            rows_normalized=self.rows_normalized,
+            rows_written=self.rows_written,
+            size_bytes=self.size_bytes,
+            error=self.error,
+            expires_in=expires_in,
+        )
+
+
+def _counting_rows(job: Job, rows: Iterable[List[str]]) -> Iterator[List[str]]:
+    # The first three rows are the SIF header block, not employees.
+    position = 0
+    for position, row in enumerate(rows):
+        if position >= 3 and (position - 2) % PROGRESS_EVERY == 0:
+            job.rows_written = position - 2
+        yield row
+    job.rows_written = max(0, position - 2)
+
+
+def _normalized_rows(job: Job, pipeline: SIFPipeline) -> List[List[str]]:
+    employee_rows = []
+    for row in pipeline.employee_rows():
+        employee_rows.append(row)
+        if pipeline.number_of_records % PROGRESS_EVERY == 0:
+            job.rows_normalized = pipeline.number_of_records
+    job.rows_normalized = pipeline.number_of_records
+    return employee_rows
+
+
+class JobStore:
+    """Background SIF generation on a local thread pool with results spooled to disk.
+
+    Finished jobs (and their files) are dropped ``ttl_seconds`` after completion. At most
+    ``max_pending`` jobs may be queued or running; further submissions are rejected with
+    ``ExecutorSaturated``.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        workers: int = 2,
+        max_pending: int = 8,
+        ttl_seconds: int = 3600,
+        retry_after: int = 5,
+    ) -> None:
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self.max_pending = max_pending
+        self.retry_after = retry_after
+        self.workers = workers
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+        directory.mkdir(parents=True, exist_ok=True)
+        self._sweep_directory(time.time())
+
+    @classmethod
+    def from_env(cls) -> "JobStore":
+        configured = os.getenv("SIF_JOB_DIR", "").strip()
+        directory = Path(configured) if configured else Path(tempfile.gettempdir()) / "sif-jobs"
+        return cls(
+            directory,
+            workers=env_int("SIF_JOB_WORKERS", 2),
+            max_pending=env_int("SIF_JOB_LIMIT", 8),
+            ttl_seconds=env_int("SIF_JOB_TTL", 3600),
+        )
+
+    def _sweep_directory(self, wall_now: float) -> None:
+        # Files left behind by a previous process are unreachable; drop the stale ones.
+        for path in self.directory.glob("*.sif*"):
+            try:
+                if wall_now - path.stat().st_mtime >= self.ttl_seconds:
+                    path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def _purge(self, now: float) -> None:
+        expired = [
+            job for job in self._jobs.values() if job.finished_at is not None and now - job.finished_at >= self.ttl_seconds
+        ]
+        for job in expired:
+            del self._jobs[job.job_id]
+            if job.path is not None:
+                job.path.unlink(missing_ok=True)
+
+    def submit(self, request: SIFRequest, registry: Optional[BankRegistry] = None) -> Job:
+        filename = sif_filename(PayrollNormalizer(registry).resolve_header(request))
+        job = Job(secrets.token_urlsafe(16), filename, request.employee_count, request.format or "xlsx")
+        with self._lock:
+            self._purge(time.monotonic())
+            pending = sum(1 for existing in self._jobs.values() if existing.finished_at is None)
+            if pending >= self.max_pending:
+                raise ExecutorSaturated(self.retry_after)
+            self._jobs[job.job_id] = job
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="sif-job")
+        self._pool.submit(self._run, job, request, registry)
+        return job
+
+    def _run(self, job: Job, request: SIFRequest, registry: Optional[BankRegistry]) -> None:
+        job.status = "running"
+        target = self.directory / f"{job.job_id}.sif"
+        partial = target.with_suffix(".sif.part")
+        try:
+            pipeline = request_pipeline(request, registry)
+            employee_rows = _normalized_rows(job, pipeline)
+            rows = chain(pipeline.header_rows(), employee_rows)
+
+            sheet_name = safe_text(request.sheet_name, 31) or "Sheet1"
+            with partial.open("wb") as stream:
+                for chunk in iter_sif_chunks(_counting_rows(job, rows), sheet_name, job.format_name):
+                    stream.write(chunk)
+            os.replace(partial, target)
+            job.path = target
+            job.size_bytes = target.stat().st_size
+            job.status = "done"
+        except Exception as exc:
+            partial.unlink(missing_ok=True)
+            job.error = str(exc) or exc.__class__.__name__
+            job.status = "failed"
+        finally:
+            job.finished_at = time.monotonic()
+
+    def get(self, job_id: str) -> Job:
+        with self._lock:
+            self._purge(time.monotonic())
+            job = self._jobs.get(job_id)
+        if job is None:
+            raise JobNotFound(job_id)
+        return job
+
+    def status(self, job: Job) -> JobStatus:
+        return job.status_model(self.ttl_seconds, time.monotonic())
+
+    def delete(self, job_id: str) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                raise JobNotFound(job_id)
+            if job.finished_at is None:
+                raise JobRunning(job_id)
+            del self._jobs[job_id]
+        if job.path is not None:
+            job.path.unlink(missing_ok=True)
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
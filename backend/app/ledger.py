@@ -0,0 +1,266 @@
+import os
+import sqlite3
+import tempfile
+import threading
+from contextlib import closing
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import AsyncGenerator, AsyncIterator, BinaryIO, Dict, List, NamedTuple, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from .executor import close_stream
+from .formats import get_format
+from .models import SIFHeader
+from .sif import safe_text
+
+MAX_SEQ = 999
+DEFAULT_HISTORY_LIMIT = 100
+
+_COLUMNS = (
+    "id",
+    "status",
+    "employer_cr",
+    "payer_bank_short",
+    "processing_date",
+    "seq",
+    "filename",
+    "format",
+    "content_key",
+    "total_salaries",
+    "number_of_records",
+    "size_bytes",
+    "created_at",
+)
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS generations (
+        id INTEGER PRIMARY KEY,
+        status TEXT NOT NULL,
+        employer_cr TEXT NOT NULL,
+        payer_bank_short TEXT NOT NULL,
+        processing_date TEXT NOT NULL,
+        seq INTEGER NOT NULL,
+        filename TEXT,
+        format TEXT,
+        content_key TEXT,
+        total_salaries TEXT,
+        number_of_records INTEGER,
+        size_bytes INTEGER,
+        created_at TEXT NOT NULL
+    )
+    """,
+    # Seq allocation and employer queries share the first index; the others serve bank and date queries.
+    "CREATE INDEX IF NOT EXISTS generations_employer"
+    " ON generations (employer_cr, payer_bank_short, processing_date, seq)",
+    "CREATE INDEX IF NOT EXISTS generations_bank ON generations (payer_bank_short, processing_date)",
+    "CREATE INDEX IF NOT EXISTS generations_date ON generations (processing_date)",
+)
+
+
+class LedgerError(ValueError):
+    pass
+
+
+class LedgerEntryNotFound(KeyError):
+    pass
+
+
+class Generation(NamedTuple):
+    """What the ledger records about one generated file."""
+
+    filename: str
+    format_name: str
+    content_key: str
+    total_salaries: str
+    number_of_records: int
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def _file_key(header: SIFHeader) -> Tuple[str, str, str]:
+    # The parts of the SIF filename that a seq has to be unique within.
+    employer = safe_text(header.employer_cr, 32)
+    return employer, safe_text(header.payer_bank_short, 16).upper(), header.processing_date.isoformat()
+
+
+class GenerationLedger:
+    """SQLite record of every generated SIF, with the files kept by content key.
+
+    Each generation is ``reserve``d before its file is built and ``record``ed once it is complete.
+    Reserving with ``allocate`` picks the next free seq for the employer, payer bank and processing
+    date inside a ``BEGIN IMMEDIATE`` transaction, which takes the database write lock, so concurrent
+    requests (threads or processes) never get the same one. Identical outputs share one stored file.
+    """
+
+    def __init__(self, directory: Optional[Path] = None) -> None:
+        self.directory = directory
+        self._ready = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "GenerationLedger":
+        directory = os.getenv("SIF_LEDGER_DIR", "").strip()
+        return cls(Path(directory) if directory else None)
+
+    @property
+    def enabled(self) -> bool:
+        return self.directory is not None
+
+    def _files(self) -> Path:
+        assert self.directory is not None
+        return self.directory / "files"
+
+    def _connect(self) -> sqlite3.Connection:
+        if self.directory is None:
+            raise LedgerError("The generation ledger is not configured (set SIF_LEDGER_DIR).")
+        if not self._ready:
+            with self._lock:
+                if not self._ready:
+                    self._files().mkdir(parents=True, exist_ok=True)
+                    with closing(sqlite3.connect(self.directory / "ledger.sqlite3")) as connection:
+                        connection.execute("PRAGMA journal_mode=WAL")
+                        for statement in _SCHEMA:
+                            connection.execute(statement)
+                        connection.commit()
+                    self._ready = True
+        # Autocommit mode, so each method states its own transaction.
+        return sqlite3.connect(self.directory / "ledger.sqlite3", timeout=10, isolation_level=None)
+
+    def reserve(self, header: SIFHeader, allocate: bool = False) -> Tuple[int, int]:
+        """Open an entry for the header's file; returns ``(entry id, seq)``.
+
+        The seq is the header's own unless ``allocate`` asks for the next one after every seq
+        recorded or reserved for the same file name.
+        """
+        employer, bank, processing_date = _file_key(header)
+        with closing(self._connect()) as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                seq = header.seq
+                if allocate:
+                    (latest,) = connection.execute(
+                        "SELECT MAX(seq) FROM generations"
+                        " WHERE employer_cr = ? AND payer_bank_short = ? AND processing_date = ?",
+                        (employer, bank, processing_date),
+                    ).fetchone()
+                    seq = (latest or 0) + 1
+                    if seq > MAX_SEQ:
+                        raise LedgerError(f"All {MAX_SEQ} seq numbers for {processing_date} are used.")
+                cursor = connection.execute(
+                    "INSERT INTO generations (status, employer_cr, payer_bank_short, processing_date, seq, created_at)"
+                    " VALUES ('reserved', ?, ?, ?, ?, ?)",
+                    (employer, bank, processing_date, seq, _now()),
+                )
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+        assert cursor.lastrowid is not None
+        return cursor.lastrowid, seq
+
+    def release(self, entry_id: int) -> None:
+        """Give back a reserved seq whose file was never produced."""
+        with closing(self._connect()) as connection:
+            connection.execute("DELETE FROM generations WHERE id = ? AND status = 'reserved'", (entry_id,))
+
+    def stored_file(self, content_key: str, format_name: str) -> Optional[Path]:
+        path = self._path(content_key, format_name)
+        return path if path.exists() else None
+
+    def _path(self, content_key: str, format_name: str) -> Path:
+        return self._files() / f"{content_key}{get_format(format_name).extension}"
+
+    def store(self, content_key: str, format_name: str, content: bytes) -> None:
+        handle, temp_path = tempfile.mkstemp(dir=self._files(), suffix=".tmp")
+        with os.fdopen(handle, "wb") as stream:
+            stream.write(content)
+        os.replace(temp_path, self._path(content_key, format_name))
+
+    def record(self, entry_id: int, generation: Generation) -> None:
+        """Complete a reserved entry whose file is stored."""
+        size = self._path(generation.content_key, generation.format_name).stat().st_size
+        with closing(self._connect()) as connection:
+            connection.execute(
+                "UPDATE generations SET status = 'done', filename = ?, format = ?, content_key = ?,"
+                " total_salaries = ?, number_of_records = ?, size_bytes = ? WHERE id = ?",
+                (*generation, size, entry_id),
+            )
+
+    def store_and_record(self, entry_id: int, generation: Generation, content: bytes) -> None:
+        if self.stored_file(generation.content_key, generation.format_name) is None:
+            self.store(generation.content_key, generation.format_name, content)
+        self.record(entry_id, generation)
+
+    async def tee(
+        self, entry_id: int, generation: Generation, chunks: AsyncIterator[bytes]
+    ) -> AsyncGenerator[bytes, None]:
+        """Pass chunks through while spooling them to disk; the file is kept and recorded once the body completes.
+
+        A body that fails or is closed early (the client went away) releases the reserved entry.
+        """
+        handle, temp_path = await run_in_threadpool(tempfile.mkstemp, dir=self._files(), suffix=".tmp")
+        stream = os.fdopen(handle, "wb")
+        completed = False
+        try:
+            async for chunk in chunks:
+                await run_in_threadpool(stream.write, chunk)
+                yield chunk
+            await run_in_threadpool(self._keep_spool, stream, temp_path, entry_id, generation)
+            completed = True
+        finally:
+            if not completed:
+                await close_stream(chunks)
+                await run_in_threadpool(self._discard_spool, stream, temp_path, entry_id)
+
+    def _keep_spool(self, stream: BinaryIO, temp_path: str, entry_id: int, generation: Generation) -> None:
+        stream.close()
+        os.replace(temp_path, self._path(generation.content_key, generation.format_name))
+        self.record(entry_id, generation)
+
+    def _discard_spool(self, stream: BinaryIO, temp_path: str, entry_id: int) -> None:
+        stream.close()
+        Path(temp_path).unlink(missing_ok=True)
+        self.release(entry_id)
+
+    def history(
+        self,
+        employer_cr: Optional[str] = None,
+        payer_bank_short: Optional[str] = None,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        limit: int = DEFAULT_HISTORY_LIMIT,
+    ) -> List[Dict]:
+        """Finished generations, newest first, filtered on the indexed columns."""
+        conditions = ["status = 'done'"]
+        parameters: List = []
+        if employer_cr:
+            conditions.append("employer_cr = ?")
+            parameters.append(safe_text(employer_cr, 32))
+        if payer_bank_short:
+            conditions.append("payer_bank_short = ?")
+            parameters.append(safe_text(payer_bank_short, 16).upper())
+        if date_from is not None:
+            conditions.append("processing_date >= ?")
+            parameters.append(date_from.isoformat())
+        if date_to is not None:
+            conditions.append("processing_date <= ?")
+            parameters.append(date_to.isoformat())
+        query = (
+            f"SELECT {', '.join(_COLUMNS)} FROM generations"
+            f" WHERE {' AND '.join(conditions)} ORDER BY id DESC LIMIT ?"
+        )
+        with closing(self._connect()) as connection:
+            rows = connection.execute(query, (*parameters, limit)).fetchall()
+        return [dict(zip(_COLUMNS, row)) for row in rows]
+
+    def get(self, entry_id: int) -> Dict:
+        with closing(self._connect()) as connection:
+            row = connection.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM generations WHERE id = ? AND status = 'done'", (entry_id,)
+            ).fetchone()
+        if row is None:
+            raise LedgerEntryNotFound(entry_id)
+        return dict(zip(_COLUMNS, row))
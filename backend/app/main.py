@@ -1,12 +1,77 @@
+import logging
 import os
+from collections import Counter
+from contextlib import asynccontextmanager
+from datetime import date
+from itertools import chain
 from pathlib import Path
+from typing import AsyncIterator, BinaryIO, Iterator, List, Optional, Tuple
 
-from fastapi import FastAPI, HTTPException
+import anyio
+from fastapi import Depends, FastAPI, File, Form, HTTPException, Query, Request, UploadFile
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
+from starlette.types import Receive, Scope, Send
 
-from .models import PreviewResponse, SIFRequest
-from .sif import build_sif_rows, build_xlsx_bytes, load_banks
+from .aggregate import build_preview_report_json, build_report_json
+from .banks import BANKS_CACHE_CONTROL, BankDirectory, etag_matches
+from .batch import SplitError, iter_batch_zip, iter_split_zip, split_max_records, split_request
+from .cache import ResultCache
+from .executor import ExecutorSaturated, SIFExecutor, close_stream
+from .formats import OutputFormat, UnknownFormat, get_format, negotiate_format, output_filename
+from .jobs import JobNotFound, JobRunning, JobStore
+from .metrics import METRICS_MEDIA_TYPE, MetricsMiddleware, record_validation
+from .metrics import registry as metrics_registry
+from .models import (
+    JobStatus,
+    LedgerHistory,
+    PayrollReport,
+    PreviewResponse,
+    ReconcileResponse,
+    Roster,
+    RosterSummary,
+    RosterUpdate,
+    SessionDeltaResponse,
+    SessionPatchRequest,
+    SessionResponse,
+    SIFBatchRequest,
+    SIFHeader,
+    SIFRequest,
+    ValidationReport,
+)
+from .ledger import Generation, GenerationLedger, LedgerEntryNotFound, LedgerError
+from .payloads import MalformedPayload, UnsupportedPayload, parse_payload
+from .reconcile import InvalidThreshold, reconcile
+from .registry import BankRegistry
+from .roster import RosterError, RosterStore, employer_key, roster_request
+from .sif import (
+    PayrollNormalizer,
+    SIFPipeline,
+    build_preview_json,
+    build_validation_json,
+    employee_records,
+    iter_sif_chunks,
+    prepare_sif,
+    resolved_filename,
+    safe_text,
+    sif_filename,
+    warm_pipeline,
+)
+from .sessions import (
+    SessionNotFound,
+    SessionPatchError,
+    SessionStore,
+    create_session_preview,
+    iter_session_xlsx,
+    patch_session,
+    read_session_preview,
+)
+from .settings import env_flag
+from .startup import StartupReport
+from .uploads import UploadFormatError, import_sif, iter_sif_records, iter_upload_records, upload_kind
 
 BASE_DIR = Path(__file__).resolve().parents[1]
 BANKS_PATH = BASE_DIR / "data" / "omani_banks.json"
@@ -26,83 +91,662 @@ def build_cors_origins() -> list[str]:
     return DEFAULT_DEV_ORIGINS
 
 
-app = FastAPI(title="Oman WPS SIF API", version="1.0.0")
+executor = SIFExecutor.from_env()
+bank_directory = BankDirectory(BANKS_PATH)
+session_store = SessionStore.from_env()
+result_cache = ResultCache.from_env()
+job_store = JobStore.from_env()
+roster_store = RosterStore.from_env()
+generation_ledger = GenerationLedger.from_env()
+
+
+startup_report = StartupReport()
+logger = logging.getLogger("uvicorn.error")
+
+
+async def warm_up(report: StartupReport) -> None:
+    """Pay first-request costs before the server accepts traffic."""
+    with report.phase("banks"):
+        registry = current_registry()
+    with report.phase("runtime"):
+        # anyio imports its event-loop backend on first use, which is the first streamed response.
+        await anyio.sleep(0)
+    with report.phase("pipeline"):
+        await executor.run(warm_pipeline, registry)
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    startup_report.record_boot()
+    if env_flag("SIF_WARMUP", True):
+        await warm_up(startup_report)
+    logger.info(startup_report.summary())
+    yield
+    executor.shutdown()
+    job_store.shutdown()
+
+
+app = FastAPI(title="Oman WPS SIF API", version="1.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
     allow_origins=build_cors_origins(),
     allow_origin_regex=os.getenv("CORS_ALLOW_ORIGIN_REGEX", r"https://.*\\.vercel\\.app"),
     allow_credentials=False,
-    allow_methods=["GET", "POST", "OPTIONS"],
+    allow_methods=["GET", "POST", "PATCH", "DELETE", "OPTIONS"],
     allow_headers=["*"],
-    expose_headers=["Content-Disposition", "X-Generated-Filename"],
+    expose_headers=[
+        "Content-Disposition",
+        "X-Generated-Filename",
+        "Retry-After",
+        "ETag",
+        "Server-Timing",
+        "Location",
+        "Accept-Ranges",
+        "Content-Range",
+    ],
 )
+app.add_middleware(MetricsMiddleware)
+
+
+@app.exception_handler(ExecutorSaturated)
+async def executor_saturated_handler(_: Request, exc: ExecutorSaturated) -> JSONResponse:
+    return JSONResponse(
+        status_code=429,
+        content={"detail": "Server is busy generating SIF files. Retry shortly."},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
 
 
 @app.get("/", include_in_schema=False)
-def root() -> dict:
+async def root() -> dict:
     return {
         "name": "Oman WPS SIF API",
         "status": "ok",
         "docs": "/docs",
         "health": "/health",
+        "metrics": "/metrics",
         "endpoints": {
             "banks": "/api/banks",
             "preview": "/api/sif/preview",
+            "validate": "/api/sif/validate",
+            "report": "/api/sif/report",
             "generate": "/api/sif/generate",
+            "upload": "/api/sif/upload",
+            "batch": "/api/sif/batch",
+            "split": "/api/sif/split",
+            "queue": "/api/sif/queue",
+            "sessions": "/api/sif/sessions",
+            "jobs": "/api/sif/jobs",
+            "reconcile": "/api/sif/reconcile",
+            "import": "/api/sif/import",
+            "rosters": "/api/rosters/{employer_cr}",
+            "ledger": "/api/ledger",
         },
     }
 
 
+# Cheap endpoints stay on the event loop so they never wait behind generation work.
 @app.get("/health")
-def health() -> dict:
+async def health() -> dict:
     return {"status": "ok"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    queue = executor.stats()
+    cache = result_cache.stats()
+    extra = [
+        "# TYPE sif_executor_running gauge",
+        f"sif_executor_running {queue['running']}",
+        "# TYPE sif_executor_queued gauge",
+        f"sif_executor_queued {queue['queued']}",
+        "# TYPE sif_executor_rejected_total counter",
+        f"sif_executor_rejected_total {queue['rejected']}",
+        "# TYPE sif_cache_hits_total counter",
+        f"sif_cache_hits_total {cache['hits']}",
+        "# TYPE sif_cache_misses_total counter",
+        f"sif_cache_misses_total {cache['misses']}",
+        "# TYPE sif_cache_bytes gauge",
+        f"sif_cache_bytes {cache['bytes']}",
+        "# TYPE sif_sessions gauge",
+        f"sif_sessions {len(session_store)}",
+    ]
+    return Response(content=metrics_registry.render(extra), media_type=METRICS_MEDIA_TYPE)
+
+
+@app.get("/api/sif/queue")
+async def sif_queue() -> dict:
+    return {**executor.stats(), "cache": result_cache.stats()}
+
+
 @app.get("/api/banks")
-def get_banks() -> dict:
-    if not BANKS_PATH.exists():
-        raise HTTPException(status_code=500, detail="Bank dataset missing.")
-    return {"banks": load_banks(BANKS_PATH)}
+async def get_banks(request: Request) -> Response:
+    try:
+        snapshot = bank_directory.snapshot()
+    except FileNotFoundError as exc:
+        raise HTTPException(status_code=500, detail="Bank dataset missing.") from exc
+
+    headers = {"ETag": snapshot.etag, "Cache-Control": BANKS_CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), snapshot.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=snapshot.body, media_type="application/json", headers=headers)
 
 
-@app.post("/api/sif/preview", response_model=PreviewResponse)
-def preview_sif(payload: SIFRequest) -> PreviewResponse:
+def require_header_fields(payload: SIFHeader) -> None:
     if not payload.employer_cr.strip() or not payload.payer_cr.strip() or not payload.payer_account.strip():
         raise HTTPException(
             status_code=422,
             detail="Employer CR-NO, Payer CR-NO, and Payer Account Number are required.",
         )
 
-    rows, normalized, filename, total_salaries, number_of_records = build_sif_rows(payload)
 
-    return PreviewResponse(
-        filename=filename,
-        total_salaries=total_salaries,
-        number_of_records=number_of_records,
-        sheet_name=payload.sheet_name.strip() or "Sheet1",
-        row_count=len(rows),
-        normalized_employees=normalized,
+def current_registry() -> Optional[BankRegistry]:
+    try:
+        return bank_directory.snapshot().registry
+    except FileNotFoundError:
+        return None
+
+
+def json_response(body: str) -> Response:
+    # Bodies are serialized from already-normalized rows; returning a Response skips
+    # FastAPI's response_model re-validation. response_model still documents the shape.
+    return Response(content=body, media_type="application/json")
+
+
+def attachment_headers(filename: str, etag: Optional[str] = None, negotiated: bool = False) -> dict:
+    headers = {
+        "Content-Disposition": f'attachment; filename="{filename}"',
+        "X-Generated-Filename": filename,
+    }
+    if etag is not None:
+        headers["ETag"] = etag
+    if negotiated:
+        headers["Vary"] = "Accept"
+    return headers
+
+
+class ClosingStreamingResponse(StreamingResponse):
+    """Closes its body once sent, so a client that disconnects early still frees the executor slot behind it."""
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await close_stream(self.body_iterator)
+
+
+def attachment_response(
+    chunks: AsyncIterator[bytes], media_type: str, filename: str, etag: Optional[str] = None, negotiated: bool = False
+) -> StreamingResponse:
+    headers = attachment_headers(filename, etag, negotiated)
+    return ClosingStreamingResponse(chunks, media_type=media_type, headers=headers)
+
+
+def requested_output(requested: Optional[str], request: Request) -> OutputFormat:
+    try:
+        return negotiate_format(requested, request.headers.get("accept"))
+    except UnknownFormat as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+
+
+def normalize_upload(
+    header: SIFHeader, stream: BinaryIO, kind: str, registry: Optional[BankRegistry]
+) -> Tuple[Iterator[List[str]], str]:
+    pipeline = SIFPipeline(header, iter_upload_records(stream, kind), registry)
+    employee_rows = pipeline.spool()
+    return chain(pipeline.header_rows(), employee_rows), pipeline.filename()
+
+
+def parse_sif_request(
+    body: bytes, content_type: Optional[str], content_encoding: Optional[str], loc: Tuple[str, ...] = ("body",)
+) -> SIFRequest:
+    try:
+        return parse_payload(SIFRequest, body, content_type, content_encoding)
+    except UnsupportedPayload as exc:
+        raise HTTPException(status_code=415, detail=str(exc)) from exc
+    except MalformedPayload as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except ValidationError as exc:
+        raise RequestValidationError(
+            [{**error, "loc": (*loc, *error["loc"])} for error in exc.errors(include_url=False)]
+        ) from exc
+
+
+def reconcile_upload(
+    current: SIFRequest,
+    stream: BinaryIO,
+    kind: str,
+    filename: str,
+    registry: Optional[BankRegistry],
+    threshold: str,
+    threshold_percent: Optional[float],
+) -> str:
+    return reconcile(current, iter_sif_records(stream, kind), filename, registry, threshold, threshold_percent)
+
+
+async def with_roster(payload: SIFRequest) -> SIFRequest:
+    if not payload.roster:
+        return payload
+    try:
+        return await executor.run(roster_request, payload, roster_store, local=True)
+    except RosterError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+
+
+async def sif_request_body(request: Request) -> SIFRequest:
+    """SIFRequest body in any accepted encoding: JSON (rows or ``employee_columns``) or
+    MessagePack, optionally gzip/deflate/br compressed. ``roster`` requests come back joined."""
+    payload = parse_sif_request(
+        await request.body(), request.headers.get("content-type"), request.headers.get("content-encoding")
     )
+    return await with_roster(payload)
 
 
-@app.post("/api/sif/generate")
-def generate_sif(payload: SIFRequest) -> Response:
-    if not payload.employer_cr.strip() or not payload.payer_cr.strip() or not payload.payer_account.strip():
+_SIF_SCHEMA = {"$ref": "#/components/schemas/SIFRequest"}
+# The body is parsed by sif_request_body, so describe it for the OpenAPI docs by hand.
+SIF_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/json": {"schema": _SIF_SCHEMA},
+            "application/msgpack": {"schema": _SIF_SCHEMA},
+        },
+    }
+}
+
+
+@app.post("/api/sif/preview", response_model=PreviewResponse, openapi_extra=SIF_REQUEST_BODY)
+async def preview_sif(
+    payload: SIFRequest = Depends(sif_request_body),
+    report: bool = Query(False, description="Add the /api/sif/report breakdowns, computed in the same pass."),
+) -> Response:
+    record_validation()
+    require_header_fields(payload)
+    build = build_preview_report_json if report else build_preview_json
+    return json_response(await executor.run(build, payload, current_registry()))
+
+
+@app.post("/api/sif/report", response_model=PayrollReport, openapi_extra=SIF_REQUEST_BODY)
+async def report_sif(payload: SIFRequest = Depends(sif_request_body)) -> Response:
+    record_validation()
+    require_header_fields(payload)
+    return json_response(await executor.run(build_report_json, payload, current_registry()))
+
+
+@app.post("/api/sif/validate", response_model=ValidationReport, openapi_extra=SIF_REQUEST_BODY)
+async def validate_sif(payload: SIFRequest = Depends(sif_request_body)) -> Response:
+    record_validation()
+    require_header_fields(payload)
+    return json_response(await executor.run(build_validation_json, payload, current_registry()))
+
+
+@app.post("/api/sif/generate", openapi_extra=SIF_REQUEST_BODY)
+async def generate_sif(
+    request: Request,
+    payload: SIFRequest = Depends(sif_request_body),
+    strict: bool = Query(False, description="Refuse payrolls with duplicate employee IDs, accounts or references."),
+    auto_seq: bool = Query(False, description="Use the next seq the generation ledger has not handed out yet."),
+) -> Response:
+    record_validation()
+    require_header_fields(payload)
+
+    output = requested_output(payload.format, request)
+    registry = current_registry()
+    entry_id = None
+    if generation_ledger.enabled or auto_seq:
+        header = PayrollNormalizer(registry).resolve_header(payload)
+        try:
+            entry_id, seq = await executor.run(generation_ledger.reserve, header, auto_seq, local=True)
+        except LedgerError as exc:
+            raise HTTPException(status_code=422, detail=str(exc)) from exc
+        payload = payload.model_copy(update={"seq": seq})
+
+    try:
+        # The file is a pure function of the normalized rows and format, so their hash is its identity.
+        prepared = await executor.run(prepare_sif, payload, registry, output.name, strict)
+    except BaseException:
+        await release_generation(entry_id)
+        raise
+    if prepared.duplicate_count:
+        await release_generation(entry_id)
         raise HTTPException(
             status_code=422,
-            detail="Employer CR-NO, Payer CR-NO, and Payer Account Number are required.",
+            detail={
+                "message": "Payroll has duplicate employee IDs, accounts or reference numbers.",
+                "duplicate_count": prepared.duplicate_count,
+                "duplicates": prepared.duplicates,
+            },
         )
+    etag = f'"{prepared.key}"'
+    headers = attachment_headers(prepared.filename, etag, negotiated=True)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        await release_generation(entry_id)
+        return Response(status_code=304, headers=headers)
 
-    rows, _, filename, _, _ = build_sif_rows(payload)
-    sheet_name = payload.sheet_name.strip() or "Sheet1"
-    workbook_bytes = build_xlsx_bytes(rows, sheet_name)
+    generation = Generation(
+        prepared.filename, output.name, prepared.key, prepared.total_salaries, prepared.number_of_records
+    )
+    if entry_id is not None:
+        headers["X-Ledger-Entry"] = str(entry_id)
+    cached = await run_in_threadpool(result_cache.get, prepared.key)
+    stored = generation_ledger.stored_file(prepared.key, output.name) if entry_id is not None else None
+    if cached is None and stored is not None:
+        # An earlier generation already stored these exact bytes.
+        await executor.run(generation_ledger.record, entry_id, generation, local=True)
+        return FileResponse(stored, media_type=output.media_type, headers=headers)
+    if cached is not None:
+        if entry_id is not None:
+            await executor.run(generation_ledger.store_and_record, entry_id, generation, cached, local=True)
+        return Response(content=cached, media_type=output.media_type, headers=headers)
 
-    return Response(
-        content=workbook_bytes,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={
-            "Content-Disposition": f'attachment; filename="{filename}"',
-            "X-Generated-Filename": filename,
-        },
+    chunks = await executor.stream(iter_sif_chunks, prepared.rows(), prepared.sheet_name, output.name, local=True)
+    if result_cache.enabled:
+        chunks = result_cache.tee(prepared.key, chunks)
+    if entry_id is not None:
+        chunks = generation_ledger.tee(entry_id, generation, chunks)
+    return ClosingStreamingResponse(chunks, media_type=output.media_type, headers=headers)
+
+
+async def release_generation(entry_id: Optional[int]) -> None:
+    if entry_id is not None:
+        await executor.run(generation_ledger.release, entry_id, local=True)
+
+
+@app.post("/api/sif/upload")
+async def upload_sif(
+    request: Request,
+    file: UploadFile = File(..., description="HR export (.csv or .xlsx) with one employee per row."),
+    employer_cr: str = Form(...),
+    payer_cr: str = Form(...),
+    payer_bank_short: str = Form(...),
+    payer_account: str = Form(...),
+    salary_year: int = Form(..., ge=2000, le=2100),
+    salary_month: int = Form(..., ge=1, le=12),
+    payment_type: str = Form("Salary"),
+    processing_date: date = Form(...),
+    seq: int = Form(1, ge=1, le=999),
+    sheet_name: str = Form("Sheet1"),
+    format: Optional[str] = Form(None, description="Output format (xlsx or csv); defaults to the Accept header."),
+) -> StreamingResponse:
+    output = requested_output(format, request)
+    header = SIFHeader(
+        employer_cr=employer_cr,
+        payer_cr=payer_cr,
+        payer_bank_short=payer_bank_short,
+        payer_account=payer_account,
+        salary_year=salary_year,
+        salary_month=salary_month,
+        payment_type=payment_type,
+        processing_date=processing_date,
+        seq=seq,
+        sheet_name=sheet_name,
+    )
+    require_header_fields(header)
+
+    try:
+        kind = upload_kind(file.filename, file.content_type)
+        rows, filename = await executor.run(normalize_upload, header, file.file, kind, current_registry(), local=True)
+    except UploadFormatError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+
+    sheet_name = safe_text(header.sheet_name, 31) or "Sheet1"
+    chunks = await executor.stream(iter_sif_chunks, rows, sheet_name, output.name, local=True)
+    return attachment_response(chunks, output.media_type, output_filename(filename, output), negotiated=True)
+
+
+@app.post("/api/sif/batch")
+async def generate_sif_batch(payload: SIFBatchRequest) -> StreamingResponse:
+    record_validation()
+    for request in payload.requests:
+        require_header_fields(request)
+
+    registry = current_registry()
+    filenames = Counter(resolved_filename(request, registry) for request in payload.requests)
+    duplicates = sorted(name for name, count in filenames.items() if count > 1)
+    if duplicates:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Batch would produce duplicate SIF filenames (adjust seq): {', '.join(duplicates)}",
+        )
+
+    # The batch fans out to its own process pool; the executor slot just bounds admission.
+    chunks = await executor.stream(iter_batch_zip, payload.requests, registry, local=True)
+    return attachment_response(chunks, "application/zip", f"SIF_batch_{len(payload.requests)}_files.zip")
+
+
+@app.post("/api/sif/split", openapi_extra=SIF_REQUEST_BODY)
+async def generate_sif_split(
+    request: Request,
+    payload: SIFRequest = Depends(sif_request_body),
+    max_records: Optional[int] = Query(None, ge=1, description="Employees per file (default SIF_SPLIT_MAX_RECORDS)."),
+    group_by_bic: bool = Query(False, description="Keep each employee bank in its own files."),
+) -> StreamingResponse:
+    record_validation()
+    require_header_fields(payload)
+    # The Accept header picks the format of the files inside the zip.
+    output = requested_output(payload.format, request)
+    registry = current_registry()
+    limit = max_records or split_max_records()
+    try:
+        chunks = await executor.run(split_request, payload, limit, group_by_bic, registry, local=True)
+    except SplitError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+
+    stem = resolved_filename(payload, registry).rsplit(".", 1)[0]
+    files = await executor.stream(iter_split_zip, chunks, registry, output.name, local=True)
+    return attachment_response(files, "application/zip", f"{stem}_split_{len(chunks)}_files.zip", negotiated=True)
+
+
+@app.post("/api/sif/reconcile", response_model=ReconcileResponse)
+async def reconcile_sif(
+    # A file part rather than a form field: Starlette caps plain fields at 1 MB, a few thousand employees.
+    payload: UploadFile = File(..., description="The current SIFRequest as JSON."),
+    previous: UploadFile = File(..., description="Last period's SIF (.xlsx or .csv) as generated by this API."),
+    salary_threshold: str = Form("0", description="Only report net salary changes larger than this amount (OMR)."),
+    salary_threshold_percent: Optional[float] = Form(
+        None, ge=0, description="Also require the change to exceed this percentage of last period's net salary."
+    ),
+) -> Response:
+    current = await with_roster(
+        parse_sif_request(await payload.read(), "application/json", None, loc=("body", "payload"))
+    )
+    record_validation()
+    require_header_fields(current)
+    try:
+        kind = upload_kind(previous.filename, previous.content_type)
+        return json_response(
+            await executor.run(
+                reconcile_upload,
+                current,
+                previous.file,
+                kind,
+                previous.filename or "",
+                current_registry(),
+                salary_threshold,
+                salary_threshold_percent,
+                local=True,
+            )
+        )
+    except (UploadFormatError, InvalidThreshold) as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+
+
+@app.post("/api/sif/import", response_model=SIFRequest)
+async def import_sif_file(
+    file: UploadFile = File(..., description="A SIF (.xlsx or .csv) as generated by this API."),
+    processing_date: Optional[date] = Form(None, description="Defaults to the date in the file name."),
+    seq: Optional[int] = Form(None, ge=1, le=999, description="Defaults to the sequence number in the file name."),
+) -> Response:
+    try:
+        kind = upload_kind(file.filename, file.content_type)
+        return json_response(
+            await executor.run(import_sif, file.file, kind, file.filename or "", processing_date, seq, local=True)
+        )
+    except UploadFormatError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+
+
+def get_session(session_id: str):
+    try:
+        return session_store.get(session_id)
+    except SessionNotFound as exc:
+        raise HTTPException(status_code=404, detail="Preview session not found or expired.") from exc
+
+
+@app.post("/api/sif/sessions", response_model=SessionResponse, openapi_extra=SIF_REQUEST_BODY)
+async def create_preview_session(payload: SIFRequest = Depends(sif_request_body)) -> Response:
+    record_validation()
+    require_header_fields(payload)
+    return json_response(
+        await executor.run(create_session_preview, session_store, payload, current_registry(), local=True)
+    )
+
+
+@app.get("/api/sif/sessions/{session_id}", response_model=SessionResponse)
+async def read_preview_session(session_id: str) -> Response:
+    return json_response(await executor.run(read_session_preview, get_session(session_id), local=True))
+
+
+@app.patch("/api/sif/sessions/{session_id}", response_model=SessionDeltaResponse)
+async def patch_preview_session(session_id: str, payload: SessionPatchRequest) -> Response:
+    if payload.header is not None:
+        require_header_fields(payload.header)
+    session = get_session(session_id)
+    try:
+        return json_response(await executor.run(patch_session, session, payload, local=True))
+    except SessionPatchError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+
+
+@app.delete("/api/sif/sessions/{session_id}", status_code=204)
+async def delete_preview_session(session_id: str) -> Response:
+    try:
+        session_store.delete(session_id)
+    except SessionNotFound as exc:
+        raise HTTPException(status_code=404, detail="Preview session not found or expired.") from exc
+    return Response(status_code=204)
+
+
+@app.post("/api/sif/sessions/{session_id}/generate")
+async def generate_session_sif(session_id: str, request: Request, format: Optional[str] = None) -> StreamingResponse:
+    output = requested_output(format, request)
+    session = get_session(session_id)
+    require_header_fields(session.header)
+    chunks = await executor.stream(iter_session_xlsx, session, output.name, local=True)
+    return attachment_response(chunks, output.media_type, sif_filename(session.header, output.name), negotiated=True)
+
+
+def get_job(job_id: str):
+    try:
+        return job_store.get(job_id)
+    except JobNotFound as exc:
+        raise HTTPException(status_code=404, detail="Job not found or expired.") from exc
+
+
+@app.post("/api/sif/jobs", response_model=JobStatus, status_code=202, openapi_extra=SIF_REQUEST_BODY)
+async def submit_sif_job(response: Response, payload: SIFRequest = Depends(sif_request_body)) -> JobStatus:
+    record_validation()
+    require_header_fields(payload)
+    job = job_store.submit(payload, current_registry())
+    response.headers["Location"] = f"/api/sif/jobs/{job.job_id}"
+    return job_store.status(job)
+
+
+@app.get("/api/sif/jobs/{job_id}", response_model=JobStatus)
+async def read_sif_job(job_id: str) -> JobStatus:
+    return job_store.status(get_job(job_id))
+
+
+@app.get("/api/sif/jobs/{job_id}/download")
+async def download_sif_job(job_id: str) -> FileResponse:
+    job = get_job(job_id)
+    if job.status == "failed":
+        raise HTTPException(status_code=422, detail=f"Job failed: {job.error}")
+    if job.status != "done" or job.path is None:
+        raise HTTPException(status_code=409, detail="Job is not finished yet.")
+    # FileResponse answers Range/If-Range requests with 206, so interrupted downloads can resume.
+    return FileResponse(
+        job.path,
+        media_type=get_format(job.format_name).media_type,
+        filename=job.filename,
+        headers={"X-Generated-Filename": job.filename},
+    )
+
+
+@app.delete("/api/sif/jobs/{job_id}", status_code=204)
+async def delete_sif_job(job_id: str) -> Response:
+    try:
+        job_store.delete(job_id)
+    except JobNotFound as exc:
+        raise HTTPException(status_code=404, detail="Job not found or expired.") from exc
+    except JobRunning as exc:
+        raise HTTPException(status_code=409, detail="Job is still running.") from exc
+    return Response(status_code=204)
+
+
+@app.put("/api/rosters/{employer_cr}", response_model=RosterSummary)
+async def save_roster(employer_cr: str, payload: RosterUpdate) -> RosterSummary:
+    try:
+        stored = await executor.run(
+            roster_store.save,
+            employer_cr,
+            employee_records(payload.employees),
+            current_registry(),
+            payload.replace,
+            local=True,
+        )
+    except RosterError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+    total = await executor.run(roster_store.count, employer_cr, local=True)
+    return RosterSummary(employer_cr=employer_key(employer_cr), stored=stored, number_of_employees=total)
+
+
+@app.get("/api/rosters/{employer_cr}", response_model=Roster)
+async def read_roster(employer_cr: str) -> Roster:
+    employees = await executor.run(roster_store.employees, employer_cr, local=True)
+    if not employees:
+        raise HTTPException(status_code=404, detail="No roster is stored for this employer.")
+    return Roster(employer_cr=employer_key(employer_cr), employees=employees)
+
+
+@app.delete("/api/rosters/{employer_cr}", status_code=204)
+async def delete_roster(employer_cr: str) -> Response:
+    if not await executor.run(roster_store.delete, employer_cr, local=True):
+        raise HTTPException(status_code=404, detail="No roster is stored for this employer.")
+    return Response(status_code=204)
+
+
+@app.get("/api/ledger", response_model=LedgerHistory)
+async def read_ledger(
+    employer_cr: Optional[str] = None,
+    payer_bank_short: Optional[str] = None,
+    date_from: Optional[date] = Query(None, description="Earliest processing date."),
+    date_to: Optional[date] = Query(None, description="Latest processing date."),
+    limit: int = Query(100, ge=1, le=1000),
+) -> LedgerHistory:
+    if not generation_ledger.enabled:
+        raise HTTPException(status_code=404, detail="The generation ledger is not configured.")
+    entries = await executor.run(
+        generation_ledger.history, employer_cr, payer_bank_short, date_from, date_to, limit, local=True
+    )
+    return LedgerHistory(entries=entries)
+
+
+@app.get("/api/ledger/{entry_id}/download")
+async def download_ledger_entry(entry_id: int) -> FileResponse:
+    if not generation_ledger.enabled:
+        raise HTTPException(status_code=404, detail="The generation ledger is not configured.")
+    try:
+        entry = await executor.run(generation_ledger.get, entry_id, local=True)
+    except LedgerEntryNotFound as exc:
+        raise HTTPException(status_code=404, detail="Ledger entry not found.") from exc
+    path = generation_ledger.stored_file(entry["content_key"], entry["format"])
+    if path is None:
+        raise HTTPException(status_code=410, detail="The stored file is gone.")
+    return FileResponse(
+        path,
+        media_type=get_format(entry["format"]).media_type,
+        filename=entry["filename"],
+        headers={"X-Generated-Filename": entry["filename"], "ETag": f'"{entry["content_key"]}"'},
     )
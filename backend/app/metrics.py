@@ -0,0 +1,321 @@
+import os
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from contextlib import nullcontext
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .settings import env_flag
+
+METRICS_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+TIME_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+COUNT_BUCKETS = (1, 10, 100, 1_000, 5_000, 10_000, 50_000, 100_000)
+SIZE_BUCKETS = tuple(4096 * 4**power for power in range(8))  # 4 KiB .. 64 MiB
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _format_labels(labels: Labels, extra: str = "") -> str:
+    parts = [f'{key}="{value}"' for key, value in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _le(bound) -> str:
+    return f'le="{bound:g}"' if isinstance(bound, (int, float)) else f'le="{bound}"'
+
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, help_text: str) -> None:
+        self.name = name
+        self.help_text = help_text
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def samples(self) -> Iterator[str]:
+        """The metric's sample lines in text exposition format."""
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} {self.kind}"
+        yield from self.samples()
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str) -> None:
+        super().__init__(name, help_text)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            yield f"{self.name}{_format_labels(labels)} {value:g}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: Iterable[float]) -> None:
+        super().__init__(name, help_text)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Labels, List] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        position = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Per-bucket (non-cumulative) counts, then sum and count.
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][position] += 1
+            series[1] += value
+            series[2] += 1
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            series = [(labels, list(counts), total, count) for labels, (counts, total, count) in self._series.items()]
+        for labels, counts, total, count in sorted(series):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket{_format_labels(labels, _le(bound))} {cumulative}"
+            yield f"{self.name}_bucket{_format_labels(labels, _le('+Inf'))} {count}"
+            yield f"{self.name}_sum{_format_labels(labels)} {total:g}"
+            yield f"{self.name}_count{_format_labels(labels)} {count}"
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: List[_Metric] = []
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        return self._register(Counter(name, help_text))
+
+    def gauge(self, name: str, help_text: str) -> Gauge:
+        return self._register(Gauge(name, help_text))
+
+    def histogram(self, name: str, help_text: str, buckets: Iterable[float]) -> Histogram:
+        return self._register(Histogram(name, help_text, buckets))
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self, extra: Iterable[str] = ()) -> str:
+        lines = [line for metric in self._metrics for line in metric.render()]
+        lines.extend(extra)
+        return "\n".join(lines) + "\n"
+
+
+METRICS_ENABLED = env_flag("SIF_METRICS", True)
+SERVER_TIMING_ENABLED = env_flag("SIF_SERVER_TIMING", False)
+
+registry = MetricsRegistry()
+requests_total = registry.counter("sif_http_requests_total", "HTTP requests by route, method and status.")
+request_seconds = registry.histogram("sif_http_request_seconds", "Time to response headers by route.", TIME_BUCKETS)
+requests_in_flight = registry.gauge("sif_http_requests_in_flight", "HTTP requests currently being handled.")
+stage_seconds = registry.histogram("sif_stage_seconds", "Wall time per SIF pipeline stage.", TIME_BUCKETS)
+employees_per_file = registry.histogram("sif_employees_per_file", "Employee rows per generated SIF.", COUNT_BUCKETS)
+output_bytes = registry.histogram("sif_output_bytes", "Size of generated workbooks in bytes.", SIZE_BUCKETS)
+startup_seconds = registry.gauge("sif_startup_seconds", "Wall time of each startup phase.")
+
+# Stage durations for the current request, only collected when Server-Timing is on.
+_request_stages: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("sif_request_stages", default=None)
+_request_started: ContextVar[Optional[float]] = ContextVar("sif_request_started", default=None)
+
+
+class _Stage:
+    __slots__ = ("name", "started")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.started = 0.0
+
+    def __enter__(self) -> "_Stage":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *_) -> None:
+        record_stage(self.name, time.perf_counter() - self.started)
+
+
+_DISABLED = nullcontext()
+
+
+def stage(name: str):
+    """Time a block as pipeline stage ``name``; a shared no-op when metrics are off."""
+    if not METRICS_ENABLED:
+        return _DISABLED
+    return _Stage(name)
+
+
+def record_stage(name: str, seconds: float) -> None:
+    stage_seconds.observe(seconds, stage=name)
+    stages = _request_stages.get()
+    if stages is not None:
+        stages.append((name, seconds))
+
+
+def record_validation() -> None:
+    """Called first thing in a handler: time since the request arrived is body parsing and validation."""
+    started = _request_started.get()
+    if started is not None:
+        record_stage("validate", time.perf_counter() - started)
+
+
+def observe_payroll(employee_count: int) -> None:
+    if METRICS_ENABLED:
+        employees_per_file.observe(employee_count)
+
+
+def timed_chunks(name: str, chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Re-yield ``chunks``, recording their production time as stage ``name`` and the total size."""
+    if not METRICS_ENABLED:
+        yield from chunks
+        return
+    elapsed = 0.0
+    size = 0
+    iterator = iter(chunks)
+    while True:
+        started = time.perf_counter()
+        chunk = next(iterator, None)
+        elapsed += time.perf_counter() - started
+        if chunk is None:
+            break
+        size += len(chunk)
+        yield chunk
+    record_stage(name, elapsed)
+    output_bytes.observe(size)
+
+
+def server_timing(stages: List[Tuple[str, float]], total: float) -> str:
+    entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in stages]
+    entries.append(f"app;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware: request counts, latency, in-flight gauge and optional Server-Timing."""
+
+    def __init__(self, app, server_timing_enabled: bool = SERVER_TIMING_ENABLED) -> None:
+        self.app = app
+        self.server_timing_enabled = server_timing_enabled
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        started_token = _request_started.set(started)
+        stages: Optional[List[Tuple[str, float]]] = [] if self.server_timing_enabled else None
+        stages_token = _request_stages.set(stages)
+        status = "500"
+
+        async def send_with_metrics(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+                elapsed = time.perf_counter() - started
+                route = scope.get("route")
+                request_seconds.observe(elapsed, route=getattr(route, "path", "unmatched"))
+                if stages is not None:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", server_timing(stages, elapsed).encode("latin-1")))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        requests_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            requests_in_flight.dec()
+            route = scope.get("route")
+            requests_total.inc(route=getattr(route, "path", "unmatched"), method=scope["method"], status=status)
+            _request_started.reset(started_token)
+            _request_stages.reset(stages_token)
+
+
+class Profiler:
+    """Samples a fraction of jobs under cProfile and writes ``.prof`` files for ``pstats``/snakeviz.
+
+    Only one job is profiled at a time; while one is active further jobs are not sampled.
+    """
+
+    def __init__(self, sample_rate: float, directory: Path) -> None:
+        self.sample_rate = sample_rate
+        self.directory = directory
+        self._busy = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> Optional["Profiler"]:
+        try:
+            sample_rate = float(os.getenv("SIF_PROFILE", "0") or 0)
+        except ValueError:
+            sample_rate = 0.0
+        if sample_rate <= 0:
+            return None
+        directory = Path(os.getenv("SIF_PROFILE_DIR", "").strip() or "profiles")
+        directory.mkdir(parents=True, exist_ok=True)
+        return cls(min(sample_rate, 1.0), directory)
+
+    def start(self, label: str) -> Optional["ProfileSession"]:
+        if random.random() >= self.sample_rate or not self._busy.acquire(blocking=False):
+            return None
+        return ProfileSession(self, label)
+
+
+class ProfileSession:
+    def __init__(self, profiler: Profiler, label: str) -> None:
+        self._profiler = profiler
+        self._label = label
+        import cProfile  # only sampled deployments pay for the import
+
+        self._profile = cProfile.Profile()
+        self._finished = False
+
+    def call(self, fn: Callable, *args):
+        self._profile.enable()
+        try:
+            return fn(*args)
+        finally:
+            self._profile.disable()
+
+    def finish(self) -> None:
+        if self._finished:
+            return
+        self._finished = True
+        try:
+            path = self._profiler.directory / f"{self._label}-{time.time_ns()}.prof"
+            self._profile.dump_stats(str(path))
+        finally:
+            self._profiler._busy.release()
@@ -1,9 +1,12 @@
 from datetime import date
-from typing import List, Union
+from typing import Annotated, Dict, List, Literal, Optional, Union
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, StrictFloat, StrictInt, StrictStr, field_validator, model_validator
 
-Numberish = Union[str, int, float]
+from .formats import get_format
+
+# Strict members tried in order: one type check per value instead of smart-union coercion attempts.
+Numberish = Annotated[Union[StrictStr, StrictInt, StrictFloat], Field(union_mode="left_to_right")]
 
 
 class EmployeeRow(BaseModel):
@@ -24,7 +27,7 @@ class EmployeeRow(BaseModel):
     notes_comments: str = ""
 
 
-class SIFRequest(BaseModel):
+class SIFHeader(BaseModel):
     employer_cr: str
     payer_cr: str
     payer_bank_short: str
@@ -35,7 +38,183 @@ class SIFRequest(BaseModel):
     processing_date: date
     seq: int = Field(default=1, ge=1, le=999)
     sheet_name: str = "Sheet1"
-    employees: List[EmployeeRow]
+
+
+class EmployeeColumns(BaseModel):
+    """Employees as parallel arrays, one per ``EmployeeRow`` field; omitted columns take the row defaults."""
+
+    employee_id_type: Optional[List[str]] = None
+    employee_id: Optional[List[str]] = None
+    reference_number: Optional[List[str]] = None
+    employee_name: Optional[List[str]] = None
+    employee_bic_code: Optional[List[str]] = None
+    employee_account: Optional[List[str]] = None
+    salary_frequency: Optional[List[str]] = None
+    number_of_working_days: Optional[List[str]] = None
+    net_salary: Optional[List[Numberish]] = None
+    basic_salary: Optional[List[Numberish]] = None
+    extra_hours: Optional[List[Numberish]] = None
+    extra_income: Optional[List[Numberish]] = None
+    deductions: Optional[List[Numberish]] = None
+    social_security_deductions: Optional[List[Numberish]] = None
+    notes_comments: Optional[List[str]] = None
+
+    @model_validator(mode="after")
+    def check_lengths(self) -> "EmployeeColumns":
+        lengths = {len(values) for values in self.__dict__.values() if values is not None}
+        if len(lengths) > 1:
+            raise ValueError("All employee columns must have the same length.")
+        return self
+
+    def __len__(self) -> int:
+        return next((len(values) for values in self.__dict__.values() if values is not None), 0)
+
+
+class SIFRequest(SIFHeader):
+    employees: List[EmployeeRow] = []
+    employee_columns: Optional[EmployeeColumns] = None
+    # Output format name ("xlsx", "csv"); when omitted the Accept header decides.
+    format: Optional[str] = None
+    # Fill the static employee fields from the employer's stored roster (see /api/rosters),
+    # matched on employee_id, so only the monthly columns need to be sent.
+    roster: bool = False
+
+    @field_validator("format")
+    @classmethod
+    def check_format(cls, value: Optional[str]) -> Optional[str]:
+        return None if value is None else get_format(value).name
+
+    @model_validator(mode="after")
+    def check_employee_source(self) -> "SIFRequest":
+        if self.employee_columns is None:
+            if "employees" not in self.model_fields_set:
+                raise ValueError("Provide employees (one object per row) or employee_columns (parallel arrays).")
+        elif self.employees:
+            raise ValueError("Provide either employees or employee_columns, not both.")
+        return self
+
+    @property
+    def employee_count(self) -> int:
+        if self.employee_columns is not None:
+            return len(self.employee_columns)
+        return len(self.employees)
+
+
+class RosterEmployee(BaseModel):
+    employee_id_type: str
+    employee_id: str
+    reference_number: str
+    employee_name: str
+    employee_bic_code: str
+    employee_account: str
+    salary_frequency: str
+
+
+class RosterUpdate(BaseModel):
+    employees: List[EmployeeRow] = Field(min_length=1)
+    # Drop employees that are not in this update.
+    replace: bool = False
+
+
+class RosterSummary(BaseModel):
+    employer_cr: str
+    stored: int
+    number_of_employees: int
+
+
+class Roster(BaseModel):
+    employer_cr: str
+    employees: List[RosterEmployee]
+
+
+class LedgerEntry(BaseModel):
+    id: int
+    status: str
+    employer_cr: str
+    payer_bank_short: str
+    processing_date: date
+    seq: int
+    filename: str
+    format: str
+    content_key: str
+    total_salaries: str
+    number_of_records: int
+    size_bytes: int
+    created_at: str
+
+
+class LedgerHistory(BaseModel):
+    entries: List[LedgerEntry]
+
+
+class SIFBatchRequest(BaseModel):
+    requests: List[SIFRequest] = Field(min_length=1, max_length=1000)
+
+
+class ValidationIssue(BaseModel):
+    row: Optional[int] = None
+    field: str
+    code: str
+    severity: str = "warning"
+    message: str
+    value: str = ""
+    corrected: Optional[str] = None
+    suggestions: List[str] = []
+
+
+class DuplicateGroup(BaseModel):
+    # employee_id, employee_account or reference_number.
+    field: str
+    value: str
+    rows: List[int]
+
+
+class GroupTotal(BaseModel):
+    value: str
+    number_of_records: int
+    total_salaries: str
+
+
+class BankTotal(BaseModel):
+    employee_bic_code: str
+    short_name: Optional[str] = None
+    bank_name: Optional[str] = None
+    number_of_records: int
+    total_salaries: str
+
+
+class AmountBucket(BaseModel):
+    # Inclusive upper bound in OMR; ``None`` for the open-ended last bucket.
+    up_to: Optional[str] = None
+    count: int
+
+
+class AmountDistribution(BaseModel):
+    # Non-zero amounts only; the buckets count every row.
+    count: int
+    total: str
+    minimum: Optional[str] = None
+    maximum: Optional[str] = None
+    mean: Optional[str] = None
+    buckets: List[AmountBucket]
+
+
+class PayrollBreakdown(BaseModel):
+    by_bank: List[BankTotal]
+    by_frequency: List[GroupTotal]
+    by_id_type: List[GroupTotal]
+    zero_net_count: int
+    zero_net_rows: List[int]
+    # Rows left out because an amount is not a finite number ("NaN").
+    unparsed_count: int = 0
+    unparsed_rows: List[int] = []
+    deductions: AmountDistribution
+    social_security_deductions: AmountDistribution
+
+
+class PayrollReport(PayrollBreakdown):
+    number_of_records: int
+    total_salaries: str
 
 
 class PreviewResponse(BaseModel):
@@ -45,3 +224,122 @@ class PreviewResponse(BaseModel):
     sheet_name: str
     row_count: int
     normalized_employees: List[EmployeeRow]
+    issues: List[ValidationIssue] = []
+    issue_count: int = 0
+    # Rows sharing an employee ID, account or reference number (at most 1000 groups listed).
+    duplicates: List[DuplicateGroup] = []
+    duplicate_count: int = 0
+    # Only with ``?report=true``: the breakdowns of /api/sif/report from the same pass.
+    report: Optional[PayrollBreakdown] = None
+
+
+class ValidationReport(BaseModel):
+    profile: str
+    valid: bool
+    number_of_records: int
+    total_salaries: str
+    error_count: int
+    warning_count: int
+    issues: List[ValidationIssue] = []
+    issue_count: int = 0
+
+
+class RowPatch(BaseModel):
+    op: Literal["insert", "update", "delete"]
+    index: Optional[int] = Field(default=None, ge=0)
+    employee_id: Optional[str] = None
+    employee: Optional[EmployeeRow] = None
+    fields: Dict[str, Numberish] = {}
+
+
+class SessionPatchRequest(BaseModel):
+    header: Optional[SIFHeader] = None
+    patches: List[RowPatch] = Field(default=[], max_length=5000)
+
+
+class RowChange(BaseModel):
+    op: str
+    index: int
+    employee: Optional[EmployeeRow] = None
+
+
+class SessionResponse(PreviewResponse):
+    session_id: str
+    version: int
+
+
+class SessionDeltaResponse(BaseModel):
+    session_id: str
+    version: int
+    filename: str
+    total_salaries: str
+    number_of_records: int
+    row_count: int
+    changes: List[RowChange]
+    issues: List[ValidationIssue] = []
+    issue_count: int = 0
+
+
+JobState = Literal["queued", "running", "done", "failed"]
+
+
+class JobStatus(BaseModel):
+    job_id: str
+    status: JobState
+    filename: str
+    rows_total: int
+    rows_normalized: int = 0
+    rows_written: int = 0
+    size_bytes: Optional[int] = None
+    error: Optional[str] = None
+    expires_in: Optional[int] = None
+
+
+class ReconcileEmployee(BaseModel):
+    employee_id: str
+    employee_account: str
+    employee_name: str
+    employee_bic_code: str
+    net_salary: str
+    row: Optional[int] = None
+    previous_row: Optional[int] = None
+
+
+class SalaryChange(BaseModel):
+    employee_id: str
+    employee_account: str
+    employee_name: str
+    previous_net_salary: str
+    net_salary: str
+    difference: str
+    row: int
+    previous_row: int
+
+
+class BankChange(BaseModel):
+    employee_id: str
+    employee_name: str
+    previous_bic_code: str
+    employee_bic_code: str
+    previous_account: str
+    employee_account: str
+    row: int
+    previous_row: int
+
+
+class ReconcileResponse(BaseModel):
+    previous_filename: str
+    number_of_records: int
+    previous_number_of_records: int
+    total_salaries: str
+    previous_total_salaries: str
+    unchanged_count: int
+    added_count: int
+    removed_count: int
+    salary_change_count: int
+    bank_change_count: int
+    added: List[ReconcileEmployee]
+    removed: List[ReconcileEmployee]
+    # Largest absolute differences first.
+    salary_changes: List[SalaryChange]
+    bank_changes: List[BankChange]
@@ -0,0 +1,121 @@
+import zlib
+from typing import Any, Optional, Type, TypeVar
+
+from pydantic import BaseModel
+
+from .settings import env_int
+
+JSON_MEDIA_TYPES = ("application/json",)
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+CONTENT_ENCODINGS = ("identity", "gzip", "x-gzip", "deflate", "br")
+
+# Decompressed request bodies larger than this are refused (guards against compression bombs).
+MAX_BODY_BYTES = env_int("SIF_MAX_BODY_BYTES", 256 * 1024 * 1024)
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+class UnsupportedPayload(ValueError):
+    pass
+
+
+class MalformedPayload(ValueError):
+    pass
+
+
+def media_type(content_type: Optional[str]) -> str:
+    return (content_type or "application/json").split(";", 1)[0].strip().lower()
+
+
+def _inflate(body: bytes, wbits: int, limit: int) -> bytes:
+    decompressor = zlib.decompressobj(wbits)
+    content = decompressor.decompress(body, limit + 1)
+    if len(content) > limit or decompressor.unconsumed_tail:
+        raise MalformedPayload(f"Decompressed request body exceeds {limit} bytes.")
+    if not decompressor.eof:
+        raise MalformedPayload("Compressed request body is truncated.")
+    return content
+
+
+def _unbrotli(brotli: Any, body: bytes, limit: int) -> bytes:
+    decompressor = brotli.Decompressor()
+    if not hasattr(decompressor, "can_accept_more_data"):
+        raise UnsupportedPayload("Brotli request bodies need brotli 1.2 or later on the server.")
+    parts = []
+    size = 0
+    try:
+        data = body
+        while True:
+            # output_buffer_limit caps what one call may produce, so a bomb stops just past the limit.
+            part = decompressor.process(data, output_buffer_limit=limit + 1 - size)
+            data = b""
+            size += len(part)
+            if size > limit:
+                raise MalformedPayload(f"Decompressed request body exceeds {limit} bytes.")
+            parts.append(part)
+            if decompressor.can_accept_more_data():
+                break
+        finished = decompressor.is_finished()
+    except brotli.error as exc:
+        raise MalformedPayload("Request body is not valid br data.") from exc
+    if not finished:
+        raise MalformedPayload("Compressed request body is truncated.")
+    return b"".join(parts)
+
+
+def decode_body(body: bytes, content_encoding: Optional[str], limit: int = MAX_BODY_BYTES) -> bytes:
+    encoding = (content_encoding or "identity").strip().lower()
+    try:
+        if encoding == "identity":
+            return body
+        if encoding in ("gzip", "x-gzip"):
+            return _inflate(body, 16 + zlib.MAX_WBITS, limit)
+        if encoding == "deflate":
+            # RFC 9110 "deflate" is zlib-wrapped, but raw deflate streams are common in practice.
+            try:
+                return _inflate(body, zlib.MAX_WBITS, limit)
+            except zlib.error:
+                return _inflate(body, -zlib.MAX_WBITS, limit)
+    except zlib.error as exc:
+        raise MalformedPayload(f"Request body is not valid {encoding} data.") from exc
+
+    if encoding == "br":
+        try:
+            import brotli  # type: ignore
+        except ImportError as exc:
+            raise UnsupportedPayload("Brotli request bodies need the optional 'brotli' package on the server.") from exc
+        return _unbrotli(brotli, body, limit)
+
+    raise UnsupportedPayload(f"Unsupported Content-Encoding {encoding!r}; use one of {', '.join(CONTENT_ENCODINGS)}.")
+
+
+def is_json(kind: str) -> bool:
+    return kind in JSON_MEDIA_TYPES or kind.endswith("+json")
+
+
+def unpack_msgpack(body: bytes) -> Any:
+    try:
+        import msgpack  # type: ignore
+    except ImportError as exc:
+        raise UnsupportedPayload("MessagePack request bodies need the optional 'msgpack' package on the server.") from exc
+    try:
+        return msgpack.unpackb(body, raw=False)
+    except (ValueError, msgpack.UnpackException) as exc:
+        raise MalformedPayload("Request body is not valid MessagePack.") from exc
+
+
+def parse_payload(
+    model: Type[ModelT], body: bytes, content_type: Optional[str], content_encoding: Optional[str]
+) -> ModelT:
+    """Decode a (possibly compressed) JSON or MessagePack body straight into ``model``.
+
+    Raises ``UnsupportedPayload``/``MalformedPayload`` for transport problems and pydantic's
+    ``ValidationError`` for content problems.
+    """
+    kind = media_type(content_type)
+    if not is_json(kind) and kind not in MSGPACK_MEDIA_TYPES:
+        raise UnsupportedPayload(f"Unsupported Content-Type {kind!r}; send application/json or application/msgpack.")
+    raw = decode_body(body, content_encoding)
+    if kind in MSGPACK_MEDIA_TYPES:
+        return model.model_validate(unpack_msgpack(raw))
+    return model.model_validate_json(raw)
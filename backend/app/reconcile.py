@@ -0,0 +1,234 @@
+import heapq
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .models import ReconcileResponse, SIFRequest
+from .registry import BankRegistry
+from .sif import dump_constructed, format_fixed, format_total, parse_fixed, q3, request_pipeline, safe_text
+
+MAX_LISTED_CHANGES = 1000
+
+Key = Tuple[str, str]
+# Per previous employee only what the diff needs: name, BIC, net salary (baisa) and sheet row.
+PreviousEntry = Tuple[str, str, int, int]
+
+# Header block (two rows) plus the column-label row precede the first employee; ``row`` and
+# ``previous_row`` are both 1-based sheet rows.
+FIRST_EMPLOYEE_ROW = 4
+
+
+class InvalidThreshold(ValueError):
+    pass
+
+
+def net_baisa(value) -> int:
+    scaled = parse_fixed(value, 3)
+    if scaled is None:
+        scaled = parse_fixed(q3(value), 3)
+    return scaled or 0
+
+
+def parse_threshold(value: Optional[str]) -> int:
+    scaled = parse_fixed((value or "0").strip(), 3)
+    if scaled is None or scaled < 0:
+        raise InvalidThreshold(f"Salary threshold must be a non-negative amount, got {value!r}.")
+    return scaled
+
+
+class PreviousIndex:
+    """Employees of an earlier SIF keyed by (employee_id, employee_account).
+
+    Rows that repeat a key are kept in a small overflow map so none are lost.
+    """
+
+    def __init__(self, records: Iterable[Sequence]) -> None:
+        self.entries: Dict[Key, PreviousEntry] = {}
+        self.overflow: Dict[Key, List[PreviousEntry]] = {}
+        self.total_baisa = 0
+        self.count = 0
+        for row_number, record in enumerate(records, start=FIRST_EMPLOYEE_ROW):
+            net = net_baisa(record[8])
+            key = (safe_text(record[1], 17), safe_text(record[5], 30))
+            entry = (safe_text(record[3], 70), safe_text(record[4], 11).upper(), net, row_number)
+            if key in self.entries:
+                self.overflow.setdefault(key, []).append(entry)
+            else:
+                self.entries[key] = entry
+            self.total_baisa += net
+            self.count += 1
+
+    def take(self, key: Key) -> Optional[PreviousEntry]:
+        extra = self.overflow.get(key)
+        if extra:
+            return extra.pop()
+        return self.entries.pop(key, None)
+
+    def remaining(self) -> Iterable[Tuple[Key, PreviousEntry]]:
+        for key, extra in self.overflow.items():
+            for entry in extra:
+                yield key, entry
+        yield from self.entries.items()
+
+
+def _employee(key: Key, name: str, bic: str, net: str, row: Optional[int] = None, previous_row: Optional[int] = None):
+    return {
+        "employee_id": key[0],
+        "employee_account": key[1],
+        "employee_name": name,
+        "employee_bic_code": bic,
+        "net_salary": net,
+        "row": row,
+        "previous_row": previous_row,
+    }
+
+
+def _bank_change(row: int, current: Sequence[str], previous_key: Key, previous: PreviousEntry) -> Dict:
+    return {
+        "employee_id": current[1],
+        "employee_name": current[3],
+        "previous_bic_code": previous[1],
+        "employee_bic_code": current[4],
+        "previous_account": previous_key[1],
+        "employee_account": current[5],
+        "row": row,
+        "previous_row": previous[3],
+    }
+
+
+class Reconciliation:
+    """Counts every difference but lists at most ``max_listed`` of each kind."""
+
+    def __init__(self, threshold_baisa: int, threshold_percent: Optional[float], max_listed: int) -> None:
+        self.threshold_baisa = threshold_baisa
+        self.threshold_percent = threshold_percent
+        self.max_listed = max_listed
+        self.unchanged = 0
+        self.added: List[Dict] = []
+        self.added_count = 0
+        self.removed: List[Dict] = []
+        self.removed_count = 0
+        self.bank_changes: List[Dict] = []
+        self.bank_change_count = 0
+        # Min-heap on |difference| keeps the largest salary changes in O(n log k).
+        self._salary_heap: List[Tuple[int, int, Dict]] = []
+        self.salary_change_count = 0
+
+    def _list(self, items: List[Dict], item: Dict) -> None:
+        if len(items) < self.max_listed:
+            items.append(item)
+
+    def add(self, row: int, current: Sequence[str]) -> None:
+        self.added_count += 1
+        self._list(self.added, _employee((current[1], current[5]), current[3], current[4], current[8], row=row))
+
+    def remove(self, key: Key, previous: PreviousEntry) -> None:
+        self.removed_count += 1
+        self._list(self.removed, _employee(key, previous[0], previous[1], format_fixed(previous[2], 3), previous_row=previous[3]))
+
+    def bank_change(self, row: int, current: Sequence[str], previous_key: Key, previous: PreviousEntry) -> None:
+        self.bank_change_count += 1
+        self._list(self.bank_changes, _bank_change(row, current, previous_key, previous))
+
+    def salary_exceeds(self, previous: int, current: int) -> bool:
+        difference = abs(current - previous)
+        if difference == 0 or difference <= self.threshold_baisa:
+            return False
+        if self.threshold_percent is not None and previous:
+            return difference * 100 > self.threshold_percent * abs(previous)
+        return True
+
+    def compare(self, row: int, current: Sequence[str], previous_key: Key, previous: PreviousEntry) -> None:
+        changed = False
+        if current[4] != previous[1] or current[5] != previous_key[1]:
+            self.bank_change(row, current, previous_key, previous)
+            changed = True
+        current_net = net_baisa(current[8])
+        if self.salary_exceeds(previous[2], current_net):
+            self.salary_change(row, current, current_net, previous)
+            changed = True
+        if not changed:
+            self.unchanged += 1
+
+    def salary_change(self, row: int, current: Sequence[str], current_net: int, previous: PreviousEntry) -> None:
+        self.salary_change_count += 1
+        difference = current_net - previous[2]
+        change = {
+            "employee_id": current[1],
+            "employee_account": current[5],
+            "employee_name": current[3],
+            "previous_net_salary": format_fixed(previous[2], 3),
+            "net_salary": current[8],
+            "difference": format_fixed(difference, 3),
+            "row": row,
+            "previous_row": previous[3],
+        }
+        entry = (abs(difference), -row, change)
+        if len(self._salary_heap) < self.max_listed:
+            heapq.heappush(self._salary_heap, entry)
+        elif self.max_listed and entry[:2] > self._salary_heap[0][:2]:
+            heapq.heapreplace(self._salary_heap, entry)
+
+    def salary_changes(self) -> List[Dict]:
+        return [change for _, _, change in sorted(self._salary_heap, key=lambda item: item[:2], reverse=True)]
+
+
+def reconcile(
+    request: SIFRequest,
+    previous_records: Iterable[Sequence],
+    previous_filename: str = "",
+    registry: Optional[BankRegistry] = None,
+    threshold: Optional[str] = None,
+    threshold_percent: Optional[float] = None,
+    max_listed: int = MAX_LISTED_CHANGES,
+) -> str:
+    """Diff ``request`` against an earlier SIF's employee records and return the JSON report.
+
+    The previous file is read once into a compact index; the current payroll is then
+    normalized in a single pass. Rows whose (id, account) key is new are matched by
+    employee ID afterwards, which turns a changed account into a bank change rather
+    than a removal plus an addition.
+    """
+    result = Reconciliation(parse_threshold(threshold), threshold_percent, max_listed)
+    previous_index = PreviousIndex(previous_records)
+
+    pipeline = request_pipeline(request, registry)
+    unmatched: List[Tuple[int, List[str]]] = []
+    for row, current in enumerate(pipeline.employee_rows(), start=FIRST_EMPLOYEE_ROW):
+        key = (current[1], current[5])
+        previous = previous_index.take(key)
+        if previous is None:
+            unmatched.append((row, current))
+        else:
+            result.compare(row, current, key, previous)
+
+    by_id: Dict[str, List[Tuple[Key, PreviousEntry]]] = {}
+    for key, previous in previous_index.remaining():
+        by_id.setdefault(key[0], []).append((key, previous))
+    for row, current in unmatched:
+        candidates = by_id.get(current[1]) if current[1] else None
+        if candidates:
+            previous_key, previous = candidates.pop(0)
+            result.compare(row, current, previous_key, previous)
+        else:
+            result.add(row, current)
+    removed = [entry for candidates in by_id.values() for entry in candidates]
+    removed.sort(key=lambda entry: entry[1][3])
+    for key, previous in removed:
+        result.remove(key, previous)
+
+    response = ReconcileResponse.model_construct(
+        previous_filename=previous_filename,
+        number_of_records=pipeline.number_of_records,
+        previous_number_of_records=previous_index.count,
+        total_salaries=pipeline.total_salaries,
+        previous_total_salaries=format_total(previous_index.total_baisa),
+        unchanged_count=result.unchanged,
+        added_count=result.added_count,
+        removed_count=result.removed_count,
+        salary_change_count=result.salary_change_count,
+        bank_change_count=result.bank_change_count,
+        added=result.added,
+        removed=result.removed,
+        salary_changes=result.salary_changes(),
+        bank_changes=sorted(result.bank_changes, key=lambda change: change["row"]),
+    )
+    return dump_constructed(response)
@@ -0,0 +1,110 @@
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+_NON_ALNUM = re.compile(r"[^0-9A-Za-z]+")
+SUGGESTION_THRESHOLD = 0.3
+
+
+class Bank(NamedTuple):
+    short_name: str
+    bic: str
+    bank_name: str
+
+
+class Resolution(NamedTuple):
+    value: str
+    bank: Optional[Bank]
+    corrected: bool
+    suggestions: Tuple[str, ...] = ()
+
+
+def normalize_bank_name(name: str) -> str:
+    return _NON_ALNUM.sub(" ", name.lower()).strip()
+
+
+def trigrams(text: str) -> Set[str]:
+    padded = f"  {normalize_bank_name(text)} "
+    return {padded[index : index + 3] for index in range(len(padded) - 2)}
+
+
+class BankRegistry:
+    """Dict indexes over the bank list by BIC, short name and normalized name, plus a
+    trigram index for "did you mean" suggestions."""
+
+    def __init__(self, banks: Iterable[Bank]) -> None:
+        self.banks: Tuple[Bank, ...] = tuple(banks)
+        self.by_bic: Dict[str, Bank] = {}
+        self.by_short_name: Dict[str, Bank] = {}
+        self.by_name: Dict[str, Bank] = {}
+        self._trigram_index: Dict[str, Set[int]] = defaultdict(set)
+        self._trigram_sizes: List[int] = []
+        self._key_banks: List[Bank] = []
+        self._key_texts: List[str] = []
+
+        for bank in self.banks:
+            self.by_bic.setdefault(bank.bic.upper(), bank)
+            self.by_short_name.setdefault(bank.short_name.upper(), bank)
+            self.by_name.setdefault(normalize_bank_name(bank.bank_name), bank)
+
+            for text in (bank.bic, bank.short_name, bank.bank_name):
+                key_id = len(self._key_banks)
+                grams = trigrams(text)
+                self._key_banks.append(bank)
+                self._key_texts.append(normalize_bank_name(text))
+                self._trigram_sizes.append(len(grams))
+                for gram in grams:
+                    self._trigram_index[gram].add(key_id)
+
+    def suggest(self, query: str, limit: int = 3) -> List[Bank]:
+        text = normalize_bank_name(query or "")
+        if not text:
+            return []
+        grams = trigrams(text)
+        hits: Dict[int, int] = defaultdict(int)
+        for gram in grams:
+            for key_id in self._trigram_index.get(gram, ()):
+                hits[key_id] += 1
+
+        best: Dict[Bank, float] = {}
+        for key_id, shared in hits.items():
+            score = shared / (len(grams) + self._trigram_sizes[key_id] - shared)
+            if len(text) >= 3 and text in self._key_texts[key_id]:
+                # A partial name ("sohar") is a strong hint even when the full name is long.
+                score = max(score, 0.5)
+            bank = self._key_banks[key_id]
+            if score >= SUGGESTION_THRESHOLD and score > best.get(bank, 0.0):
+                best[bank] = score
+        ranked = sorted(best.items(), key=lambda item: (-item[1], item[0].bank_name))
+        return [bank for bank, _ in ranked[:limit]]
+
+    def find(self, value: str) -> Optional[Bank]:
+        key = (value or "").strip().upper()
+        compact = _NON_ALNUM.sub("", key)
+        for candidate in (key, compact):
+            bank = self.by_bic.get(candidate) or self.by_short_name.get(candidate)
+            if bank is not None:
+                return bank
+        # "BMUSOMRXXXX" is the primary-office form of the 8-character BIC.
+        if len(compact) == 11 and compact.endswith("XXX") and compact[:8] in self.by_bic:
+            return self.by_bic[compact[:8]]
+        return self.by_name.get(normalize_bank_name(value or ""))
+
+    def resolve_bic(self, value: str) -> Resolution:
+        key = (value or "").strip().upper()
+        if key in self.by_bic:
+            return Resolution(key, self.by_bic[key], False)
+        bank = self.find(value)
+        if bank is not None:
+            return Resolution(bank.bic, bank, True)
+        return Resolution(key, None, False, tuple(bank.bic for bank in self.suggest(value)))
+
+    def resolve_short_name(self, value: str) -> Resolution:
+        key = (value or "").strip().upper()
+        if key in self.by_short_name:
+            bank = self.by_short_name[key]
+            return Resolution(bank.short_name, bank, bank.short_name != value.strip())
+        bank = self.find(value)
+        if bank is not None:
+            return Resolution(bank.short_name, bank, True)
+        return Resolution(key, None, False, tuple(bank.short_name for bank in self.suggest(value)))
@@ -0,0 +1,147 @@
+import os
+import sqlite3
+import threading
+from contextlib import closing
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .models import EmployeeColumns, SIFRequest
+from .registry import BankRegistry
+from .sif import EMPLOYEE_FIELDS, PayrollNormalizer, employee_records, safe_text
+
+# The fields that stay the same month to month: ID type through salary frequency.
+ROSTER_FIELDS = EMPLOYEE_FIELDS[:7]
+_ID_POSITION = ROSTER_FIELDS.index("employee_id")
+MAX_LISTED_MISSING = 20
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS roster_employees (
+    employer_cr TEXT NOT NULL,
+    {", ".join(f"{field} TEXT NOT NULL" for field in ROSTER_FIELDS)},
+    PRIMARY KEY (employer_cr, employee_id)
+) WITHOUT ROWID
+"""
+_UPSERT = (
+    f"INSERT OR REPLACE INTO roster_employees (employer_cr, {', '.join(ROSTER_FIELDS)}) "
+    f"VALUES (?, {', '.join('?' for _ in ROSTER_FIELDS)})"
+)
+_SELECT = f"SELECT {', '.join(ROSTER_FIELDS)} FROM roster_employees WHERE employer_cr = ? ORDER BY employee_id"
+
+
+class RosterError(ValueError):
+    pass
+
+
+def employer_key(employer_cr: str) -> str:
+    return safe_text(employer_cr, 32)
+
+
+class RosterStore:
+    """Normalized static employee fields per employer, kept in SQLite.
+
+    The composite primary key indexes employer CR then employee ID, so loading one
+    employer's roster is a single range scan. The database is opened on first use,
+    one connection per call.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._ready = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "RosterStore":
+        return cls(Path(os.getenv("SIF_ROSTER_DB", "").strip() or "roster.sqlite3"))
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._ready:
+            with self._lock:
+                if not self._ready:
+                    self.path.parent.mkdir(parents=True, exist_ok=True)
+                    with closing(sqlite3.connect(self.path)) as connection:
+                        connection.execute("PRAGMA journal_mode=WAL")
+                        connection.execute(_SCHEMA)
+                        connection.commit()
+                    self._ready = True
+        return sqlite3.connect(self.path, timeout=10)
+
+    def save(
+        self,
+        employer_cr: str,
+        records: Iterable[Sequence],
+        registry: Optional[BankRegistry] = None,
+        replace: bool = False,
+    ) -> int:
+        """Normalize raw records (``EMPLOYEE_FIELDS`` order) and upsert their static fields by employee ID.
+
+        With ``replace`` the employer's previous roster is dropped in the same transaction.
+        """
+        employer = employer_key(employer_cr)
+        if not employer:
+            raise RosterError("Employer CR-NO is required.")
+        normalizer = PayrollNormalizer(registry)
+        entries = []
+        for record in records:
+            row = normalizer.add(record)
+            if not row[_ID_POSITION]:
+                raise RosterError(f"Roster employee {normalizer.number_of_records} has no employee ID.")
+            entries.append((employer, *row[: len(ROSTER_FIELDS)]))
+        with closing(self._connect()) as connection, connection:
+            if replace:
+                connection.execute("DELETE FROM roster_employees WHERE employer_cr = ?", (employer,))
+            connection.executemany(_UPSERT, entries)
+        return len(entries)
+
+    def load(self, employer_cr: str) -> Dict[str, Tuple[str, ...]]:
+        """The employer's roster as ``employee_id -> static fields``."""
+        with closing(self._connect()) as connection:
+            rows = connection.execute(_SELECT, (employer_key(employer_cr),)).fetchall()
+        return {row[_ID_POSITION]: row for row in rows}
+
+    def count(self, employer_cr: str) -> int:
+        with closing(self._connect()) as connection:
+            query = "SELECT COUNT(*) FROM roster_employees WHERE employer_cr = ?"
+            return connection.execute(query, (employer_key(employer_cr),)).fetchone()[0]
+
+    def employees(self, employer_cr: str) -> List[Dict[str, str]]:
+        return [dict(zip(ROSTER_FIELDS, row)) for row in self.load(employer_cr).values()]
+
+    def delete(self, employer_cr: str) -> int:
+        with closing(self._connect()) as connection, connection:
+            query = "DELETE FROM roster_employees WHERE employer_cr = ?"
+            cursor = connection.execute(query, (employer_key(employer_cr),))
+        return cursor.rowcount
+
+
+def _request_columns(request: SIFRequest) -> List[Optional[list]]:
+    if request.employee_columns is not None:
+        return [getattr(request.employee_columns, field) for field in EMPLOYEE_FIELDS]
+    if not request.employees:
+        return [[] for _ in EMPLOYEE_FIELDS]
+    return [list(column) for column in zip(*employee_records(request.employees))]
+
+
+def roster_request(request: SIFRequest, store: RosterStore) -> SIFRequest:
+    """Join a ``roster`` request's monthly columns to the employer's stored static fields.
+
+    Rows are matched on employee ID; the roster's fields replace whatever the request sent
+    for them, and every other column passes through unchanged.
+    """
+    columns = _request_columns(request)
+    ids = columns[_ID_POSITION]
+    if ids is None:
+        raise RosterError("employee_id is required to use the roster.")
+    roster = store.load(request.employer_cr)
+    if not roster:
+        raise RosterError(f"No roster is stored for employer {employer_key(request.employer_cr)}.")
+    entries = [roster.get(safe_text(employee_id, 17)) for employee_id in ids]
+    missing = [str(employee_id) for employee_id, entry in zip(ids, entries) if entry is None]
+    if missing:
+        listed = ", ".join(missing[:MAX_LISTED_MISSING])
+        more = f" and {len(missing) - MAX_LISTED_MISSING} more" if len(missing) > MAX_LISTED_MISSING else ""
+        raise RosterError(f"{len(missing)} employees are not on the roster: {listed}{more}.")
+    rows = [entry for entry in entries if entry is not None]
+    for position in range(len(ROSTER_FIELDS)):
+        columns[position] = [row[position] for row in rows]
+    employee_columns = EmployeeColumns.model_construct(set(EMPLOYEE_FIELDS), **dict(zip(EMPLOYEE_FIELDS, columns)))
+    return request.model_copy(update={"employees": [], "employee_columns": employee_columns, "roster": False})
@@ -0,0 +1,249 @@
+import re
+from datetime import date
+from functools import lru_cache
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from .models import EmployeeRow, SIFHeader
+
+EMPLOYEE_FIELDS = tuple(EmployeeRow.model_fields)
+
+# (code, severity, message) for one failed check.
+Failure = Tuple[str, str, str]
+Check = Callable[[str], Optional[Failure]]
+
+_AMOUNT = re.compile(r"([+-]?)(\d*)(?:\.(\d*))?", re.ASCII)
+
+
+class ColumnRule(NamedTuple):
+    """One row of the WPS salary file format table.
+
+    ``digits`` is a whole number of at most that many digits; ``decimal`` is
+    ``(integer digits, decimal places)``, the guideline's "9,3" notation.
+    """
+
+    field: str
+    label: str
+    mandatory: bool = False
+    size: Optional[int] = None
+    choices: Tuple[str, ...] = ()
+    digits: Optional[int] = None
+    decimal: Optional[Tuple[int, int]] = None
+
+
+class RuleProfile(NamedTuple):
+    name: str
+    columns: Tuple[ColumnRule, ...]
+    # Salary month at most this many months either side of the day of validation.
+    salary_month_window: Optional[int] = None
+    # Processing date at most this many days after the day of validation.
+    max_future_days: Optional[int] = None
+
+
+# Salary file format guideline & validations (CBO WPS); net salary is always recalculated.
+WPS_COLUMNS = (
+    ColumnRule("employee_id_type", "Employee ID Type", mandatory=True, choices=("C", "P")),
+    ColumnRule("employee_id", "Employee ID", mandatory=True, size=17),
+    ColumnRule("reference_number", "Reference Number", size=64),
+    ColumnRule("employee_name", "Employee Name", mandatory=True, size=70),
+    ColumnRule("employee_bic_code", "Employee BIC Code", mandatory=True, size=11),
+    ColumnRule("employee_account", "Employee Account", mandatory=True, size=30),
+    ColumnRule("salary_frequency", "Salary Frequency", mandatory=True, choices=("M", "B")),
+    ColumnRule("number_of_working_days", "Number Of Working days", mandatory=True, digits=3),
+    ColumnRule("basic_salary", "Basic Salary", mandatory=True, decimal=(9, 3)),
+    ColumnRule("extra_hours", "Extra Hours", decimal=(3, 2)),
+    ColumnRule("extra_income", "Extra Income", decimal=(9, 3)),
+    ColumnRule("deductions", "Deductions", decimal=(9, 3)),
+    ColumnRule("social_security_deductions", "Social Security Deductions", decimal=(9, 3)),
+    ColumnRule("notes_comments", "Notes / Comments", size=300),
+)
+
+WPS_PROFILE = RuleProfile("wps", WPS_COLUMNS)
+
+# Bank-specific profiles by payer bank short name.
+PROFILES: Dict[str, RuleProfile] = {
+    # Dhofar Islamic corporate WPS upload guide.
+    "MISR": RuleProfile("dhofar-islamic", WPS_COLUMNS, salary_month_window=3, max_future_days=7),
+}
+
+
+def _text(value) -> str:
+    if type(value) is str:
+        return value.strip()
+    return "" if value is None else str(value).strip()
+
+
+def _choice_check(rule: ColumnRule) -> Check:
+    allowed = frozenset(rule.choices)
+    failure = ("invalid_choice", "error", f"{rule.label} must be one of {', '.join(rule.choices)}.")
+
+    def check(text: str) -> Optional[Failure]:
+        return None if text.upper() in allowed else failure
+
+    return check
+
+
+def _size_check(rule: ColumnRule, size: int) -> Check:
+    failure = ("too_long", "warning", f"{rule.label} is longer than {size} characters and is cut off.")
+
+    def check(text: str) -> Optional[Failure]:
+        return failure if len(text) > size else None
+
+    return check
+
+
+def _digits_check(rule: ColumnRule) -> Check:
+    pattern = re.compile(rf"\d{{1,{rule.digits}}}", re.ASCII)
+    failure = ("invalid_number", "error", f"{rule.label} must be a whole number of at most {rule.digits} digits.")
+
+    def check(text: str) -> Optional[Failure]:
+        return None if pattern.fullmatch(text) else failure
+
+    return check
+
+
+def _decimal_check(rule: ColumnRule, decimal: Tuple[int, int]) -> Check:
+    integer_digits, places = decimal
+    invalid = ("invalid_amount", "error", f"{rule.label} is not a number.")
+    negative = ("negative_amount", "error", f"{rule.label} must not be negative.")
+    too_large = ("amount_too_large", "error", f"{rule.label} has more than {integer_digits} digits before the decimal point.")
+    rounded = ("amount_rounded", "warning", f"{rule.label} has more than {places} decimal places and is rounded.")
+
+    def check(text: str) -> Optional[Failure]:
+        match = _AMOUNT.fullmatch(text)
+        if match is None:
+            return invalid
+        sign, whole, fraction = match.groups()
+        if not whole and not fraction:
+            return invalid
+        if sign == "-" and (whole.strip("0") or (fraction or "").strip("0")):
+            return negative
+        if len(whole.lstrip("0")) > integer_digits:
+            return too_large
+        if fraction and len(fraction.rstrip("0")) > places:
+            return rounded
+        return None
+
+    return check
+
+
+def compile_column(rule: ColumnRule) -> Check:
+    """Fold one column rule into a single closure over the stripped cell text."""
+    checks: List[Check] = []
+    if rule.choices:
+        checks.append(_choice_check(rule))
+    if rule.size is not None:
+        checks.append(_size_check(rule, rule.size))
+    if rule.digits is not None:
+        checks.append(_digits_check(rule))
+    if rule.decimal is not None:
+        checks.append(_decimal_check(rule, rule.decimal))
+    missing = ("missing", "error", f"{rule.label} is required.") if rule.mandatory else None
+
+    def check(text: str) -> Optional[Failure]:
+        if not text:
+            return missing
+        for step in checks:
+            failure = step(text)
+            if failure is not None:
+                return failure
+        return None
+
+    return check
+
+
+def _issue(row: Optional[int], field: str, failure: Failure, value: str, corrected: Optional[str] = None) -> Dict:
+    code, severity, message = failure
+    return {
+        "row": row,
+        "field": field,
+        "code": code,
+        "severity": severity,
+        "message": message,
+        "value": value,
+        "corrected": corrected,
+        "suggestions": [],
+    }
+
+
+def _month_distance(year: int, month: int, day: date) -> int:
+    return abs((year * 12 + month) - (day.year * 12 + day.month))
+
+
+_NET_INDEX = EMPLOYEE_FIELDS.index("net_salary")
+_BASIC_INDEX = EMPLOYEE_FIELDS.index("basic_salary")
+_NOTES_INDEX = EMPLOYEE_FIELDS.index("notes_comments")
+
+
+def _is_zero(amount: str) -> bool:
+    return amount.lstrip("+-").strip("0.") == ""
+
+
+class CompiledRules:
+    """A ``RuleProfile`` compiled to per-column closures, checked against raw records.
+
+    Issues describe the value as sent; ``corrected`` is what the generated file holds instead.
+    """
+
+    def __init__(self, profile: RuleProfile) -> None:
+        self.profile = profile
+        self.columns: List[Tuple[int, str, Check]] = [
+            (EMPLOYEE_FIELDS.index(rule.field), rule.field, compile_column(rule)) for rule in profile.columns
+        ]
+
+    def check_header(self, header: SIFHeader, today: Optional[date] = None) -> List[Dict]:
+        issues = []
+        today = today or date.today()
+        window = self.profile.salary_month_window
+        if window is not None and _month_distance(header.salary_year, header.salary_month, today) > window:
+            failure = (
+                "salary_month_out_of_range",
+                "error",
+                f"Salary month must be within {window} months of the current date.",
+            )
+            issues.append(_issue(None, "salary_month", failure, f"{header.salary_year}-{header.salary_month:02d}"))
+        limit = self.profile.max_future_days
+        if limit is not None and (header.processing_date - today).days > limit:
+            failure = ("processing_date_too_far", "error", f"Processing date can be at most {limit} days ahead.")
+            issues.append(_issue(None, "processing_date", failure, header.processing_date.isoformat()))
+        return issues
+
+    def check_row(self, index: int, record: Sequence, row: Sequence[str], salary_payment: bool) -> List[Dict]:
+        """Issues for one raw record, given the SIF row the normalizer made of it."""
+        issues = []
+        for position, field, check in self.columns:
+            text = _text(record[position])
+            failure = check(text)
+            if failure is not None:
+                corrected = row[position] if row[position] != text else None
+                issues.append(_issue(index, field, failure, text, corrected))
+
+        net, basic = row[_NET_INDEX], row[_BASIC_INDEX]
+        if net.startswith("-") and not _is_zero(net):
+            issues.append(_issue(index, "net_salary", ("negative_net_salary", "error", "Net salary is negative."), net))
+        given_net = _text(record[_NET_INDEX])
+        if given_net and not _is_zero(given_net) and given_net != net:
+            failure = ("net_salary_recalculated", "warning", "Net salary is recalculated from the salary components.")
+            issues.append(_issue(index, "net_salary", failure, given_net, net))
+        if _is_zero(net) and not _text(record[_NOTES_INDEX]):
+            failure = ("notes_required", "warning", "Notes are required when the net salary is 0.")
+            issues.append(_issue(index, "notes_comments", failure, "", row[_NOTES_INDEX]))
+        if salary_payment and _is_zero(basic):
+            failure = ("basic_salary_required", "error", "Basic salary must be more than 0 for salary payments.")
+            issues.append(_issue(index, "basic_salary", failure, _text(record[_BASIC_INDEX])))
+        elif not salary_payment and not _is_zero(basic):
+            failure = ("basic_salary_not_zero", "error", "Basic salary must be 0 for payment types other than salary.")
+            issues.append(_issue(index, "basic_salary", failure, _text(record[_BASIC_INDEX])))
+        return issues
+
+
+@lru_cache(maxsize=None)
+def compile_profile(profile: RuleProfile) -> CompiledRules:
+    return CompiledRules(profile)
+
+
+def profile_for(payer_bank_short: str) -> RuleProfile:
+    return PROFILES.get(_text(payer_bank_short).upper(), WPS_PROFILE)
+
+
+def rules_for(payer_bank_short: str) -> CompiledRules:
+    return compile_profile(profile_for(payer_bank_short))
@@ -0,0 +1,307 @@
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from decimal import Decimal
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .models import EmployeeRow, RowPatch, SessionDeltaResponse, SessionPatchRequest, SessionResponse, SIFHeader, SIFRequest
+from .registry import BankRegistry
+from .settings import env_int
+from .sif import (
+    EMPLOYEE_FIELDS,
+    PayrollNormalizer,
+    build_header_rows,
+    dump_constructed,
+    employee_dict,
+    employee_records,
+    request_records,
+    format_total,
+    iter_sif_chunks,
+    safe_text,
+    sif_filename,
+)
+
+FIELD_POSITIONS = {field: position for position, field in enumerate(EMPLOYEE_FIELDS)}
+
+
+class SessionNotFound(KeyError):
+    pass
+
+
+class SessionPatchError(ValueError):
+    pass
+
+
+
+def header_of(request: SIFHeader) -> SIFHeader:
+    return SIFHeader(**{field: getattr(request, field) for field in SIFHeader.model_fields})
+
+
+class PreviewSession:
+    """Server-side preview state: raw records, their normalized rows and running totals.
+
+    Patches renormalize only the rows they touch and adjust the baisa total in place.
+    """
+
+    def __init__(self, session_id: str, request: SIFRequest, registry: Optional[BankRegistry]) -> None:
+        self.session_id = session_id
+        self.version = 0
+        self.lock = threading.Lock()
+        self.touched_at = time.monotonic()
+        self._normalizer = PayrollNormalizer(registry)
+        self.header = self._normalizer.resolve_header(header_of(request))
+        self.records: List[tuple] = list(request_records(request))
+        self.rows: List[List[str]] = []
+        self.nets: List[Optional[int]] = []
+        self.total_baisa = 0
+        self.fallback_rows = 0
+        self._employee_index: Optional[Dict[str, int]] = None
+        for index, record in enumerate(self.records):
+            row, net = self._normalize(index, record)
+            self.rows.append(row)
+            self.nets.append(net)
+            self._count(net, 1)
+
+    def _normalize(self, index: int, record: Sequence) -> Tuple[List[str], Optional[int]]:
+        row, net = self._normalizer.normalize(record)
+        if self._normalizer.registry is not None:
+            self._normalizer.check_bic(index, record[4], row)
+        return row, net
+
+    def _count(self, net: Optional[int], sign: int) -> None:
+        if net is None:
+            self.fallback_rows += sign
+        else:
+            self.total_baisa += sign * net
+
+    @property
+    def number_of_records(self) -> int:
+        return len(self.rows)
+
+    def total_salaries(self) -> str:
+        spill = None
+        if self.fallback_rows:
+            # Rows that needed the Decimal fallback (rare) are re-summed; NaN can't be subtracted back out.
+            spill = sum((Decimal(row[8]) for row, net in zip(self.rows, self.nets) if net is None), Decimal(0))
+        return format_total(self.total_baisa, spill)
+
+    def _locate(self, position: int, patch: RowPatch) -> int:
+        if patch.index is not None:
+            if patch.index >= len(self.rows):
+                raise SessionPatchError(f"Patch {position}: row {patch.index} does not exist.")
+            return patch.index
+        if patch.employee_id is not None:
+            if self._employee_index is None:
+                self._employee_index = {}
+                for index, row in enumerate(self.rows):
+                    self._employee_index.setdefault(row[1], index)
+            index = self._employee_index.get(safe_text(patch.employee_id, 17))
+            if index is None:
+                raise SessionPatchError(f"Patch {position}: employee {patch.employee_id!r} not found.")
+            return index
+        raise SessionPatchError(f"Patch {position}: an index or employee_id is required.")
+
+    def _record(self, position: int, base: Sequence, patch: RowPatch) -> tuple:
+        record = list(base)
+        for field, value in patch.fields.items():
+            if field not in FIELD_POSITIONS:
+                raise SessionPatchError(f"Patch {position}: unknown field {field!r}.")
+            record[FIELD_POSITIONS[field]] = value
+        return tuple(record)
+
+    def apply(self, patch_request: SessionPatchRequest) -> List[Dict]:
+        """Apply patches in order; on error every earlier patch is rolled back."""
+        self._normalizer.issues = []
+        self._normalizer.issue_count = 0
+        previous_header = self.header
+        undo: List[tuple] = []
+        try:
+            if patch_request.header is not None:
+                self.header = self._normalizer.resolve_header(header_of(patch_request.header))
+            changes = [self._apply_one(position, patch, undo) for position, patch in enumerate(patch_request.patches)]
+        except SessionPatchError:
+            self.header = previous_header
+            for entry in reversed(undo):
+                self._restore(entry)
+            raise
+        self.version += 1
+        return changes
+
+    def _apply_one(self, position: int, patch: RowPatch, undo: List[tuple]) -> Dict:
+        if patch.op == "insert":
+            index = len(self.rows) if patch.index is None else patch.index
+            if index > len(self.rows):
+                raise SessionPatchError(f"Patch {position}: cannot insert at row {index}.")
+            base = next(iter(employee_records([patch.employee or EmployeeRow()])))
+            record = self._record(position, base, patch)
+            row, net = self._normalize(index, record)
+            self._insert(index, record, row, net)
+            undo.append(("delete", index))
+            return {"op": "insert", "index": index, "row": row}
+
+        index = self._locate(position, patch)
+        previous = (index, self.records[index], self.rows[index], self.nets[index])
+        if patch.op == "delete":
+            self._delete(index)
+            undo.append(("insert",) + previous)
+            return {"op": "delete", "index": index, "row": None}
+
+        base = next(iter(employee_records([patch.employee]))) if patch.employee else self.records[index]
+        record = self._record(position, base, patch)
+        row, net = self._normalize(index, record)
+        self._put(index, record, row, net)
+        undo.append(("put",) + previous)
+        return {"op": "update", "index": index, "row": row}
+
+    def _insert(self, index: int, record: tuple, row: List[str], net: Optional[int]) -> None:
+        self.records.insert(index, record)
+        self.rows.insert(index, row)
+        self.nets.insert(index, net)
+        self._count(net, 1)
+        self._employee_index = None
+
+    def _delete(self, index: int) -> None:
+        self._count(self.nets[index], -1)
+        del self.records[index], self.rows[index], self.nets[index]
+        self._employee_index = None
+
+    def _put(self, index: int, record: tuple, row: List[str], net: Optional[int]) -> None:
+        self._count(self.nets[index], -1)
+        self._count(net, 1)
+        if row[1] != self.rows[index][1]:
+            self._employee_index = None
+        self.records[index] = record
+        self.rows[index] = row
+        self.nets[index] = net
+
+    def _restore(self, entry: tuple) -> None:
+        action, index = entry[0], entry[1]
+        if action == "delete":
+            self._delete(index)
+        elif action == "insert":
+            self._insert(index, *entry[2:])
+        else:
+            self._put(index, *entry[2:])
+
+    def snapshot_rows(self) -> List[List[str]]:
+        rows = build_header_rows(self.header, self.total_salaries(), self.number_of_records)
+        rows.extend(self.rows)
+        return rows
+
+    def preview(self) -> SessionResponse:
+        self._normalizer.issues = []
+        self._normalizer.issue_count = 0
+        if self._normalizer.registry is not None:
+            self._normalizer.resolve_header(self.header)
+            for index, record in enumerate(self.records):
+                self._normalizer.check_bic(index, record[4], list(self.rows[index]))
+        return SessionResponse.model_construct(
+            session_id=self.session_id,
+            version=self.version,
+            filename=sif_filename(self.header),
+            total_salaries=self.total_salaries(),
+            number_of_records=self.number_of_records,
+            sheet_name=self.header.sheet_name.strip() or "Sheet1",
+            row_count=self.number_of_records + 3,
+            normalized_employees=list(map(employee_dict, self.rows)),
+            issues=self._normalizer.issues,
+            issue_count=self._normalizer.issue_count,
+        )
+
+    def delta(self, changes: List[Dict]) -> SessionDeltaResponse:
+        return SessionDeltaResponse.model_construct(
+            session_id=self.session_id,
+            version=self.version,
+            filename=sif_filename(self.header),
+            total_salaries=self.total_salaries(),
+            number_of_records=self.number_of_records,
+            row_count=self.number_of_records + 3,
+            changes=[
+                {
+                    "op": change["op"],
+                    "index": change["index"],
+                    "employee": None if change["row"] is None else employee_dict(change["row"]),
+                }
+                for change in changes
+            ],
+            issues=self._normalizer.issues,
+            issue_count=self._normalizer.issue_count,
+        )
+
+
+class SessionStore:
+    """In-process session map with idle TTL and LRU eviction."""
+
+    def __init__(self, max_sessions: int = 256, ttl_seconds: int = 1800) -> None:
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._sessions: "OrderedDict[str, PreviewSession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "SessionStore":
+        return cls(
+            max_sessions=env_int("SIF_SESSION_LIMIT", 256),
+            ttl_seconds=env_int("SIF_SESSION_TTL", 1800),
+        )
+
+    def _purge(self, now: float) -> None:
+        # Ordered by last use, so expired sessions sit at the front.
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if now - session.touched_at < self.ttl_seconds:
+                break
+            self._sessions.popitem(last=False)
+
+    def create(self, request: SIFRequest, registry: Optional[BankRegistry] = None) -> PreviewSession:
+        session = PreviewSession(secrets.token_urlsafe(16), request, registry)
+        with self._lock:
+            self._purge(time.monotonic())
+            self._sessions[session.session_id] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return session
+
+    def get(self, session_id: str) -> PreviewSession:
+        now = time.monotonic()
+        with self._lock:
+            self._purge(now)
+            session = self._sessions.get(session_id)
+            if session is None:
+                raise SessionNotFound(session_id)
+            session.touched_at = now
+            self._sessions.move_to_end(session_id)
+            return session
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            if self._sessions.pop(session_id, None) is None:
+                raise SessionNotFound(session_id)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+# The module-level helpers return JSON text so the endpoints can skip response re-validation.
+def create_session_preview(store: SessionStore, request: SIFRequest, registry: Optional[BankRegistry]) -> str:
+    session = store.create(request, registry)
+    with session.lock:
+        return dump_constructed(session.preview())
+
+
+def read_session_preview(session: PreviewSession) -> str:
+    with session.lock:
+        return dump_constructed(session.preview())
+
+
+def patch_session(session: PreviewSession, patch_request: SessionPatchRequest) -> str:
+    with session.lock:
+        return dump_constructed(session.delta(session.apply(patch_request)))
+
+
+def iter_session_xlsx(session: PreviewSession, format_name: str = "xlsx") -> Iterator[bytes]:
+    with session.lock:
+        rows = session.snapshot_rows()
+        sheet_name = safe_text(session.header.sheet_name, 31) or "Sheet1"
+    return iter_sif_chunks(rows, sheet_name, format_name)
@@ -0,0 +1,15 @@
+import os
+
+
+def env_int(name: str, default: int, minimum: int = 1) -> int:
+    configured = os.getenv(name, "").strip()
+    if configured.isdigit() and int(configured) >= minimum:
+        return int(configured)
+    return default
+
+
+def env_flag(name: str, default: bool) -> bool:
+    configured = os.getenv(name, "").strip().lower()
+    if not configured:
+        return default
+    return configured not in ("0", "false", "no", "off")
@@ -1,18 +1,41 @@
-import io
 import json
 import re
+from itertools import chain, repeat
+from operator import attrgetter
 from datetime import date
 from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
 from pathlib import Path
-from typing import List, Tuple
-
-from openpyxl import Workbook
-
-from .models import EmployeeRow, SIFRequest
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from .cache import RowDigest
+from .duplicates import DuplicateDetector
+from .formats import OUTPUT_FORMATS, get_format, output_filename
+from .metrics import observe_payroll, stage, timed_chunks
+from .models import (
+    DuplicateGroup,
+    EmployeeColumns,
+    EmployeeRow,
+    PreviewResponse,
+    SIFHeader,
+    SIFRequest,
+    ValidationIssue,
+    ValidationReport,
+)
+from .registry import BankRegistry, Resolution
+from .rules import CompiledRules, rules_for
 
 DEC3 = Decimal("0.001")
 DEC2 = Decimal("0.01")
 
+EMPLOYEE_FIELDS = tuple(EmployeeRow.model_fields)
+EMPLOYEE_DEFAULTS = tuple(EmployeeRow.model_fields[field].default for field in EMPLOYEE_FIELDS)
+ZERO_NET_NOTE = "Net salary is 0"
+# Plain decimal literals (optional sign, ASCII digits, optional fraction) take the
+# integer fixed-point path; anything else is left to Decimal so q3/q2 semantics hold.
+_PLAIN_DECIMAL = re.compile(r"([+-]?)(\d*)(?:\.(\d*))?", re.ASCII)
+_MAX_FAST_DIGITS = 24
+MAX_RECORDED_ISSUES = 1000
+
 REQUIRED_COLS = [
     "Employee ID Type",
     "Employee ID",
@@ -31,6 +54,21 @@ REQUIRED_COLS = [
     "Notes / Comments",
 ]
 
+# Labels of the employer header block (first row of every SIF).
+HEADER_LABELS = [
+    "Employer CR-NO",
+    "Payer CR-NO",
+    "Payer Bank Short Name",
+    "Payer Account Number",
+    "Salary Year",
+    "Salary Month",
+    "Total Salaries",
+    "Number Of Records",
+    "Payment Type",
+]
+
+_FILENAME_SUFFIX = re.compile(r"_(\d{8})_(\d{3})\.[0-9A-Za-z]+$")
+
 
 def q3(value) -> str:
     if value in (None, ""):
@@ -69,94 +107,382 @@ def default_filename(employer_cr: str, payer_bank_short: str, processing_date: d
     return f"SIF_{clean_employer}_{clean_bank}_{ymd}_{seq:03d}.xlsx"
 
 
-def normalize_employee(employee: EmployeeRow) -> EmployeeRow:
-    id_type = safe_text(employee.employee_id_type, 1).upper()
-    if id_type not in ("C", "P"):
-        id_type = "C"
-
-    salary_frequency = safe_text(employee.salary_frequency, 1).upper()
-    if salary_frequency not in ("M", "B"):
-        salary_frequency = "M"
-
-    working_days = safe_text(employee.number_of_working_days, 3)
-    if not str(working_days).isdigit():
-        working_days = "0"
-
-    basic_salary = q3(employee.basic_salary)
-    extra_income = q3(employee.extra_income)
-    deductions = q3(employee.deductions)
-    social_security_deductions = q3(employee.social_security_deductions)
+def parse_sif_filename(filename: str) -> Optional[Tuple[date, int]]:
+    """``(processing_date, seq)`` from a name built by ``default_filename``, if it is one."""
+    match = _FILENAME_SUFFIX.search(filename or "")
+    if match is None:
+        return None
+    digits, seq = match.groups()
+    try:
+        processing_date = date(int(digits[:4]), int(digits[4:6]), int(digits[6:]))
+    except ValueError:
+        return None
+    return processing_date, int(seq)
+
+
+def parse_fixed(value, places: int) -> Optional[int]:
+    """Round ``value`` half-up to ``places`` decimals as a scaled integer (3 places = baisa).
+
+    Returns ``None`` when the value is not a plain decimal literal, in which case the
+    caller must fall back to ``q3``/``q2`` to reproduce their exact Decimal behaviour.
+    """
+    if value is None or value == "":
+        return 0
+    value_type = type(value)
+    if value_type is int:
+        if abs(value) >= 10**_MAX_FAST_DIGITS:
+            return None
+        return value * 10**places
+    if value_type is float:
+        value = str(value)
+    elif value_type is not str:
+        return None
+
+    match = _PLAIN_DECIMAL.fullmatch(value)
+    if match is None:
+        return None
+    sign, whole, fraction = match.groups()
+    fraction = fraction or ""
+    if not whole and not fraction:
+        return None
+    if len(whole.lstrip("0")) > _MAX_FAST_DIGITS:
+        return None
+
+    digits = int(whole + fraction)
+    excess = len(fraction) - places
+    if excess <= 0:
+        scaled = digits * 10**-excess
+    else:
+        divisor = 10**excess
+        scaled, remainder = divmod(digits, divisor)
+        if remainder * 2 >= divisor:
+            scaled += 1
+
+    if sign == "-":
+        if scaled == 0:
+            # Decimal keeps the sign of a negative zero ("-0.000"); let it format that.
+            return None
+        scaled = -scaled
+    return scaled
+
+
+def format_fixed(scaled: int, places: int) -> str:
+    whole, fraction = divmod(abs(scaled), 10**places)
+    sign = "-" if scaled < 0 else ""
+    return f"{sign}{whole}.{fraction:0{places}d}"
+
+
+def employee_records(employees: Iterable[EmployeeRow]) -> Iterable[tuple]:
+    return map(_record_getter, employees)
+
+
+def column_records(columns: EmployeeColumns) -> Iterable[tuple]:
+    count = len(columns)
+    return zip(
+        *(
+            repeat(default, count) if values is None else values
+            for values, default in zip(_record_getter(columns), EMPLOYEE_DEFAULTS)
+        )
+    )
+
+
+def request_records(request: SIFRequest) -> Iterable[tuple]:
+    if request.employee_columns is not None:
+        return column_records(request.employee_columns)
+    return employee_records(request.employees)
+
+
+_record_getter = attrgetter(*EMPLOYEE_FIELDS)
+
+
+def _decimal_amounts(basic, extra_income, deductions, social_security) -> Tuple[str, str, str, str, str]:
+    basic_salary = q3(basic)
+    extra_income_str = q3(extra_income)
+    deductions_str = q3(deductions)
+    social_security_str = q3(social_security)
     net_salary_decimal = (
         Decimal(basic_salary)
-        + Decimal(extra_income)
-        - Decimal(deductions)
-        - Decimal(social_security_deductions)
+        + Decimal(extra_income_str)
+        - Decimal(deductions_str)
+        - Decimal(social_security_str)
     )
     net_salary = f"{net_salary_decimal.quantize(DEC3, rounding=ROUND_HALF_UP):.3f}"
-    notes = safe_text(employee.notes_comments, 300)
-    if Decimal(net_salary) == Decimal("0.000") and notes == "":
-        notes = "Net salary is 0"
-
-    return EmployeeRow(
-        employee_id_type=id_type,
-        employee_id=safe_text(employee.employee_id, 17),
-        reference_number=safe_text(employee.reference_number, 64),
-        employee_name=safe_text(employee.employee_name, 70),
-        employee_bic_code=safe_text(employee.employee_bic_code, 11).upper(),
-        employee_account=safe_text(employee.employee_account, 30),
-        salary_frequency=salary_frequency,
-        number_of_working_days=working_days,
-        net_salary=net_salary,
-        basic_salary=basic_salary,
-        extra_hours=q2(employee.extra_hours),
-        extra_income=extra_income,
-        deductions=deductions,
-        social_security_deductions=social_security_deductions,
-        notes_comments=notes,
-    )
+    return net_salary, basic_salary, extra_income_str, deductions_str, social_security_str
+
+
+def _fixed_entry(value, places: int) -> Tuple[Optional[int], Optional[str]]:
+    scaled = parse_fixed(value, places)
+    if scaled is None:
+        return None, None
+    return scaled, format_fixed(scaled, places)
+
+
+class _FixedCache(dict):
+    # Payroll amounts repeat heavily ("0", common salaries); memoize parse + format per string.
+    max_entries = 65536
+
+    def __init__(self, places: int) -> None:
+        super().__init__()
+        self.places = places
+
+    def __missing__(self, value: str) -> Tuple[Optional[int], Optional[str]]:
+        if len(self) >= self.max_entries:
+            self.clear()
+        entry = self[value] = _fixed_entry(value, self.places)
+        return entry
+
+
+class PayrollNormalizer:
+    """Single-pass normalizer that keeps running totals as integer baisa.
+
+    With a ``BankRegistry`` it also validates employee BIC codes, correcting the ones it
+    can resolve and reporting the rest as issues. ``apply_rules`` adds the WPS format
+    rules to the same pass, and an ``aggregator`` (see ``app.aggregate``) and a
+    ``DuplicateDetector`` see every row.
+    """
+
+    def __init__(self, registry: Optional[BankRegistry] = None) -> None:
+        self.total_baisa = 0
+        self.spill: Optional[Decimal] = None
+        self.number_of_records = 0
+        self.registry = registry
+        self.issues: List[Dict] = []
+        self.issue_count = 0
+        self.error_count = 0
+        self.rules: Optional[CompiledRules] = None
+        self.salary_payment = True
+        self.aggregator = None
+        self.duplicates: Optional[DuplicateDetector] = None
+        self._amounts3 = _FixedCache(3)
+        self._amounts2 = _FixedCache(2)
+        self._bic_resolutions: Dict[str, Resolution] = {}
+
+    def normalize(self, record: Sequence) -> Tuple[List[str], Optional[int]]:
+        """Normalize one raw record (values in ``EMPLOYEE_FIELDS`` order) into a SIF row.
+
+        Returns the row and its net salary in baisa, or ``None`` for the net when the
+        Decimal fallback was needed. Totals are not touched.
+        """
+        (
+            id_type,
+            employee_id,
+            reference_number,
+            employee_name,
+            bic_code,
+            account,
+            salary_frequency,
+            working_days,
+            _net_salary,
+            basic,
+            extra_hours,
+            extra_income,
+            deductions,
+            social_security,
+            notes,
+        ) = record
+
+        id_type = safe_text(id_type, 1).upper()
+        if id_type not in ("C", "P"):
+            id_type = "C"
+
+        salary_frequency = safe_text(salary_frequency, 1).upper()
+        if salary_frequency not in ("M", "B"):
+            salary_frequency = "M"
+
+        working_days = safe_text(working_days, 3)
+        if not working_days.isdigit():
+            working_days = "0"
+
+        amounts = self._amounts3
+        basic_baisa, basic_str = amounts[basic] if type(basic) is str else _fixed_entry(basic, 3)
+        extra_income_baisa, extra_income_str = (
+            amounts[extra_income] if type(extra_income) is str else _fixed_entry(extra_income, 3)
+        )
+        deductions_baisa, deductions_str = (
+            amounts[deductions] if type(deductions) is str else _fixed_entry(deductions, 3)
+        )
+        social_security_baisa, social_security_str = (
+            amounts[social_security] if type(social_security) is str else _fixed_entry(social_security, 3)
+        )
+        if (
+            basic_baisa is None
+            or extra_income_baisa is None
+            or deductions_baisa is None
+            or social_security_baisa is None
+        ):
+            net_baisa = None
+            net_salary, basic_str, extra_income_str, deductions_str, social_security_str = _decimal_amounts(
+                basic, extra_income, deductions, social_security
+            )
+            net_is_zero = Decimal(net_salary) == 0
+        else:
+            net_baisa = basic_baisa + extra_income_baisa - deductions_baisa - social_security_baisa
+            net_salary = format_fixed(net_baisa, 3)
+            net_is_zero = net_baisa == 0
+
+        _, extra_hours_str = (
+            self._amounts2[extra_hours] if type(extra_hours) is str else _fixed_entry(extra_hours, 2)
+        )
+        if extra_hours_str is None:
+            extra_hours_str = q2(extra_hours)
+
+        notes = safe_text(notes, 300)
+        if net_is_zero and notes == "":
+            notes = ZERO_NET_NOTE
+
+        row = [
+            id_type,
+            safe_text(employee_id, 17),
+            safe_text(reference_number, 64),
+            safe_text(employee_name, 70),
+            safe_text(bic_code, 11).upper(),
+            safe_text(account, 30),
+            salary_frequency,
+            working_days,
+            net_salary,
+            basic_str,
+            extra_hours_str,
+            extra_income_str,
+            deductions_str,
+            social_security_str,
+            notes,
+        ]
+        return row, net_baisa
+
+    def add(self, record: Sequence) -> List[str]:
+        row, net_baisa = self.normalize(record)
+        if self.registry is not None:
+            self.check_bic(self.number_of_records, record[4], row)
+        if self.rules is not None:
+            for issue in self.rules.check_row(self.number_of_records, record, row, self.salary_payment):
+                self.record_issue(issue)
+        if self.aggregator is not None:
+            self.aggregator.add(self.number_of_records, row, net_baisa)
+        if self.duplicates is not None:
+            self.duplicates.add(self.number_of_records, row)
+        self.number_of_records += 1
+        if net_baisa is None:
+            self.spill = (self.spill or Decimal(0)) + Decimal(row[8])
+        else:
+            self.total_baisa += net_baisa
+        return row
+
+    def total_salaries(self) -> str:
+        return format_total(self.total_baisa, self.spill)
+
+    def record_issue(self, issue: Dict) -> None:
+        self.issue_count += 1
+        if issue["severity"] == "error":
+            self.error_count += 1
+        if len(self.issues) < MAX_RECORDED_ISSUES:
+            self.issues.append(issue)
+
+    def check_bic(self, index: int, raw_value, row: List[str]) -> None:
+        raw = safe_text(raw_value, 70)
+        resolution = self._bic_resolutions.get(raw)
+        if resolution is None:
+            # Only called when a registry is set.
+            assert self.registry is not None
+            resolution = self._bic_resolutions[raw] = self.registry.resolve_bic(raw)
+        if resolution.corrected:
+            row[4] = resolution.value
+            self.record_issue(
+                bank_issue(index, "employee_bic_code", "bic_corrected", raw, resolution, "Employee BIC code was corrected.")
+            )
+        elif resolution.bank is None:
+            self.record_issue(
+                bank_issue(index, "employee_bic_code", "bic_unknown", raw, resolution, "Unknown employee BIC code.")
+            )
+
+    def apply_rules(self, header: SIFHeader, rules: CompiledRules, today: Optional[date] = None) -> None:
+        """Check ``header`` now and every following record against ``rules``."""
+        self.rules = rules
+        self.salary_payment = safe_text(header.payment_type, 32).lower() == "salary"
+        for issue in rules.check_header(header, today):
+            self.record_issue(issue)
+
+    def resolve_header(self, header: SIFHeader) -> SIFHeader:
+        if self.registry is None:
+            return header
+        raw = safe_text(header.payer_bank_short, 70)
+        resolution = self.registry.resolve_short_name(raw)
+        if resolution.corrected:
+            self.record_issue(
+                bank_issue(None, "payer_bank_short", "payer_bank_corrected", raw, resolution, "Payer bank short name was corrected.")
+            )
+            return header.model_copy(update={"payer_bank_short": resolution.value})
+        if resolution.bank is None:
+            self.record_issue(
+                bank_issue(None, "payer_bank_short", "payer_bank_unknown", raw, resolution, "Unknown payer bank short name.")
+            )
+        return header
+
+
+def bank_issue(row: Optional[int], field: str, code: str, raw: str, resolution: Resolution, message: str) -> Dict:
+    return {
+        "row": row,
+        "field": field,
+        "code": code,
+        "severity": "warning",
+        "message": message,
+        "value": raw,
+        "corrected": resolution.value if resolution.corrected else None,
+        "suggestions": list(resolution.suggestions),
+    }
+
+
+def normalize_record(record: Sequence) -> Tuple[List[str], Optional[int]]:
+    return PayrollNormalizer().normalize(record)
+
+
+def normalize_payroll(
+    records: Iterable[Sequence], registry: Optional[BankRegistry] = None
+) -> Tuple[List[List[str]], str]:
+    """Normalize every record in one pass and total the net salaries in integer baisa."""
+    normalizer = PayrollNormalizer(registry)
+    rows = list(map(normalizer.add, records))
+    return rows, normalizer.total_salaries()
+
+
+def format_total(total_baisa: int, spill: Optional[Decimal] = None) -> str:
+    if spill is None:
+        return format_fixed(total_baisa, 3)
+    total = Decimal(total_baisa).scaleb(-3) + spill
+    return f"{total.quantize(DEC3, rounding=ROUND_HALF_UP):.3f}"
+
+
+def row_to_employee(row: Sequence[str]) -> EmployeeRow:
+    return EmployeeRow.model_construct(set(EMPLOYEE_FIELDS), **dict(zip(EMPLOYEE_FIELDS, row)))
+
+
+def employee_dict(row: Sequence[str]) -> Dict[str, str]:
+    return dict(zip(EMPLOYEE_FIELDS, row))
+
+
+def dump_constructed(model) -> str:
+    # Models built with model_construct hold plain dicts for already-normalized rows; the
+    # serializer handles them without re-validation, so its type-mismatch warnings are noise.
+    return model.model_dump_json(warnings=False)
 
 
-def build_sif_rows(request: SIFRequest) -> Tuple[List[List[str]], List[EmployeeRow], str, str, int]:
-    employer_cr = safe_text(request.employer_cr, 32)
-    payer_cr = safe_text(request.payer_cr, 32)
-    payer_bank_short = safe_text(request.payer_bank_short, 16)
-    payer_account = safe_text(request.payer_account, 64)
-    payment_type = safe_text(request.payment_type, 32)
-
-    normalized = [normalize_employee(row) for row in request.employees]
-
-    total_salaries = sum(Decimal(str(row.net_salary)) for row in normalized)
-    total_salaries_str = f"{total_salaries.quantize(DEC3, rounding=ROUND_HALF_UP):.3f}"
-    number_of_records = len(normalized)
-
-    row0 = [
-        "Employer CR-NO",
-        "Payer CR-NO",
-        "Payer Bank Short Name",
-        "Payer Account Number",
-        "Salary Year",
-        "Salary Month",
-        "Total Salaries",
-        "Number Of Records",
-        "Payment Type",
-        "",
-        "",
-        "",
-        "",
-        "",
-        "",
-    ]
+def normalize_employee(employee: EmployeeRow) -> EmployeeRow:
+    row, _ = normalize_record(next(iter(employee_records([employee]))))
+    return row_to_employee(row)
+
+
+def build_header_rows(request: SIFHeader, total_salaries: str, number_of_records: int) -> List[List[str]]:
+    row0 = HEADER_LABELS + [""] * (len(REQUIRED_COLS) - len(HEADER_LABELS))
 
     row1 = [
-        employer_cr,
-        payer_cr,
-        payer_bank_short,
-        payer_account,
+        safe_text(request.employer_cr, 32),
+        safe_text(request.payer_cr, 32),
+        safe_text(request.payer_bank_short, 16),
+        safe_text(request.payer_account, 64),
         str(request.salary_year),
         f"{request.salary_month:02d}",
-        total_salaries_str,
+        total_salaries,
         str(number_of_records),
-        payment_type,
+        safe_text(request.payment_type, 32),
         "",
         "",
         "",
@@ -166,51 +492,273 @@ def build_sif_rows(request: SIFRequest) -> Tuple[List[List[str]], List[EmployeeR
     ]
 
     row2 = REQUIRED_COLS[:]
+    return [row0, row1, row2]
 
-    employee_rows = []
-    for row in normalized:
-        employee_rows.append(
-            [
-                row.employee_id_type,
-                row.employee_id,
-                row.reference_number,
-                row.employee_name,
-                row.employee_bic_code,
-                row.employee_account,
-                row.salary_frequency,
-                row.number_of_working_days,
-                str(row.net_salary),
-                str(row.basic_salary),
-                str(row.extra_hours),
-                str(row.extra_income),
-                str(row.deductions),
-                str(row.social_security_deductions),
-                row.notes_comments,
-            ]
-        )
 
-    rows = [row0, row1, row2] + employee_rows
+def sif_filename(request: SIFHeader, format_name: Optional[str] = None) -> str:
     filename = default_filename(
-        employer_cr=employer_cr,
-        payer_bank_short=payer_bank_short,
+        employer_cr=safe_text(request.employer_cr, 32),
+        payer_bank_short=safe_text(request.payer_bank_short, 16),
         processing_date=request.processing_date,
         seq=request.seq,
     )
+    # A SIFRequest (or its resolved copy) carries the requested output format.
+    format_name = format_name or getattr(request, "format", None)
+    return output_filename(filename, get_format(format_name)) if format_name else filename
+
+
+class SIFPipeline:
+    """Lazy SIF generation from raw records (values in ``EMPLOYEE_FIELDS`` order).
+
+    ``employee_rows()`` normalizes one record at a time while the totals accumulate, so the
+    header rows, which carry those totals, only exist once it is exhausted. ``rows()`` handles
+    that by deferring the header: employee rows are spooled first, then streamed after it.
+    """
+
+    def __init__(
+        self,
+        request: SIFHeader,
+        records: Iterable[Sequence],
+        registry: Optional[BankRegistry] = None,
+        validate: bool = False,
+        aggregator=None,
+        detect_duplicates: bool = False,
+    ) -> None:
+        self.normalizer = PayrollNormalizer(registry)
+        self.normalizer.aggregator = aggregator
+        if detect_duplicates:
+            self.normalizer.duplicates = DuplicateDetector()
+        self.header = self.normalizer.resolve_header(request)
+        if validate:
+            # The rule profile follows the payer bank, so pick it after the short name is resolved.
+            self.normalizer.apply_rules(self.header, rules_for(self.header.payer_bank_short))
+        self._records = records
+        self.finished = False
+
+    def employee_rows(self) -> Iterator[List[str]]:
+        yield from map(self.normalizer.add, self._records)
+        self.finished = True
+        observe_payroll(self.normalizer.number_of_records)
+
+    def spool(self, digest: Optional[RowDigest] = None) -> List[List[str]]:
+        """Normalize every record into a list, feeding each row to ``digest`` on the way."""
+        with stage("normalize"):
+            if digest is None:
+                return list(self.employee_rows())
+            employee_rows = []
+            for row in self.employee_rows():
+                digest.update(row)
+                employee_rows.append(row)
+        return employee_rows
+
+    def header_rows(self) -> List[List[str]]:
+        if not self.finished:
+            raise RuntimeError("SIF header rows need the payroll totals; exhaust employee_rows() first.")
+        return build_header_rows(self.header, self.total_salaries, self.number_of_records)
+
+    def rows(self) -> Iterator[List[str]]:
+        employee_rows = self.spool()
+        yield from self.header_rows()
+        yield from employee_rows
+
+    @property
+    def total_salaries(self) -> str:
+        return self.normalizer.total_salaries()
+
+    @property
+    def number_of_records(self) -> int:
+        return self.normalizer.number_of_records
+
+    def filename(self, format_name: Optional[str] = None) -> str:
+        return sif_filename(self.header, format_name)
+
+
+def request_pipeline(
+    request: SIFRequest,
+    registry: Optional[BankRegistry] = None,
+    validate: bool = False,
+    aggregator=None,
+    detect_duplicates: bool = False,
+) -> SIFPipeline:
+    return SIFPipeline(request, request_records(request), registry, validate, aggregator, detect_duplicates)
+
+
+class NormalizedPayroll(NamedTuple):
+    header: SIFHeader
+    employee_rows: List[List[str]]
+    total_salaries: str
+    number_of_records: int
+    issues: List[Dict]
+    issue_count: int
+    duplicates: Optional[DuplicateDetector] = None
+
+
+def normalize_request(
+    request: SIFRequest, registry: Optional[BankRegistry] = None, aggregator=None, detect_duplicates: bool = False
+) -> NormalizedPayroll:
+    pipeline = request_pipeline(request, registry, aggregator=aggregator, detect_duplicates=detect_duplicates)
+    employee_rows = pipeline.spool()
+    return NormalizedPayroll(
+        header=pipeline.header,
+        employee_rows=employee_rows,
+        total_salaries=pipeline.total_salaries,
+        number_of_records=pipeline.number_of_records,
+        issues=pipeline.normalizer.issues,
+        issue_count=pipeline.normalizer.issue_count,
+        duplicates=pipeline.normalizer.duplicates,
+    )
+
+
+def resolved_filename(request: SIFHeader, registry: Optional[BankRegistry] = None) -> str:
+    return sif_filename(PayrollNormalizer(registry).resolve_header(request))
+
+
+def build_sif_rows(
+    request: SIFRequest, registry: Optional[BankRegistry] = None
+) -> Tuple[List[List[str]], List[EmployeeRow], str, str, int]:
+    """Materialized rows plus ``EmployeeRow`` models; generation paths use ``SIFPipeline`` instead."""
+    pipeline = request_pipeline(request, registry)
+    rows = list(pipeline.rows())
+    normalized = [row_to_employee(row) for row in rows[3:]]
+    return rows, normalized, pipeline.filename(), pipeline.total_salaries, pipeline.number_of_records
+
+
+def build_preview(request: SIFRequest, registry: Optional[BankRegistry] = None) -> PreviewResponse:
+    payroll = normalize_request(request, registry, detect_duplicates=True)
+    duplicates = payroll.duplicates
+    assert duplicates is not None
+    return PreviewResponse(
+        filename=sif_filename(payroll.header),
+        total_salaries=payroll.total_salaries,
+        number_of_records=payroll.number_of_records,
+        sheet_name=request.sheet_name.strip() or "Sheet1",
+        row_count=payroll.number_of_records + 3,
+        normalized_employees=[row_to_employee(row) for row in payroll.employee_rows],
+        issues=[ValidationIssue.model_validate(issue) for issue in payroll.issues],
+        issue_count=payroll.issue_count,
+        duplicates=[DuplicateGroup.model_validate(group) for group in duplicates.groups()],
+        duplicate_count=duplicates.group_count,
+    )
+
+
+class PreparedSIF(NamedTuple):
+    header_rows: List[List[str]]
+    employee_rows: List[List[str]]
+    filename: str
+    sheet_name: str
+    key: str
+    format_name: str
+    total_salaries: str = ""
+    number_of_records: int = 0
+    # Only when prepared with ``strict``: the colliding row groups and how many there are.
+    duplicates: Optional[List[Dict]] = None
+    duplicate_count: int = 0
+
+    def rows(self) -> Iterator[List[str]]:
+        return chain(self.header_rows, self.employee_rows)
+
+
+def prepare_sif(
+    request: SIFRequest, registry: Optional[BankRegistry] = None, format_name: str = "xlsx", strict: bool = False
+) -> PreparedSIF:
+    """Normalize and hash the payroll in one pass; the rows are only written out on a cache miss.
+
+    ``strict`` also looks for duplicate employees, accounts and references in that pass.
+    """
+    sheet_name = safe_text(request.sheet_name, 31) or "Sheet1"
+    digest = RowDigest(format_name, sheet_name)
+    pipeline = request_pipeline(request, registry, detect_duplicates=strict)
+    employee_rows = pipeline.spool(digest)
+    with stage("rows"):
+        header_rows = pipeline.header_rows()
+        for row in header_rows:
+            digest.update(row)
+    duplicates = pipeline.normalizer.duplicates
+    return PreparedSIF(
+        header_rows,
+        employee_rows,
+        pipeline.filename(format_name),
+        sheet_name,
+        digest.hexdigest(),
+        format_name,
+        pipeline.total_salaries,
+        pipeline.number_of_records,
+        duplicates.groups() if duplicates is not None else None,
+        duplicates.group_count if duplicates is not None else 0,
+    )
+
+
+def build_preview_json(request: SIFRequest, registry: Optional[BankRegistry] = None, aggregator=None) -> str:
+    """``build_preview`` serialized straight to JSON, skipping EmployeeRow objects and response validation.
+
+    An ``aggregator`` rides along the same normalization pass and fills ``report``; duplicate
+    detection always does.
+    """
+    payroll = normalize_request(request, registry, aggregator, detect_duplicates=True)
+    duplicates = payroll.duplicates
+    assert duplicates is not None
+    preview = PreviewResponse.model_construct(
+        filename=sif_filename(payroll.header),
+        total_salaries=payroll.total_salaries,
+        number_of_records=payroll.number_of_records,
+        sheet_name=request.sheet_name.strip() or "Sheet1",
+        row_count=payroll.number_of_records + 3,
+        normalized_employees=list(map(employee_dict, payroll.employee_rows)),
+        issues=payroll.issues,
+        issue_count=payroll.issue_count,
+        duplicates=duplicates.groups(),
+        duplicate_count=duplicates.group_count,
+        report=None if aggregator is None else aggregator.report(registry),
+    )
+    return dump_constructed(preview)
+
+
+def build_validation_json(request: SIFRequest, registry: Optional[BankRegistry] = None) -> str:
+    """Check the payroll against the payer bank's WPS rule profile without keeping the rows."""
+    pipeline = request_pipeline(request, registry, validate=True)
+    with stage("normalize"):
+        for _ in pipeline.employee_rows():
+            pass
+    normalizer = pipeline.normalizer
+    assert normalizer.rules is not None
+    report = ValidationReport.model_construct(
+        profile=normalizer.rules.profile.name,
+        valid=normalizer.error_count == 0,
+        number_of_records=pipeline.number_of_records,
+        total_salaries=pipeline.total_salaries,
+        error_count=normalizer.error_count,
+        warning_count=normalizer.issue_count - normalizer.error_count,
+        issues=normalizer.issues,
+        issue_count=normalizer.issue_count,
+    )
+    return dump_constructed(report)
+
+
+def iter_sif_xlsx(request: SIFRequest, registry: Optional[BankRegistry] = None) -> Iterator[bytes]:
+    rows = request_pipeline(request, registry).rows()
+    yield from iter_sif_chunks(rows, safe_text(request.sheet_name, 31) or "Sheet1", request.format or "xlsx")
+
+
+def iter_sif_chunks(rows: Iterable[Sequence[str]], sheet_name: str, format_name: str = "xlsx") -> Iterator[bytes]:
+    output_format = get_format(format_name)
+    return timed_chunks(output_format.name, output_format.write(rows, sheet_name))
+
 
-    return rows, normalized, filename, total_salaries_str, number_of_records
+def build_output_bytes(rows: Iterable[Sequence[str]], sheet_name: str, format_name: str = "xlsx") -> bytes:
+    return b"".join(get_format(format_name).write(rows, safe_text(sheet_name, 31) or "Sheet1"))
 
 
 def build_xlsx_bytes(rows: List[List[str]], sheet_name: str) -> bytes:
-    wb = Workbook()
-    ws = wb.active
-    ws.title = safe_text(sheet_name, 31) or "Sheet1"
+    return build_output_bytes(rows, sheet_name, "xlsx")
 
-    for row in rows:
-        ws.append(row)
 
-    bio = io.BytesIO()
-    wb.save(bio)
-    return bio.getvalue()
+def warm_pipeline(registry: Optional[BankRegistry] = None) -> None:
+    """Push one blank employee through normalization and every output writer (no metrics)."""
+    normalizer = PayrollNormalizer(registry)
+    rows = [REQUIRED_COLS, normalizer.add(EMPLOYEE_DEFAULTS)]
+    for output_format in OUTPUT_FORMATS.values():
+        for _ in output_format.write(rows, "Sheet1"):
+            pass
 
 
 def load_banks(data_path: Path) -> list:
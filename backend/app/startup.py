@@ -0,0 +1,53 @@
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .metrics import startup_seconds
+
+
+def process_age() -> Optional[float]:
+    """Seconds since this process was started (Linux only; 10 ms resolution)."""
+    try:
+        with open("/proc/self/stat", encoding="ascii") as stat:
+            # The command name may contain spaces, so split after its closing parenthesis.
+            started_ticks = int(stat.read().rpartition(")")[2].split()[19])
+        with open("/proc/uptime", encoding="ascii") as uptime:
+            uptime_seconds = float(uptime.read().split()[0])
+        return max(0.0, uptime_seconds - started_ticks / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class StartupReport:
+    """Wall time per boot phase, exported as ``sif_startup_seconds{phase=...}``.
+
+    ``boot`` covers interpreter start, imports and app construction up to the lifespan;
+    the remaining phases are the warm-up steps.
+    """
+
+    def __init__(self) -> None:
+        self.phases: List[Tuple[str, float]] = []
+
+    def record(self, name: str, seconds: float) -> None:
+        self.phases.append((name, seconds))
+        startup_seconds.set(seconds, phase=name)
+
+    def record_boot(self) -> None:
+        age = process_age()
+        if age is not None:
+            self.record("boot", age)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def as_dict(self) -> Dict[str, float]:
+        return {name: round(seconds, 6) for name, seconds in self.phases}
+
+    def summary(self) -> str:
+        return "SIF startup: " + " ".join(f"{name}={seconds * 1000:.1f}ms" for name, seconds in self.phases)
@@ -0,0 +1,223 @@
+import csv
+import re
+from datetime import date
+from itertools import chain
+from typing import BinaryIO, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence
+
+from pydantic import ValidationError
+
+from .models import SIFHeader, SIFRequest
+from .sif import EMPLOYEE_DEFAULTS, EMPLOYEE_FIELDS, HEADER_LABELS, REQUIRED_COLS, dump_constructed, parse_sif_filename
+from .xlsx import InvalidWorkbook, iter_sheet_rows
+
+CSV_EXTENSIONS = (".csv", ".txt")
+XLSX_EXTENSIONS = (".xlsx", ".xlsm")
+XLSX_CONTENT_TYPES = (
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "application/vnd.ms-excel.sheet.macroenabled.12",
+)
+
+
+class UploadFormatError(ValueError):
+    pass
+
+
+def _column_key(label) -> str:
+    return re.sub(r"[^a-z0-9]+", "", str(label or "").lower())
+
+
+SIF_HEADER_KEYS = [_column_key(label) for label in HEADER_LABELS]
+SIF_COLUMN_KEYS = [_column_key(label) for label in REQUIRED_COLS]
+
+# Both the SIF column labels ("Employee ID") and the API field names ("employee_id") are accepted.
+COLUMN_ALIASES: Dict[str, int] = {}
+for _index, (_field, _label) in enumerate(zip(EMPLOYEE_FIELDS, REQUIRED_COLS)):
+    COLUMN_ALIASES[_column_key(_field)] = _index
+    COLUMN_ALIASES[_column_key(_label)] = _index
+
+
+def upload_kind(filename: Optional[str], content_type: Optional[str]) -> str:
+    name = (filename or "").lower()
+    if name.endswith(XLSX_EXTENSIONS) or (content_type or "").lower() in XLSX_CONTENT_TYPES:
+        return "xlsx"
+    if name.endswith(CSV_EXTENSIONS) or (content_type or "").lower().startswith("text/"):
+        return "csv"
+    raise UploadFormatError("Upload must be a .csv or .xlsx employee export.")
+
+
+def _cell_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        # Spreadsheet IDs and accounts come back as floats; keep "12345", not "12345.0".
+        return int(value)
+    return value
+
+
+def records_from_rows(rows: Iterable[Sequence]) -> Iterator[tuple]:
+    """Map raw table rows (first non-blank row = column labels) to employee records.
+
+    Columns that are absent fall back to the ``EmployeeRow`` defaults; unknown columns
+    are ignored.
+    """
+    positions: Optional[List[tuple]] = None
+    for row in rows:
+        values = [_cell_value(value) for value in row]
+        if not any(str(value).strip() for value in values):
+            continue
+
+        if positions is None:
+            positions = [
+                (COLUMN_ALIASES[_column_key(label)], column)
+                for column, label in enumerate(values)
+                if _column_key(label) in COLUMN_ALIASES
+            ]
+            if not positions:
+                raise UploadFormatError(
+                    "No employee columns found in the header row. Use the SIF column labels "
+                    "(e.g. 'Employee ID') or field names (e.g. 'employee_id')."
+                )
+            continue
+
+        record = list(EMPLOYEE_DEFAULTS)
+        width = len(values)
+        for field_index, column in positions:
+            record[field_index] = values[column] if column < width else ""
+        yield tuple(record)
+
+    if positions is None:
+        raise UploadFormatError("Uploaded file is empty.")
+
+
+def _decoded_lines(stream: BinaryIO) -> Iterator[str]:
+    # Binary iteration splits on b"\n" only, which is safe for UTF-8 and for quoted
+    # multi-line CSV fields.
+    first = True
+    for raw in stream:
+        line = raw.decode("utf-8", errors="replace")
+        if first:
+            line = line.lstrip("\ufeff")
+            first = False
+        yield line
+
+
+def iter_csv_rows(stream: BinaryIO) -> Iterator[List[str]]:
+    return csv.reader(_decoded_lines(stream))
+
+
+def iter_xlsx_rows(stream: BinaryIO) -> Iterator[tuple]:
+    from openpyxl import load_workbook
+
+    try:
+        workbook = load_workbook(stream, read_only=True, data_only=True)
+    except Exception as exc:
+        raise UploadFormatError("Uploaded file is not a readable .xlsx workbook.") from exc
+    try:
+        worksheet = workbook.worksheets[0]
+        for row in worksheet.iter_rows(values_only=True):
+            yield row
+    finally:
+        workbook.close()
+
+
+def iter_upload_rows(stream: BinaryIO, kind: str) -> Iterator[Sequence]:
+    return iter_xlsx_rows(stream) if kind == "xlsx" else iter_csv_rows(stream)
+
+
+def iter_upload_records(stream: BinaryIO, kind: str) -> Iterator[tuple]:
+    return records_from_rows(iter_upload_rows(stream, kind))
+
+
+class SIFFile(NamedTuple):
+    header: List
+    records: Iterator[tuple]
+
+
+def iter_sif_sheet_rows(stream: BinaryIO) -> Iterator[List]:
+    try:
+        yield from iter_sheet_rows(stream)
+    except InvalidWorkbook as exc:
+        raise UploadFormatError(str(exc)) from exc
+
+
+def _labels(row: Optional[Sequence], width: int) -> List[str]:
+    return [_column_key(_cell_value(label)) for label in list(row or ())[:width]]
+
+
+def read_sif(stream: BinaryIO, kind: str) -> SIFFile:
+    """Header values and employee records of a generated SIF (.xlsx or .csv).
+
+    The layout is checked up front (employer labels, values, then the ``REQUIRED_COLS``
+    row); the records are read one row at a time. Workbooks go through the direct
+    sheet XML reader rather than openpyxl.
+    """
+    rows = iter(iter_sif_sheet_rows(stream) if kind == "xlsx" else iter_csv_rows(stream))
+    if _labels(next(rows, None), len(HEADER_LABELS)) != SIF_HEADER_KEYS:
+        raise UploadFormatError(f"File is not a SIF: the first row must hold the labels {', '.join(HEADER_LABELS)}.")
+    values = [_cell_value(value) for value in next(rows, None) or ()]
+    columns = next(rows, None)
+    if columns is None or _labels(columns, len(REQUIRED_COLS)) != SIF_COLUMN_KEYS:
+        raise UploadFormatError(f"File is not a SIF: the third row must hold the columns {', '.join(REQUIRED_COLS)}.")
+    values.extend([""] * (len(HEADER_LABELS) - len(values)))
+    return SIFFile(values, records_from_rows(chain([columns], rows)))
+
+
+def iter_sif_records(stream: BinaryIO, kind: str) -> Iterator[tuple]:
+    """Employee records from a generated SIF, read one row at a time."""
+    return read_sif(stream, kind).records
+
+
+def _text(value) -> str:
+    return "" if value is None else str(value).strip()
+
+
+def import_sif(
+    stream: BinaryIO,
+    kind: str,
+    filename: str = "",
+    processing_date: Optional[date] = None,
+    seq: Optional[int] = None,
+) -> str:
+    """Parse a generated SIF back into ``SIFRequest`` JSON.
+
+    The processing date and sequence number are not stored in the sheet, only in the
+    file name; explicit values take precedence.
+    """
+    sif = read_sif(stream, kind)
+    employees = [dict(zip(EMPLOYEE_FIELDS, map(_text, record))) for record in sif.records]
+
+    declared = _text(sif.header[7])
+    if declared and declared != str(len(employees)):
+        raise UploadFormatError(
+            f"SIF header declares {declared} records but the file holds {len(employees)} employee rows."
+        )
+
+    from_name = parse_sif_filename(filename)
+    if processing_date is None:
+        if from_name is None:
+            raise UploadFormatError(
+                "The processing date is not in the file name (SIF_..._YYYYMMDD_NNN); send it as processing_date."
+            )
+        processing_date = from_name[0]
+    try:
+        header = SIFHeader.model_validate(
+            {
+                "employer_cr": _text(sif.header[0]),
+                "payer_cr": _text(sif.header[1]),
+                "payer_bank_short": _text(sif.header[2]),
+                "payer_account": _text(sif.header[3]),
+                "salary_year": _text(sif.header[4]),
+                "salary_month": _text(sif.header[5]),
+                "payment_type": _text(sif.header[8]) or "Salary",
+                "processing_date": processing_date,
+                "seq": seq or (from_name[1] if from_name else 1),
+            }
+        )
+    except ValidationError as exc:
+        problems = "; ".join(f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in exc.errors())
+        raise UploadFormatError(f"SIF header is invalid ({problems}).") from exc
+
+    request = SIFRequest.model_construct(
+        **dict(header), employees=employees, employee_columns=None, format=kind
+    )
+    return dump_constructed(request)
@@ -0,0 +1,382 @@
+import re
+import zipfile
+from typing import IO, BinaryIO, Iterable, Iterator, List, Sequence, Tuple
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape, quoteattr
+
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+SHEET_PART = "xl/worksheets/sheet1.xml"
+CHUNK_SIZE = 64 * 1024
+# Fixed entry timestamps keep identical rows producing identical archives.
+ZIP_TIMESTAMP = (1980, 1, 1, 0, 0, 0)
+
+_ILLEGAL_XML_CHARS = re.compile("[\\x00-\\x08\\x0b\\x0c\\x0e-\\x1f\\ufffe\\uffff]")
+_INVALID_SHEET_CHARS = re.compile(r"[\[\]:*?/\\]")
+
+CONTENT_TYPES_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    "</Types>"
+)
+
+ROOT_RELS_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    "</Relationships>"
+)
+
+WORKBOOK_RELS_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+    'Target="styles.xml"/>'
+    "</Relationships>"
+)
+
+STYLES_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    "</styleSheet>"
+)
+
+SHEET_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    "<sheetData>"
+)
+SHEET_FOOTER = "</sheetData></worksheet>"
+
+
+def column_letter(index: int) -> str:
+    letters = ""
+    while index > 0:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+_COLUMN_LETTERS = [column_letter(index) for index in range(1, 27)]
+
+
+def clean_sheet_name(sheet_name: str) -> str:
+    name = _INVALID_SHEET_CHARS.sub("", (sheet_name or "").strip())[:31].strip("'")
+    return name or "Sheet1"
+
+
+def workbook_xml(sheet_name: str) -> str:
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        "<sheets>"
+        f'<sheet name={quoteattr(clean_sheet_name(sheet_name))} sheetId="1" r:id="rId1"/>'
+        "</sheets>"
+        "</workbook>"
+    )
+
+
+def row_xml(row_number: int, values: Sequence[str]) -> str:
+    cells = []
+    for index, value in enumerate(values):
+        letter = _COLUMN_LETTERS[index] if index < 26 else column_letter(index + 1)
+        if value is None or value == "":
+            # Empty cells are kept, as openpyxl writes them, so every row spans the full layout.
+            cells.append(f'<c r="{letter}{row_number}" t="inlineStr"/>')
+            continue
+        text = _ILLEGAL_XML_CHARS.sub("", str(value))
+        preserve = ' xml:space="preserve"' if text != text.strip() else ""
+        cells.append(f'<c r="{letter}{row_number}" t="inlineStr"><is><t{preserve}>{escape(text)}</t></is></c>')
+    return f'<row r="{row_number}">{"".join(cells)}</row>'
+
+
+class _StreamSink:
+    # Write-only file object; zipfile falls back to data descriptors when it cannot tell/seek.
+    def __init__(self) -> None:
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _zip_info(name: str, compress_type: int = zipfile.ZIP_DEFLATED) -> zipfile.ZipInfo:
+    info = zipfile.ZipInfo(name, date_time=ZIP_TIMESTAMP)
+    info.compress_type = compress_type
+    info.external_attr = 0o600 << 16
+    return info
+
+
+def _static_parts(sheet_name: str) -> List[Tuple[str, str]]:
+    return [
+        ("[Content_Types].xml", CONTENT_TYPES_XML),
+        ("_rels/.rels", ROOT_RELS_XML),
+        ("xl/workbook.xml", workbook_xml(sheet_name)),
+        ("xl/_rels/workbook.xml.rels", WORKBOOK_RELS_XML),
+        ("xl/styles.xml", STYLES_XML),
+    ]
+
+
+def iter_xlsx_chunks(rows: Iterable[Sequence[str]], sheet_name: str) -> Iterator[bytes]:
+    sink = _StreamSink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in _static_parts(sheet_name):
+            archive.writestr(_zip_info(name), content)
+
+        with archive.open(_zip_info(SHEET_PART), "w") as sheet:
+            sheet.write(SHEET_HEADER.encode("utf-8"))
+            pending: List[str] = []
+            pending_size = 0
+            for row_number, row in enumerate(rows, start=1):
+                xml = row_xml(row_number, row)
+                pending.append(xml)
+                pending_size += len(xml)
+                if pending_size >= CHUNK_SIZE:
+                    sheet.write("".join(pending).encode("utf-8"))
+                    pending.clear()
+                    pending_size = 0
+                    chunk = sink.drain()
+                    if chunk:
+                        yield chunk
+            pending.append(SHEET_FOOTER)
+            sheet.write("".join(pending).encode("utf-8"))
+
+        chunk = sink.drain()
+        if chunk:
+            yield chunk
+
+    chunk = sink.drain()
+    if chunk:
+        yield chunk
+
+
+def iter_zip_chunks(entries: Iterable[Tuple[str, bytes]]) -> Iterator[bytes]:
+    """Stream a ZIP archive of ``(name, content)`` entries as they become available.
+
+    Entries are stored uncompressed: SIF workbooks are already deflated archives.
+    """
+    sink = _StreamSink()
+    with zipfile.ZipFile(sink, "w") as archive:
+        for name, content in entries:
+            archive.writestr(_zip_info(name, zipfile.ZIP_STORED), content)
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+
+    chunk = sink.drain()
+    if chunk:
+        yield chunk
+
+
+_MAIN = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_DOC_REL = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_SHEET_DATA = f"{_MAIN}sheetData"
+_ROW = f"{_MAIN}row"
+_CELL = f"{_MAIN}c"
+_VALUE = f"{_MAIN}v"
+_INLINE = f"{_MAIN}is"
+_TEXT = f"{_MAIN}t"
+_RUN = f"{_MAIN}r"
+_SHARED_ITEM = f"{_MAIN}si"
+
+
+_DIGITS = "0123456789"
+_COLUMN_INDEX = {column_letter(index + 1): index for index in range(26 * 27)}
+
+
+class InvalidWorkbook(ValueError):
+    pass
+
+
+def column_index(reference: str) -> int:
+    """Zero-based column of a cell reference such as ``"AB12"``."""
+    index = 0
+    for char in reference:
+        if not "A" <= char <= "Z":
+            break
+        index = index * 26 + ord(char) - 64
+    return index - 1
+
+
+def _rich_text(element) -> str:
+    # Plain <t>, or rich-text runs <r><t/></r>; phonetic hints (<rPh>) are not cell text.
+    text = element.find(_TEXT)
+    if text is not None:
+        return text.text or ""
+    return "".join(run.findtext(_TEXT) or "" for run in element.iter(_RUN))
+
+
+def _first_sheet_part(archive: zipfile.ZipFile) -> str:
+    try:
+        workbook = ElementTree.fromstring(archive.read("xl/workbook.xml"))
+        relationships = ElementTree.fromstring(archive.read("xl/_rels/workbook.xml.rels"))
+    except KeyError:
+        return SHEET_PART
+    sheet = workbook.find(f"{_MAIN}sheets/{_MAIN}sheet")
+    relationship_id = None if sheet is None else sheet.get(f"{_DOC_REL}id")
+    for relationship in relationships:
+        if relationship.get("Id") == relationship_id:
+            target = relationship.get("Target", "")
+            return target[1:] if target.startswith("/") else "xl/" + target
+    return SHEET_PART
+
+
+def _shared_strings(archive: zipfile.ZipFile) -> List[str]:
+    try:
+        stream = archive.open("xl/sharedStrings.xml")
+    except KeyError:
+        return []
+    strings = []
+    with stream:
+        for _, element in ElementTree.iterparse(stream):
+            if element.tag == _SHARED_ITEM:
+                strings.append(_rich_text(element))
+                element.clear()
+    return strings
+
+
+def _cell_value(cell, shared: List[str]):
+    kind = cell.get("t", "n")
+    if kind == "inlineStr":
+        inline = cell.find(_INLINE)
+        return None if inline is None else _rich_text(inline)
+    value = cell.findtext(_VALUE)
+    if value is None:
+        return None
+    if kind == "s":
+        return shared[int(value)]
+    if kind in ("str", "e"):
+        return value
+    if kind == "b":
+        return value == "1"
+    try:
+        return int(value)
+    except ValueError:
+        return float(value)
+
+
+# Small blocks let each block's elements die young: with large ones they outlive the
+# young GC generations and trigger full collections over everything the caller retains.
+_READ_SIZE = 16 * 1024
+_ROOT_TAG = re.compile(rb"<((?:[\w.-]+:)?worksheet)\b[^>]*>")
+_SHEET_DATA_TAG = re.compile(rb"<((?:[\w.-]+:)?)sheetData\b[^>]*?(/?)>")
+
+
+def _row_documents(sheet: IO[bytes]) -> Iterator[bytes]:
+    """Split worksheet XML into small documents of whole ``<row>`` elements.
+
+    A literal ``</row>`` can only be an end tag (cell text is escaped), so each block is cut
+    after its last one and wrapped in the worksheet's own start tag to keep namespaces bound.
+    """
+    buffer = b""
+    while True:
+        root = _ROOT_TAG.search(buffer)
+        sheet_data = _SHEET_DATA_TAG.search(buffer, root.end()) if root else None
+        if root is not None and sheet_data is not None:
+            break
+        block = sheet.read(_READ_SIZE)
+        if not block:
+            raise InvalidWorkbook("Worksheet has no sheetData element.")
+        buffer += block
+    if sheet_data.group(2):
+        return
+    prefix, root_name = sheet_data.group(1), root.group(1)
+    opening, closing = root.group(0), b"</" + root_name + b">"
+    row_end = b"</" + prefix + b"row>"
+    data_end = b"</" + prefix + b"sheetData>"
+    buffer = buffer[sheet_data.end() :]
+    while True:
+        block = sheet.read(_READ_SIZE)
+        buffer += block
+        if not block:
+            end = buffer.find(data_end)
+            if end < 0:
+                raise InvalidWorkbook("Worksheet XML is truncated.")
+            if buffer[:end].strip():
+                yield opening + buffer[:end] + closing
+            return
+        cut = buffer.rfind(row_end)
+        if cut >= 0:
+            cut += len(row_end)
+            yield opening + buffer[:cut] + closing
+            buffer = buffer[cut:]
+
+
+def iter_sheet_rows(stream: BinaryIO) -> Iterator[List]:
+    """Values of the first worksheet, one row at a time, without loading the whole sheet.
+
+    Rows come back like openpyxl's ``values_only`` rows (str, int/float, bool or ``None``)
+    without date conversion. The sheet XML is inflated and parsed a block of rows at a
+    time, so memory stays bounded by the block size and the shared-strings table.
+    """
+    try:
+        archive = zipfile.ZipFile(stream)
+    except (zipfile.BadZipFile, OSError) as exc:
+        raise InvalidWorkbook("File is not a readable .xlsx workbook.") from exc
+    with archive:
+        try:
+            shared = _shared_strings(archive)
+            sheet = archive.open(_first_sheet_part(archive))
+        except (KeyError, ElementTree.ParseError, zipfile.BadZipFile) as exc:
+            raise InvalidWorkbook("Workbook has no readable worksheet.") from exc
+        with sheet:
+            try:
+                for document in _row_documents(sheet):
+                    for element in ElementTree.fromstring(document):
+                        if element.tag != _ROW:
+                            continue
+                        row: List = []
+                        for cell in element.iter(_CELL):
+                            reference = cell.get("r")
+                            if reference:
+                                letters = reference.rstrip(_DIGITS)
+                                position = _COLUMN_INDEX.get(letters)
+                                if position is None:
+                                    position = column_index(letters)
+                                if position > len(row):
+                                    row.extend([None] * (position - len(row)))
+                            if cell.get("t") == "inlineStr":
+                                # The writer's (and most exporters') string cells: skip the generic path.
+                                inline = cell.find(_INLINE)
+                                text = None if inline is None else inline.find(_TEXT)
+                                if text is not None:
+                                    row.append(text.text or "")
+                                    continue
+                            row.append(_cell_value(cell, shared))
+                        yield row
+            except InvalidWorkbook:
+                raise
+            except (ElementTree.ParseError, ValueError, IndexError, zipfile.BadZipFile) as exc:
+                raise InvalidWorkbook("Worksheet XML is malformed.") from exc
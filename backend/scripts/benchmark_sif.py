@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""Benchmark the SIF pipeline on synthetic payrolls and save the results as JSON.
+
+Usage (from backend/):
+    python scripts/benchmark_sif.py --output bench.json
+    python scripts/benchmark_sif.py --sizes 10 1000 --compare bench.json
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+BACKEND_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_ROOT))
+
+# Every request must do the full work, so keep generated files out of the result cache.
+os.environ.setdefault("SIF_CACHE_BYTES", "0")
+
+from app.models import SIFRequest  # noqa: E402
+from app.sif import build_output_bytes, build_sif_rows, build_xlsx_bytes, normalize_employee, prepare_sif  # noqa: E402
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DEFAULT_SIZES = [10, 1_000, 10_000, 100_000]
+ARABIC_NAMES = ["محمد", "أحمد", "سالم", "خالد", "فاطمة", "مريم", "عبدالله", "سعيد", "عائشة", "ناصر"]
+LATIN_NAMES = ["Ahmed", "Fatma", "Said", "Maryam", "Rashid", "Priya", "John", "Aisha", "Hamad", "Noor"]
+BICS = ["BMUSOMRX", "NBOMOMRX", "BDOFOMRU", "BSHROMRU", "HABBOMRX", "OABKOMRX"]
+
+
+def synthetic_payload(size: int, seed: int = 2026) -> dict:
+    """A payroll of ``size`` employees mixing Arabic/Latin names, max-length fields and awkward decimals."""
+    rng = random.Random(seed)
+    employees = []
+    for index in range(size):
+        arabic = index % 3 == 0
+        names = ARABIC_NAMES if arabic else LATIN_NAMES
+        name = " ".join(rng.choice(names) for _ in range(4))
+        if index % 50 == 0:
+            name = (name + " ") * 10  # longer than the 70-character limit
+        employees.append(
+            {
+                "employee_id_type": rng.choice(["C", "P", "c", ""]),
+                "employee_id": str(10**16 + index) if index % 7 == 0 else str(100000 + index),
+                "reference_number": f"REF-{index:060d}" if index % 11 == 0 else "",
+                "employee_name": name,
+                "employee_bic_code": rng.choice(BICS),
+                "employee_account": f"{rng.randrange(10**29, 10**30)}",
+                "salary_frequency": "M",
+                "number_of_working_days": str(rng.choice([30, 31, 26, 15])),
+                "basic_salary": rng.choice(
+                    [
+                        f"{rng.uniform(150, 5000):.3f}",
+                        f"{rng.uniform(150, 5000):.4f}",
+                        str(rng.randrange(150, 5000)),
+                        round(rng.uniform(150, 5000), 2),
+                    ]
+                ),
+                "extra_hours": f"{rng.uniform(0, 40):.2f}",
+                "extra_income": f"{rng.uniform(0, 300):.3f}" if index % 4 == 0 else "0",
+                "deductions": f"{rng.uniform(0, 100):.3f}" if index % 5 == 0 else "0",
+                "social_security_deductions": f"{rng.uniform(0, 80):.3f}",
+                "notes_comments": "ملاحظة " * 60 if index % 97 == 0 else "",
+            }
+        )
+    return {
+        "employer_cr": "1234567890",
+        "payer_cr": "1234567890",
+        "payer_bank_short": "BMCT",
+        "payer_account": "0" * 64,
+        "salary_year": 2026,
+        "salary_month": 2,
+        "payment_type": "Salary",
+        "processing_date": "2026-02-13",
+        "seq": 1,
+        "sheet_name": "Sheet1",
+        "employees": employees,
+    }
+
+
+def columnar_payload(payload: dict) -> dict:
+    columnar = {key: value for key, value in payload.items() if key != "employees"}
+    fields = payload["employees"][0].keys() if payload["employees"] else ()
+    columnar["employee_columns"] = {field: [employee[field] for employee in payload["employees"]] for field in fields}
+    return columnar
+
+
+def peak_rss_kib() -> Optional[int]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def measure(fn: Callable[[], object], repeat: int) -> Dict[str, object]:
+    """Wall time over ``repeat`` runs, then one traced run for allocations."""
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "min_s": round(min(timings), 6),
+        "median_s": round(statistics.median(timings), 6),
+        "alloc_peak_bytes": peak,
+        "alloc_retained_bytes": current,
+        "peak_rss_kib": peak_rss_kib(),
+    }
+
+
+def benchmark_size(size: int, repeat: int, client) -> Dict[str, Dict[str, object]]:
+    payload = synthetic_payload(size)
+    columnar = columnar_payload(payload)
+    request = SIFRequest.model_validate(payload)
+    rows = build_sif_rows(request)[0]
+
+    stages = {
+        "validate_request": lambda: SIFRequest.model_validate(payload),
+        "validate_columnar": lambda: SIFRequest.model_validate(columnar),
+        "normalize_employee": lambda: [normalize_employee(employee) for employee in request.employees],
+        "build_sif_rows": lambda: build_sif_rows(request),
+        "prepare_sif": lambda: prepare_sif(request),
+        "build_xlsx_bytes": lambda: build_xlsx_bytes(rows, request.sheet_name),
+        "build_csv_bytes": lambda: build_output_bytes(rows, request.sheet_name, "csv"),
+    }
+    if client is not None:
+        stages["http_preview"] = lambda: client.post("/api/sif/preview", json=payload).raise_for_status()
+        stages["http_preview_columnar"] = lambda: client.post("/api/sif/preview", json=columnar).raise_for_status()
+        stages["http_generate"] = lambda: client.post("/api/sif/generate", json=payload).raise_for_status()
+
+    results = {}
+    for name, fn in stages.items():
+        results[name] = measure(fn, repeat)
+        print(f"  {size:>7} {name:<20} {results[name]['median_s'] * 1000:10.1f} ms", flush=True)
+    return results
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: dict, baseline: dict) -> None:
+    print(f"\nCompared with {baseline.get('commit') or 'baseline'} (median time, ratio > 1 is slower):")
+    for size, stages in current["results"].items():
+        for name, result in stages.items():
+            previous = baseline.get("results", {}).get(size, {}).get(name)
+            if previous and previous["median_s"]:
+                ratio = result["median_s"] / previous["median_s"]
+                print(f"  {size:>7} {name:<20} {ratio:6.2f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=(__doc__ or "SIF pipeline benchmark").splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-http", action="store_true", help="skip TestClient end-to-end latency")
+    parser.add_argument("--output", type=Path, default=Path("sif-benchmark.json"))
+    parser.add_argument("--compare", type=Path, help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    client = None
+    if not args.no_http:
+        from fastapi.testclient import TestClient
+
+        from app.main import app
+
+        client = TestClient(app)
+
+    report = {
+        "commit": git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "results": {},
+    }
+    for size in args.sizes:
+        report["results"][str(size)] = benchmark_size(size, args.repeat, client)
+
+    args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Wrote {args.output}")
+
+    if args.compare:
+        compare(report, json.loads(args.compare.read_text(encoding="utf-8")))
+
+
+if __name__ == "__main__":
+    main()
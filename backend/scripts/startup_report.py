@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""Report how long the API takes to boot: import time by package, app warm-up and first requests.
+
+Usage (from backend/):
+    python scripts/startup_report.py --output startup.json
+    python scripts/startup_report.py --compare startup.json
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+BACKEND_ROOT = Path(__file__).resolve().parent.parent
+
+# Run in a fresh interpreter per sample so every import is cold (bytecode caches aside).
+MEASURE_APP = """
+import asyncio, json, time
+started = time.perf_counter()
+import app.main as main
+imported = time.perf_counter()
+report = main.StartupReport()
+asyncio.run(main.warm_up(report))
+print(json.dumps({"import_s": imported - started, "phases": report.as_dict()}))
+"""
+
+
+def import_times() -> Tuple[List[Tuple[str, int, int]], float]:
+    """``(module, self_us, cumulative_us)`` for each module imported by ``app.main``, plus wall time."""
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=BACKEND_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    wall = time.perf_counter() - started
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    return modules, wall
+
+
+def group_name(module: str) -> str:
+    top = module.split(".", 1)[0]
+    if top == "app":
+        return module
+    return top if top in GROUPED_PACKAGES else "other"
+
+
+GROUPED_PACKAGES = {"fastapi", "starlette", "pydantic", "pydantic_core", "anyio", "typing_extensions", "annotated_types"}
+
+
+def measure_app() -> Dict[str, object]:
+    result = subprocess.run(
+        [sys.executable, "-c", MEASURE_APP], cwd=BACKEND_ROOT, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def sample(repeat: int) -> Dict[str, object]:
+    groups: Dict[str, List[int]] = defaultdict(list)
+    slowest: Dict[str, List[int]] = defaultdict(list)
+    walls = []
+    for _ in range(repeat):
+        modules, wall = import_times()
+        walls.append(wall)
+        totals: Dict[str, int] = defaultdict(int)
+        for name, self_us, cumulative_us in modules:
+            totals[group_name(name)] += self_us
+            slowest[name].append(cumulative_us)
+        for name, total in totals.items():
+            groups[name].append(total)
+
+    runs = [measure_app() for _ in range(repeat)]
+    phases: Dict[str, List[float]] = defaultdict(list)
+    for run in runs:
+        for name, seconds in run["phases"].items():
+            phases[name].append(seconds)
+
+    top = sorted(slowest.items(), key=lambda item: statistics.median(item[1]), reverse=True)[:15]
+    return {
+        "process_wall_s": round(statistics.median(walls), 6),
+        "import_s": round(statistics.median(run["import_s"] for run in runs), 6),
+        "import_by_group_ms": {
+            name: round(statistics.median(values) / 1000, 2)
+            for name, values in sorted(groups.items(), key=lambda item: -statistics.median(item[1]))
+        },
+        "slowest_imports_ms": {name: round(statistics.median(values) / 1000, 2) for name, values in top},
+        "warm_up_ms": {name: round(statistics.median(values) * 1000, 2) for name, values in phases.items()},
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(results: Dict[str, object]) -> None:
+    print(f"process wall (import app.main): {results['process_wall_s'] * 1000:8.1f} ms")
+    print(f"import app.main (in process):   {results['import_s'] * 1000:8.1f} ms")
+    print("import self time by package:")
+    for name, ms in results["import_by_group_ms"].items():
+        print(f"  {name:<28} {ms:8.1f} ms")
+    print("slowest imports (cumulative):")
+    for name, ms in results["slowest_imports_ms"].items():
+        print(f"  {name:<40} {ms:8.1f} ms")
+    print("lifespan warm-up:")
+    for name, ms in results["warm_up_ms"].items():
+        print(f"  {name:<28} {ms:8.1f} ms")
+
+
+def compare(current: dict, baseline: dict) -> None:
+    print(f"\nCompared with {baseline.get('commit') or 'baseline'} (ratio > 1 is slower):")
+    for key in ("process_wall_s", "import_s"):
+        if baseline["results"].get(key):
+            print(f"  {key:<28} {current['results'][key] / baseline['results'][key]:6.2f}x")
+    for section in ("import_by_group_ms", "warm_up_ms"):
+        for name, ms in current["results"][section].items():
+            previous = baseline["results"].get(section, {}).get(name)
+            if previous:
+                print(f"  {name:<28} {ms / previous:6.2f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", type=Path, default=Path("sif-startup.json"))
+    parser.add_argument("--compare", type=Path, help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    report = {
+        "commit": git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "results": sample(args.repeat),
+    }
+    print_report(report["results"])
+    args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Wrote {args.output}")
+
+    if args.compare:
+        compare(report, json.loads(args.compare.read_text(encoding="utf-8")))
+
+
+if __name__ == "__main__":
+    main()
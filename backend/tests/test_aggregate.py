@@ -0,0 +1,100 @@
+import unittest
+
+from fastapi.testclient import TestClient
+
+from app.aggregate import AmountStats, PayrollAggregator
+from app.main import app
+from app.models import SIFRequest
+from app.sif import request_pipeline
+from tests.test_api import sample_payload
+
+EMPLOYEES = [
+    {"employee_id": "1", "employee_bic_code": "BMUSOMRX", "basic_salary": "500", "deductions": "25.5"},
+    {"employee_id": "2", "employee_bic_code": "NBOMOMRX", "basic_salary": "300.125", "salary_frequency": "B"},
+    {"employee_id": "3", "employee_bic_code": "BMUSOMRX", "basic_salary": "100", "deductions": "100"},
+    {
+        "employee_id": "4",
+        "employee_id_type": "P",
+        "employee_bic_code": "NBOMOMRX",
+        "basic_salary": "0",
+        "social_security_deductions": "7",
+        "extra_income": "7",
+    },
+]
+
+
+class AmountStatsTests(unittest.TestCase):
+    def test_buckets_are_inclusive_upper_bounds(self):
+        stats = AmountStats((0, 10_000, 50_000))
+        for value in (0, 0, 1, 10_000, 10_001, 50_000, 75_000):
+            stats.add(value)
+        summary = stats.as_dict()
+        self.assertEqual([bucket["count"] for bucket in summary["buckets"]], [2, 2, 2, 1])
+        self.assertEqual([bucket["up_to"] for bucket in summary["buckets"]], ["0.000", "10.000", "50.000", None])
+        self.assertEqual(
+            (summary["count"], summary["total"], summary["minimum"], summary["maximum"], summary["mean"]),
+            (5, "145.002", "0.001", "75.000", "29.000"),
+        )
+
+
+class AggregatorTests(unittest.TestCase):
+    def test_breakdowns_come_from_the_normalization_pass(self):
+        aggregator = PayrollAggregator()
+        request = SIFRequest.model_validate(sample_payload(employees=EMPLOYEES))
+        pipeline = request_pipeline(request, aggregator=aggregator)
+        list(pipeline.employee_rows())
+        report = aggregator.report()
+
+        self.assertEqual(
+            [(bank["employee_bic_code"], bank["number_of_records"], bank["total_salaries"]) for bank in report["by_bank"]],
+            [("BMUSOMRX", 2, "474.500"), ("NBOMOMRX", 2, "300.125")],
+        )
+        self.assertEqual(
+            [(group["value"], group["number_of_records"]) for group in report["by_frequency"]], [("B", 1), ("M", 3)]
+        )
+        self.assertEqual(
+            [(group["value"], group["total_salaries"]) for group in report["by_id_type"]],
+            [("C", "774.625"), ("P", "0.000")],
+        )
+        self.assertEqual((report["zero_net_count"], report["zero_net_rows"]), (2, [2, 3]))
+        self.assertEqual((report["deductions"]["count"], report["deductions"]["total"]), (2, "125.500"))
+        self.assertEqual(report["social_security_deductions"]["maximum"], "7.000")
+        self.assertEqual(pipeline.total_salaries, "774.625")
+
+    def test_non_finite_amounts_are_listed_not_aggregated(self):
+        aggregator = PayrollAggregator()
+        row = ["C", "1", "", "", "BMUSOMRX", "", "M", "30", "5.000", "5.000", "0.00", "0.000", "0.000", "0.000", ""]
+        aggregator.add(0, row, 5000)
+        aggregator.add(1, row[:12] + ["Infinity", "0.000", ""], None)
+        aggregator.add(2, row[:8] + ["-0.000"] + row[9:], None)
+        report = aggregator.report()
+        self.assertEqual((report["unparsed_count"], report["unparsed_rows"]), (1, [1]))
+        self.assertEqual(report["by_bank"][0]["number_of_records"], 2)
+        self.assertEqual(report["zero_net_rows"], [2])
+
+
+class ReportEndpointTests(unittest.TestCase):
+    def test_report_and_preview_share_the_breakdowns(self):
+        client = TestClient(app)
+        payload = sample_payload(employees=EMPLOYEES)
+        report = client.post("/api/sif/report", json=payload).json()
+        self.assertEqual((report["number_of_records"], report["total_salaries"]), (4, "774.625"))
+        self.assertEqual(report["by_bank"][0]["short_name"], "BMCT")
+
+        preview = client.post("/api/sif/preview?report=true", json=payload).json()
+        self.assertEqual(preview["report"], {key: value for key, value in report.items() if key in preview["report"]})
+        self.assertEqual(len(preview["normalized_employees"]), 4)
+        self.assertIsNone(client.post("/api/sif/preview", json=payload).json()["report"])
+
+    def test_nan_amounts_do_not_fail_the_report(self):
+        client = TestClient(app)
+        payload = sample_payload(employees=[*EMPLOYEES, {"employee_id": "5", "basic_salary": "10", "deductions": "NaN"}])
+        report = client.post("/api/sif/report", json=payload)
+        self.assertEqual(report.status_code, 200)
+        self.assertEqual((report.json()["unparsed_count"], report.json()["unparsed_rows"]), (1, [4]))
+        self.assertEqual(report.json()["deductions"]["count"], 2)
+        self.assertEqual(client.post("/api/sif/preview?report=true", json=payload).status_code, 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,256 @@
+import json
+import unittest
+import zipfile
+from io import BytesIO
+
+from fastapi.testclient import TestClient
+from openpyxl import Workbook, load_workbook
+
+from app.batch import build_manifest
+from app.main import app
+
+
+def sample_payload(**overrides) -> dict:
+    payload = {
+        "employer_cr": "fg67",
+        "payer_cr": "fg67",
+        "payer_bank_short": "BMCT",
+        "payer_account": "123",
+        "salary_year": 2026,
+        "salary_month": 2,
+        "payment_type": "Salary",
+        "processing_date": "2026-02-13",
+        "seq": 1,
+        "sheet_name": "Sheet1",
+        "employees": [
+            {"employee_id": "1001", "employee_name": "A", "basic_salary": "500", "deductions": "25.5"},
+            {"employee_id": "1002", "employee_name": "B", "basic_salary": "320.125"},
+        ],
+    }
+    payload.update(overrides)
+    return payload
+
+
+class SIFApiTests(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(app)
+
+    def test_generate_streams_workbook(self):
+        response = self.client.post("/api/sif/generate", json=sample_payload())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["x-generated-filename"], "SIF_fg67_BMCT_20260213_001.xlsx")
+
+        wb = load_workbook(filename=BytesIO(response.content))
+        ws = wb[wb.sheetnames[0]]
+        self.assertEqual(ws.cell(row=2, column=7).value, "794.625")
+        self.assertEqual(ws.cell(row=4, column=9).value, "474.500")
+
+    def test_generate_is_deterministic_and_revalidates(self):
+        first = self.client.post("/api/sif/generate", json=sample_payload())
+        second = self.client.post("/api/sif/generate", json=sample_payload(employees=sample_payload()["employees"]))
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(first.headers["etag"], second.headers["etag"])
+
+        cached = self.client.post(
+            "/api/sif/generate", json=sample_payload(), headers={"If-None-Match": first.headers["etag"]}
+        )
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.content, b"")
+
+        changed = self.client.post("/api/sif/generate", json=sample_payload(seq=2, salary_month=3))
+        self.assertNotEqual(changed.headers["etag"], first.headers["etag"])
+
+    def test_columnar_payload_matches_row_payload(self):
+        columnar = sample_payload(
+            employee_columns={
+                "employee_id": ["1001", "1002"],
+                "employee_name": ["A", "B"],
+                "basic_salary": ["500", 320.125],
+                "deductions": ["25.5", 0],
+            },
+        )
+        del columnar["employees"]
+        by_rows = self.client.post("/api/sif/preview", json=sample_payload())
+        by_columns = self.client.post("/api/sif/preview", json=columnar)
+        self.assertEqual(by_columns.status_code, 200)
+        self.assertEqual(by_columns.json(), by_rows.json())
+
+        generated = self.client.post("/api/sif/generate", json=columnar)
+        self.assertEqual(generated.headers["etag"], self.client.post("/api/sif/generate", json=sample_payload()).headers["etag"])
+
+    def test_employee_source_is_validated(self):
+        ragged = sample_payload(employee_columns={"employee_id": ["1"], "basic_salary": ["1", "2"]})
+        del ragged["employees"]
+        both = sample_payload(employee_columns={"employee_id": ["1"]})
+        neither = sample_payload()
+        del neither["employees"]
+        flag = sample_payload(employees=[{"employee_id": "1", "basic_salary": True}])
+        for payload in (ragged, both, neither, flag):
+            self.assertEqual(self.client.post("/api/sif/preview", json=payload).status_code, 422)
+
+    def test_generate_csv_by_field_or_accept_header(self):
+        by_field = self.client.post("/api/sif/generate", json=sample_payload(format="csv"))
+        self.assertEqual(by_field.status_code, 200)
+        self.assertTrue(by_field.headers["content-type"].startswith("text/csv"))
+        self.assertEqual(by_field.headers["x-generated-filename"], "SIF_fg67_BMCT_20260213_001.csv")
+        lines = by_field.content.decode("utf-8").split("\r\n")
+        self.assertEqual(lines[1].split(",")[6:8], ["794.625", "2"])
+        self.assertTrue(lines[3].startswith("C,1001,,A,BMUSOMRX"))
+
+        by_accept = self.client.post("/api/sif/generate", json=sample_payload(), headers={"Accept": "text/csv"})
+        self.assertEqual(by_accept.content, by_field.content)
+        self.assertEqual(by_accept.headers["vary"], "Accept")
+        self.assertNotEqual(by_accept.headers["etag"], self.client.post("/api/sif/generate", json=sample_payload()).headers["etag"])
+
+        preview = self.client.post("/api/sif/preview", json=sample_payload(format="csv")).json()
+        self.assertEqual(preview["filename"], "SIF_fg67_BMCT_20260213_001.csv")
+
+    def test_generate_rejects_unknown_formats(self):
+        self.assertEqual(self.client.post("/api/sif/generate", json=sample_payload(format="pdf")).status_code, 422)
+        response = self.client.post(
+            "/api/sif/generate", json=sample_payload(format="pdf"), headers={"Accept": "text/csv"}
+        )
+        self.assertEqual(response.status_code, 422)
+
+    def test_generate_falls_back_to_xlsx_for_unmatched_accept(self):
+        default = self.client.post("/api/sif/generate", json=sample_payload())
+        for accept in ("application/json", "application/json, text/plain, */*;q=0", "image/png"):
+            response = self.client.post("/api/sif/generate", json=sample_payload(), headers={"Accept": accept})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.headers["content-type"], default.headers["content-type"])
+            self.assertEqual(response.content, default.content)
+
+    def test_generate_requires_header_fields(self):
+        response = self.client.post("/api/sif/generate", json=sample_payload(employer_cr=" "))
+        self.assertEqual(response.status_code, 422)
+
+    def upload_form(self) -> dict:
+        form = sample_payload()
+        form.pop("employees")
+        return {key: str(value) for key, value in form.items()}
+
+    def test_upload_csv_generates_workbook(self):
+        csv_body = (
+            "\ufeffEmployee ID,Employee Name,basic_salary,Deductions,Notes / Comments,Unknown\r\n"
+            '1001,"Doe, Jane",500,25.5,,x\r\n'
+            "\r\n"
+            "1002,محمد,320.125,0,bonus,y\r\n"
+        ).encode("utf-8")
+        response = self.client.post(
+            "/api/sif/upload",
+            data=self.upload_form(),
+            files={"file": ("payroll.csv", csv_body, "text/csv")},
+        )
+        self.assertEqual(response.status_code, 200)
+
+        ws = load_workbook(filename=BytesIO(response.content)).active
+        assert ws is not None
+        self.assertEqual(ws.cell(row=2, column=7).value, "794.625")
+        self.assertEqual(ws.cell(row=2, column=8).value, "2")
+        self.assertEqual(ws.cell(row=4, column=4).value, "Doe, Jane")
+        self.assertEqual(ws.cell(row=4, column=5).value, "BMUSOMRX")
+        self.assertEqual(ws.cell(row=5, column=15).value, "bonus")
+
+    def test_upload_xlsx_generates_workbook(self):
+        source = Workbook()
+        sheet = source.active
+        assert sheet is not None
+        sheet.append(["employee_id", "employee_name", "basic_salary"])
+        sheet.append([12345, "A", 400.5])
+        buffer = BytesIO()
+        source.save(buffer)
+
+        response = self.client.post(
+            "/api/sif/upload",
+            data=self.upload_form(),
+            files={"file": ("payroll.xlsx", buffer.getvalue(), "application/octet-stream")},
+        )
+        self.assertEqual(response.status_code, 200)
+        ws = load_workbook(filename=BytesIO(response.content)).active
+        assert ws is not None
+        self.assertEqual(ws.cell(row=4, column=2).value, "12345")
+        self.assertEqual(ws.cell(row=4, column=9).value, "400.500")
+
+    def test_upload_rejects_unrecognized_columns(self):
+        response = self.client.post(
+            "/api/sif/upload",
+            data=self.upload_form(),
+            files={"file": ("payroll.csv", b"foo,bar\n1,2\n", "text/csv")},
+        )
+        self.assertEqual(response.status_code, 422)
+
+    def test_batch_returns_zip_with_manifest(self):
+        payload = {"requests": [sample_payload(), sample_payload(employer_cr="cr2", seq=2)]}
+        response = self.client.post("/api/sif/batch", json=payload)
+        self.assertEqual(response.status_code, 200)
+
+        archive = zipfile.ZipFile(BytesIO(response.content))
+        self.assertEqual(
+            archive.namelist(),
+            ["SIF_fg67_BMCT_20260213_001.xlsx", "SIF_cr2_BMCT_20260213_002.xlsx", "manifest.json"],
+        )
+        manifest = json.loads(archive.read("manifest.json"))
+        self.assertEqual(manifest["total_salaries"], "1589.250")
+        self.assertEqual(manifest["number_of_records"], 4)
+        self.assertEqual(manifest["files"][1]["employer_cr"], "cr2")
+        ws = load_workbook(filename=BytesIO(archive.read("SIF_cr2_BMCT_20260213_002.xlsx"))).active
+        assert ws is not None
+        self.assertEqual(ws.cell(row=2, column=1).value, "cr2")
+
+    def test_manifest_total_keeps_amounts_that_are_not_plain(self):
+        def summary(total):
+            return {"total_salaries": total, "number_of_records": 1}
+
+        huge = "123456789012345678901234.500"
+        self.assertEqual(build_manifest([summary("1.250"), summary(huge)])["total_salaries"], "123456789012345678901235.750")
+        self.assertEqual(build_manifest([summary("1.250"), summary("NaN")])["total_salaries"], "NaN")
+
+    def test_batch_rejects_duplicate_filenames(self):
+        response = self.client.post("/api/sif/batch", json={"requests": [sample_payload(), sample_payload()]})
+        self.assertEqual(response.status_code, 422)
+
+    def test_split_numbers_files_and_totals_each_chunk(self):
+        bics = ["BMUSOMRX", "NBOMOMRX", "bmusomrx", "NBOMOMRX", "BMUSOMRX"]
+        employees = [
+            {"employee_id": str(index), "employee_bic_code": bic, "basic_salary": "100"} for index, bic in enumerate(bics)
+        ]
+        payload = sample_payload(seq=4, format="csv", employees=employees)
+
+        response = self.client.post("/api/sif/split?max_records=2", json=payload)
+        self.assertEqual(response.status_code, 200)
+        manifest = json.loads(zipfile.ZipFile(BytesIO(response.content)).read("manifest.json"))
+        self.assertEqual(
+            [(entry["filename"], entry["number_of_records"]) for entry in manifest["files"]],
+            [
+                ("SIF_fg67_BMCT_20260213_004.csv", 2),
+                ("SIF_fg67_BMCT_20260213_005.csv", 2),
+                ("SIF_fg67_BMCT_20260213_006.csv", 1),
+            ],
+        )
+
+        response = self.client.post("/api/sif/split?max_records=2&group_by_bic=true", json=payload)
+        archive = zipfile.ZipFile(BytesIO(response.content))
+        manifest = json.loads(archive.read("manifest.json"))
+        self.assertEqual(
+            [(entry["seq"], entry["employee_bic_code"], entry["total_salaries"]) for entry in manifest["files"]],
+            [(4, "BMUSOMRX", "200.000"), (5, "BMUSOMRX", "100.000"), (6, "NBOMOMRX", "200.000")],
+        )
+        self.assertEqual((manifest["file_count"], manifest["total_salaries"]), (3, "500.000"))
+        header = archive.read("SIF_fg67_BMCT_20260213_006.csv").decode("utf-8").splitlines()[1].split(",")
+        self.assertEqual(header[6:8], ["200.000", "2"])
+
+    def test_split_negotiates_the_file_format(self):
+        response = self.client.post("/api/sif/split?max_records=1", json=sample_payload(), headers={"Accept": "text/csv"})
+        self.assertEqual(response.headers["vary"], "Accept")
+        self.assertEqual(
+            zipfile.ZipFile(BytesIO(response.content)).namelist(),
+            ["SIF_fg67_BMCT_20260213_001.csv", "SIF_fg67_BMCT_20260213_002.csv", "manifest.json"],
+        )
+
+    def test_split_rejects_seq_overflow(self):
+        response = self.client.post("/api/sif/split?max_records=1", json=sample_payload(seq=999))
+        self.assertEqual(response.status_code, 422)
+
+
+if __name__ == "__main__":
+    unittest.main()
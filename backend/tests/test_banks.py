@@ -0,0 +1,109 @@
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from app.banks import BankDirectory, etag_matches
+from app.main import BANKS_PATH, app
+from app.sif import normalize_payroll
+
+
+class BankDirectoryTests(unittest.TestCase):
+    def test_banks_endpoint_supports_conditional_requests(self):
+        client = TestClient(app)
+        response = client.get("/api/banks")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("max-age", response.headers["cache-control"])
+        banks = response.json()["banks"]
+        self.assertEqual(banks, sorted(banks, key=lambda item: item["bank_name"].lower()))
+
+        etag = response.headers["etag"]
+        cached = client.get("/api/banks", headers={"If-None-Match": f"W/{etag}"})
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.content, b"")
+        self.assertEqual(client.get("/api/banks", headers={"If-None-Match": '"stale"'}).status_code, 200)
+
+    def test_reloads_only_when_mtime_changes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "banks.json"
+            path.write_text(json.dumps([{"short_name": "B", "bic": "BBBBOMRX", "bank_name": "Beta"}]))
+            directory = BankDirectory(path)
+            first = directory.snapshot()
+            self.assertIs(directory.snapshot(), first)
+
+            path.write_text(
+                json.dumps(
+                    [
+                        {"short_name": "B", "bic": "BBBBOMRX", "bank_name": "Beta"},
+                        {"short_name": "A", "bic": "AAAAOMRX", "bank_name": "alpha"},
+                    ]
+                )
+            )
+            os.utime(path, ns=(first.mtime_ns + 10**9, first.mtime_ns + 10**9))
+            second = directory.snapshot()
+            self.assertNotEqual(second.etag, first.etag)
+            self.assertEqual([bank.short_name for bank in second.registry.banks], ["A", "B"])
+
+            path.unlink()
+            self.assertIs(directory.snapshot(), second)
+
+    def test_etag_matching(self):
+        self.assertTrue(etag_matches('"a", "b"', '"b"'))
+        self.assertTrue(etag_matches("*", '"b"'))
+        self.assertFalse(etag_matches(None, '"b"'))
+
+
+class BankRegistryTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.registry = BankDirectory(BANKS_PATH).snapshot().registry
+
+    def test_resolves_and_corrects_codes(self):
+        self.assertFalse(self.registry.resolve_bic("BMUSOMRX").corrected)
+        for raw in ("bmus omrx", "BMUSOMRXXXX", "BMCT", "Bank of Muscat"):
+            resolution = self.registry.resolve_bic(raw)
+            self.assertEqual((resolution.value, resolution.corrected), ("BMUSOMRX", True), raw)
+        bank = self.registry.resolve_bic("BMUSOMRXISL").bank
+        assert bank is not None
+        self.assertEqual(bank.short_name, "MTHQ")
+        self.assertEqual(self.registry.resolve_short_name("bdof").value, "BDOF")
+
+    def test_unknown_codes_get_suggestions(self):
+        resolution = self.registry.resolve_bic("NBOMOMRY")
+        self.assertIsNone(resolution.bank)
+        self.assertEqual(resolution.suggestions[0], "NBOMOMRX")
+        self.assertIn("BSHR", self.registry.resolve_short_name("Sohar").suggestions)
+
+    def test_normalization_uses_registry(self):
+        record = ["C", "1", "", "A", "Bank Dhofar", "", "M", "30", "0", "5", "0", "0", "0", "0", ""]
+        unknown = list(record)
+        unknown[4] = "ZZZZOMRX"
+        rows, _ = normalize_payroll([record, unknown], self.registry)
+        self.assertEqual(rows[0][4], "BDOFOMRU")
+        self.assertEqual(rows[1][4], "ZZZZOMRX")
+
+    def test_preview_reports_bank_issues(self):
+        payload = {
+            "employer_cr": "fg67",
+            "payer_cr": "fg67",
+            "payer_bank_short": "bank of muscat",
+            "payer_account": "123",
+            "salary_year": 2026,
+            "salary_month": 2,
+            "processing_date": "2026-02-13",
+            "employees": [{"employee_bic_code": "nbom omrx"}, {"employee_bic_code": "NBOMOMRY"}],
+        }
+        body = TestClient(app).post("/api/sif/preview", json=payload).json()
+        self.assertEqual(body["filename"], "SIF_fg67_BMCT_20260213_001.xlsx")
+        self.assertEqual(body["normalized_employees"][0]["employee_bic_code"], "NBOMOMRX")
+        self.assertEqual(
+            [(issue["row"], issue["code"]) for issue in body["issues"]],
+            [(None, "payer_bank_corrected"), (0, "bic_corrected"), (1, "bic_unknown")],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
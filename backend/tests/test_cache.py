@@ -0,0 +1,57 @@
+import asyncio
+import tempfile
+import unittest
+from pathlib import Path
+
+from app.cache import ResultCache, content_key
+
+
+async def _chunks(*parts):
+    for part in parts:
+        yield part
+
+
+async def _drain(iterator):
+    return [chunk async for chunk in iterator]
+
+
+class ResultCacheTests(unittest.TestCase):
+    def test_content_key_tracks_rows_and_sheet(self):
+        rows = [["a", "b"], ["c"]]
+        self.assertEqual(content_key("xlsx", "Sheet1", rows), content_key("xlsx", "Sheet1", [list(row) for row in rows]))
+        self.assertNotEqual(content_key("xlsx", "Sheet1", rows), content_key("xlsx", "Sheet2", rows))
+        self.assertNotEqual(content_key("xlsx", "Sheet1", [["ab"]]), content_key("xlsx", "Sheet1", [["a", "b"]]))
+
+    def test_lru_eviction_by_size(self):
+        cache = ResultCache(max_bytes=10, max_entry_bytes=10)
+        cache.put("a", b"12345")
+        cache.put("b", b"12345")
+        self.assertEqual(cache.get("a"), b"12345")
+        cache.put("c", b"12345")
+
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), b"12345")
+        self.assertEqual(cache.stats()["bytes"], 10)
+
+        cache.put("huge", b"x" * 11)
+        self.assertIsNone(cache.get("huge"))
+
+    def test_disk_tier_survives_restart(self):
+        with tempfile.TemporaryDirectory() as directory:
+            ResultCache(max_bytes=0, directory=Path(directory)).put("k", b"payload")
+            restarted = ResultCache(max_bytes=1024, directory=Path(directory))
+            self.assertTrue(restarted.enabled)
+            self.assertEqual(restarted.get("k"), b"payload")
+            self.assertEqual(restarted.stats()["entries"], 1)
+
+    def test_tee_stores_complete_bodies_only(self):
+        cache = ResultCache(max_bytes=100, max_entry_bytes=6)
+        self.assertEqual(asyncio.run(_drain(cache.tee("small", _chunks(b"abc", b"def")))), [b"abc", b"def"])
+        self.assertEqual(cache.get("small"), b"abcdef")
+
+        asyncio.run(_drain(cache.tee("large", _chunks(b"abcd", b"efgh"))))
+        self.assertIsNone(cache.get("large"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+
+from fastapi.testclient import TestClient
+
+from app.duplicates import DuplicateDetector
+from app.main import app
+from app.models import SIFRequest
+from app.sif import request_pipeline
+from tests.test_api import sample_payload
+
+EMPLOYEES = [
+    {"employee_id": "1", "employee_account": "A1", "reference_number": "R1", "basic_salary": "100"},
+    {"employee_id": "2", "employee_account": "A2", "basic_salary": "100"},
+    {"employee_id": "1", "employee_account": "A3", "basic_salary": "100"},
+    {"employee_id": "3", "employee_account": "A2", "reference_number": "R1", "basic_salary": "100"},
+    {"employee_id": "1", "employee_account": "A4", "basic_salary": "100"},
+]
+
+
+class DuplicateDetectorTests(unittest.TestCase):
+    def test_groups_come_from_the_normalization_pass(self):
+        request = SIFRequest.model_validate(sample_payload(employees=EMPLOYEES))
+        pipeline = request_pipeline(request, detect_duplicates=True)
+        list(pipeline.employee_rows())
+        detector = pipeline.normalizer.duplicates
+        assert detector is not None
+
+        self.assertEqual(detector.group_count, 3)
+        self.assertEqual(
+            [(group["field"], group["value"], group["rows"]) for group in detector.groups()],
+            [("employee_id", "1", [0, 2, 4]), ("reference_number", "R1", [0, 3]), ("employee_account", "A2", [1, 3])],
+        )
+        self.assertEqual(len(detector.groups(limit=1)), 1)
+
+    def test_blank_values_never_collide(self):
+        detector = DuplicateDetector()
+        for index in range(3):
+            detector.add(index, ["C", "", "", "", "", "", "M"])
+        self.assertEqual((detector.group_count, detector.groups()), (0, []))
+
+
+class DuplicateEndpointTests(unittest.TestCase):
+    def test_preview_reports_and_strict_generate_refuses(self):
+        client = TestClient(app)
+        payload = sample_payload(employees=EMPLOYEES)
+        preview = client.post("/api/sif/preview", json=payload).json()
+        self.assertEqual(preview["duplicate_count"], 3)
+        self.assertEqual(preview["duplicates"][0], {"field": "employee_id", "value": "1", "rows": [0, 2, 4]})
+
+        self.assertEqual(client.post("/api/sif/generate", json=payload).status_code, 200)
+        refused = client.post("/api/sif/generate?strict=true", json=payload)
+        self.assertEqual(refused.status_code, 422)
+        self.assertEqual(refused.json()["detail"]["duplicates"], preview["duplicates"])
+
+        clean = sample_payload()
+        self.assertEqual(client.post("/api/sif/preview", json=clean).json()["duplicates"], [])
+        self.assertEqual(client.post("/api/sif/generate?strict=true", json=clean).status_code, 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import asyncio
+import threading
+import unittest
+from datetime import date
+
+from app.cache import ResultCache
+from app.executor import ExecutorSaturated, SIFExecutor, close_stream
+from app.models import EmployeeRow, SIFRequest
+from app.sif import build_preview, iter_sif_xlsx
+
+
+def sample_request() -> SIFRequest:
+    return SIFRequest(
+        employer_cr="fg67",
+        payer_cr="fg67",
+        payer_bank_short="BMCT",
+        payer_account="123",
+        salary_year=2026,
+        salary_month=2,
+        processing_date=date(2026, 2, 13),
+        employees=[EmployeeRow(employee_name="A", basic_salary="10")],
+    )
+
+
+class SIFExecutorTests(unittest.TestCase):
+    def test_rejects_when_running_and_queue_are_full(self):
+        executor = SIFExecutor(mode="thread", max_concurrency=1, queue_limit=0, retry_after=7)
+        release = threading.Event()
+
+        async def scenario():
+            blocked = asyncio.ensure_future(executor.run(release.wait))
+            await asyncio.sleep(0.05)
+            with self.assertRaises(ExecutorSaturated) as ctx:
+                await executor.run(len, "x")
+            self.assertEqual(ctx.exception.retry_after, 7)
+            self.assertEqual(executor.stats()["running"], 1)
+            release.set()
+            await blocked
+            return await executor.run(len, "abc")
+
+        self.assertEqual(asyncio.run(scenario()), 3)
+        stats = executor.stats()
+        self.assertEqual((stats["running"], stats["queued"], stats["rejected"]), (0, 0, 1))
+        executor.shutdown()
+
+    def test_modes_produce_identical_output(self):
+        bodies = []
+        for mode in ("inline", "thread", "process"):
+            executor = SIFExecutor(mode=mode, max_concurrency=1)
+
+            async def scenario():
+                preview = await executor.run(build_preview, sample_request())
+                chunks = [chunk async for chunk in await executor.stream(iter_sif_xlsx, sample_request())]
+                return preview.total_salaries, b"".join(chunks)
+
+            total, body = asyncio.run(scenario())
+            self.assertEqual(total, "10.000")
+            self.assertEqual(executor.stats()["running"], 0)
+            bodies.append(body)
+            executor.shutdown()
+        self.assertEqual(len(set(bodies)), 1)
+
+    def test_closing_a_stream_frees_its_slot(self):
+        executor = SIFExecutor(mode="thread", max_concurrency=1, queue_limit=0)
+
+        async def scenario():
+            unread = await executor.stream(iter_sif_xlsx, sample_request())
+            await close_stream(unread)
+            chunks = ResultCache().tee("key", await executor.stream(iter_sif_xlsx, sample_request()))
+            await chunks.__anext__()
+            await chunks.aclose()
+
+        asyncio.run(scenario())
+        self.assertEqual(executor.stats()["running"], 0)
+        executor.shutdown()
+
+
+if __name__ == "__main__":
+    unittest.main()
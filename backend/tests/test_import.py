@@ -0,0 +1,118 @@
+import io
+import unittest
+import zipfile
+from datetime import date
+
+from fastapi.testclient import TestClient
+from openpyxl import Workbook
+
+from app.main import app
+from app.models import SIFRequest
+from app.sif import build_output_bytes, build_sif_rows, parse_sif_filename
+from app.xlsx import SHEET_PART, InvalidWorkbook, iter_sheet_rows
+from tests.test_api import sample_payload
+
+FILENAME = "SIF_fg67_BMCT_20260213_001"
+
+
+def sif_file(format_name="xlsx", rows=None):
+    if rows is None:
+        rows = build_sif_rows(SIFRequest.model_validate(sample_payload()))[0]
+    return build_output_bytes(rows, "Sheet1", format_name)
+
+
+class SheetReaderTests(unittest.TestCase):
+    def test_reads_rows_written_by_openpyxl(self):
+        workbook = Workbook()
+        sheet = workbook.active
+        assert sheet is not None
+        sheet.append(["Name", "Amount", None, "Flag"])
+        sheet.append(["Maryam", 12.5, None, True])
+        sheet["C3"] = "only C"
+        stream = io.BytesIO()
+        workbook.save(stream)
+        stream.seek(0)
+
+        self.assertEqual(
+            list(iter_sheet_rows(stream)),
+            [["Name", "Amount", None, "Flag"], ["Maryam", 12.5, None, True], [None, None, "only C"]],
+        )
+
+    def test_matches_the_rows_written(self):
+        rows = build_sif_rows(SIFRequest.model_validate(sample_payload()))[0]
+        read = list(iter_sheet_rows(io.BytesIO(sif_file(rows=rows))))
+        self.assertEqual(read, [[value if value != "" else None for value in row] for row in rows])
+
+    def test_rejects_non_workbooks(self):
+        with self.assertRaises(InvalidWorkbook):
+            list(iter_sheet_rows(io.BytesIO(b"not a zip")))
+
+    def test_rejects_malformed_sheet_xml(self):
+        for sheet_xml in (b"<sheetData><row r='1'/></sheetData>", b"<worksheet><sheetData><row r='1'>"):
+            source = zipfile.ZipFile(io.BytesIO(sif_file()))
+            stream = io.BytesIO()
+            with zipfile.ZipFile(stream, "w") as archive:
+                for name in source.namelist():
+                    archive.writestr(name, sheet_xml if name == SHEET_PART else source.read(name))
+            stream.seek(0)
+            with self.assertRaises(InvalidWorkbook):
+                list(iter_sheet_rows(stream))
+
+    def test_parse_sif_filename(self):
+        self.assertEqual(parse_sif_filename(FILENAME + ".csv"), (date(2026, 2, 13), 1))
+        self.assertIsNone(parse_sif_filename("payroll.xlsx"))
+        self.assertIsNone(parse_sif_filename("SIF_1_BMCT_20261399_001.xlsx"))
+
+
+class ImportEndpointTests(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(app)
+
+    def import_file(self, content, filename, **form):
+        return self.client.post("/api/sif/import", files={"file": (filename, content)}, data=form)
+
+    def test_round_trip_regenerates_the_same_file(self):
+        payload = sample_payload()
+        for format_name in ("xlsx", "csv"):
+            payload["format"] = format_name
+            generated = self.client.post("/api/sif/generate", json=payload)
+            self.assertEqual(generated.status_code, 200)
+
+            response = self.import_file(generated.content, f"{FILENAME}.{format_name}")
+            self.assertEqual(response.status_code, 200, response.text)
+            imported = response.json()
+            self.assertEqual(imported["processing_date"], "2026-02-13")
+            self.assertEqual(imported["format"], format_name)
+            self.assertEqual(imported["employees"][0]["net_salary"], "474.500")
+
+            imported.pop("employee_columns")
+            regenerated = self.client.post("/api/sif/generate", json=imported)
+            self.assertEqual(regenerated.content, generated.content)
+
+    def test_explicit_processing_date_and_seq(self):
+        response = self.import_file(sif_file(), "payroll.xlsx")
+        self.assertEqual(response.status_code, 422)
+        self.assertIn("processing_date", response.json()["detail"])
+
+        response = self.import_file(sif_file(), "payroll.xlsx", processing_date="2026-03-01", seq="7")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json()["processing_date"], response.json()["seq"]), ("2026-03-01", 7))
+
+    def test_rejects_broken_structure(self):
+        rows = build_sif_rows(SIFRequest.model_validate(sample_payload()))[0]
+        wrong_columns = rows[:2] + [["Employee ID"] + rows[2][1:]] + rows[3:]
+        response = self.import_file(sif_file("csv", wrong_columns), FILENAME + ".csv")
+        self.assertEqual(response.status_code, 422)
+        self.assertIn("third row", response.json()["detail"])
+
+        truncated = rows[:-1]
+        response = self.import_file(sif_file("csv", truncated), FILENAME + ".csv")
+        self.assertEqual(response.status_code, 422)
+        self.assertIn("declares", response.json()["detail"])
+
+        response = self.import_file(b"not a zip", FILENAME + ".xlsx")
+        self.assertEqual(response.status_code, 422)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import tempfile
+import time
+import unittest
+from io import BytesIO
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+from openpyxl import load_workbook
+
+from app import jobs as jobs_module
+from app import main
+from app.executor import ExecutorSaturated
+from app.jobs import JobStore
+from app.models import SIFRequest
+from tests.test_api import sample_payload
+
+
+class JobApiTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.original_store = main.job_store
+        main.job_store = JobStore(Path(self.directory.name), workers=1)
+        self.client = TestClient(main.app)
+
+    def tearDown(self):
+        main.job_store.shutdown()
+        main.job_store = self.original_store
+        self.directory.cleanup()
+
+    def wait_for(self, job_id: str) -> dict:
+        for _ in range(200):
+            status = self.client.get(f"/api/sif/jobs/{job_id}").json()
+            if status["status"] in ("done", "failed"):
+                return status
+            time.sleep(0.01)
+        self.fail("job did not finish")
+
+    def test_job_lifecycle_with_range_download(self):
+        submitted = self.client.post("/api/sif/jobs", json=sample_payload())
+        self.assertEqual(submitted.status_code, 202)
+        job_id = submitted.json()["job_id"]
+        self.assertEqual(submitted.headers["location"], f"/api/sif/jobs/{job_id}")
+
+        status = self.wait_for(job_id)
+        self.assertEqual(status["status"], "done")
+        self.assertEqual(status["rows_normalized"], 2)
+        self.assertEqual(status["rows_written"], 2)
+        self.assertEqual(status["filename"], "SIF_fg67_BMCT_20260213_001.xlsx")
+
+        full = self.client.get(f"/api/sif/jobs/{job_id}/download")
+        self.assertEqual(full.status_code, 200)
+        self.assertEqual(len(full.content), status["size_bytes"])
+        self.assertEqual(full.headers["accept-ranges"], "bytes")
+        ws = load_workbook(filename=BytesIO(full.content)).active
+        assert ws is not None
+        self.assertEqual(ws.cell(row=2, column=7).value, "794.625")
+
+        tail = self.client.get(f"/api/sif/jobs/{job_id}/download", headers={"Range": "bytes=100-"})
+        self.assertEqual(tail.status_code, 206)
+        self.assertEqual(tail.content, full.content[100:])
+
+        self.assertEqual(self.client.delete(f"/api/sif/jobs/{job_id}").status_code, 204)
+        self.assertEqual(self.client.get(f"/api/sif/jobs/{job_id}").status_code, 404)
+        self.assertEqual(list(Path(self.directory.name).iterdir()), [])
+
+    def test_unknown_job_is_404(self):
+        self.assertEqual(self.client.get("/api/sif/jobs/missing/download").status_code, 404)
+
+
+class JobStoreTests(unittest.TestCase):
+    def test_finished_jobs_expire_with_their_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            store = JobStore(Path(directory), workers=1, ttl_seconds=60)
+            job = store.submit(SIFRequest(**sample_payload()))
+            assert store._pool is not None
+            store._pool.shutdown(wait=True)
+            self.assertEqual(job.status, "done")
+            assert job.path is not None and job.finished_at is not None
+            self.assertTrue(job.path.exists())
+
+            job.finished_at -= 61
+            with self.assertRaises(jobs_module.JobNotFound):
+                store.get(job.job_id)
+            self.assertFalse(job.path.exists())
+
+    def test_pending_limit_rejects_submissions(self):
+        with tempfile.TemporaryDirectory() as directory:
+            store = JobStore(Path(directory), workers=1, max_pending=0)
+            with self.assertRaises(ExecutorSaturated):
+                store.submit(SIFRequest(**sample_payload()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+import asyncio
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from app import main
+from app.ledger import Generation, GenerationLedger, LedgerEntryNotFound, LedgerError
+from app.models import SIFHeader
+from tests.test_api import sample_payload
+
+
+def header(**fields):
+    values = {key: value for key, value in sample_payload(**fields).items() if key != "employees"}
+    return SIFHeader.model_validate(values)
+
+
+class GenerationLedgerTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.ledger = GenerationLedger(Path(self.directory.name))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def complete(self, entry_id, content=b"sif", format_name="csv"):
+        generation = Generation(f"file-{entry_id}.csv", format_name, f"key-{entry_id}", "1.000", 1)
+        self.ledger.store_and_record(entry_id, generation, content)
+
+    def test_concurrent_allocation_hands_out_distinct_seqs(self):
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            reserved = list(pool.map(lambda _: self.ledger.reserve(header(), allocate=True), range(20)))
+        self.assertEqual(sorted(seq for _, seq in reserved), list(range(1, 21)))
+        self.assertEqual(self.ledger.reserve(header(payer_bank_short="NBOM"), allocate=True)[1], 1)
+        self.assertEqual(self.ledger.reserve(header(processing_date="2026-02-14"), allocate=True)[1], 1)
+
+    def test_explicit_seqs_count_and_released_ones_come_back(self):
+        self.ledger.reserve(header(seq=7))
+        entry_id, seq = self.ledger.reserve(header(), allocate=True)
+        self.assertEqual(seq, 8)
+        self.ledger.release(entry_id)
+        self.assertEqual(self.ledger.reserve(header(), allocate=True)[1], 8)
+
+        self.ledger.reserve(header(seq=999))
+        with self.assertRaisesRegex(LedgerError, "seq numbers"):
+            self.ledger.reserve(header(), allocate=True)
+
+    def test_history_filters_finished_entries(self):
+        first, _ = self.ledger.reserve(header())
+        second, _ = self.ledger.reserve(header(employer_cr="other", processing_date="2026-03-01"))
+        self.ledger.reserve(header(seq=2))
+        self.complete(first)
+        self.complete(second, content=b"longer")
+
+        self.assertEqual([entry["id"] for entry in self.ledger.history()], [second, first])
+        self.assertEqual([entry["id"] for entry in self.ledger.history(employer_cr=" fg67 ")], [first])
+        self.assertEqual([entry["id"] for entry in self.ledger.history(payer_bank_short="bmct", limit=1)], [second])
+        self.assertEqual([entry["id"] for entry in self.ledger.history(date_from=date(2026, 2, 20))], [second])
+        self.assertEqual(self.ledger.get(second)["size_bytes"], 6)
+
+    def test_closed_stream_releases_its_entry(self):
+        entry_id, seq = self.ledger.reserve(header(), allocate=True)
+        generation = Generation("file.csv", "csv", "key", "1.000", 1)
+
+        async def chunks():
+            yield b"first"
+            yield b"second"
+
+        async def disconnect():
+            stream = self.ledger.tee(entry_id, generation, chunks())
+            self.assertEqual(await stream.__anext__(), b"first")
+            await stream.aclose()
+
+        asyncio.run(disconnect())
+        self.assertEqual(self.ledger.reserve(header(), allocate=True)[1], seq)
+        self.assertEqual(list((Path(self.directory.name) / "files").iterdir()), [])
+        with self.assertRaises(LedgerEntryNotFound):
+            self.ledger.get(entry_id)
+
+    def test_disabled_ledger_refuses_to_allocate(self):
+        with self.assertRaisesRegex(LedgerError, "SIF_LEDGER_DIR"):
+            GenerationLedger().reserve(header(), allocate=True)
+
+
+class LedgerApiTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.original_ledger = main.generation_ledger
+        main.generation_ledger = GenerationLedger(Path(self.directory.name))
+        self.client = TestClient(main.app)
+
+    def tearDown(self):
+        main.generation_ledger = self.original_ledger
+        self.directory.cleanup()
+
+    def test_generate_records_and_redownloads(self):
+        payload = sample_payload(format="csv")
+        first = self.client.post("/api/sif/generate?auto_seq=true", json=payload)
+        second = self.client.post("/api/sif/generate?auto_seq=true", json=payload)
+        self.assertEqual(first.headers["x-generated-filename"], "SIF_fg67_BMCT_20260213_001.csv")
+        self.assertEqual(second.headers["x-generated-filename"], "SIF_fg67_BMCT_20260213_002.csv")
+        self.assertEqual(first.content, second.content)
+
+        refused = self.client.post(
+            "/api/sif/generate?auto_seq=true&strict=true",
+            json=sample_payload(employees=[{"employee_id": "1"}, {"employee_id": "1"}]),
+        )
+        self.assertEqual(refused.status_code, 422)
+        self.client.post("/api/sif/generate", json=sample_payload(seq=5, employer_cr="other"))
+
+        history = self.client.get("/api/ledger", params={"employer_cr": "fg67"}).json()["entries"]
+        self.assertEqual([entry["seq"] for entry in history], [2, 1])
+        self.assertEqual((history[0]["total_salaries"], history[0]["number_of_records"]), ("794.625", 2))
+        self.assertEqual(history[0]["size_bytes"], len(first.content))
+
+        entry_id = first.headers["x-ledger-entry"]
+        download = self.client.get(f"/api/ledger/{entry_id}/download")
+        self.assertEqual(download.content, first.content)
+        self.assertEqual(download.headers["x-generated-filename"], "SIF_fg67_BMCT_20260213_001.csv")
+        self.assertEqual(self.client.get("/api/ledger/999/download").status_code, 404)
+        # The refused strict request gave its seq back.
+        third = self.client.post("/api/sif/generate?auto_seq=true", json=payload)
+        self.assertEqual(third.headers["x-generated-filename"], "SIF_fg67_BMCT_20260213_003.csv")
+
+
+if __name__ == "__main__":
+    unittest.main()
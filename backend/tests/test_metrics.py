@@ -0,0 +1,65 @@
+import asyncio
+import tempfile
+import unittest
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.executor import SIFExecutor
+from app.main import app
+from app.metrics import Histogram, MetricsMiddleware, Profiler, record_validation, stage
+from tests.test_api import sample_payload
+
+
+class MetricsTests(unittest.TestCase):
+    def test_histogram_renders_cumulative_buckets(self):
+        histogram = Histogram("demo_seconds", "Demo.", (0.1, 1.0))
+        histogram.observe(0.05, stage="a")
+        histogram.observe(0.5, stage="a")
+        histogram.observe(5, stage="a")
+        lines = list(histogram.render())
+        self.assertIn('demo_seconds_bucket{stage="a",le="0.1"} 1', lines)
+        self.assertIn('demo_seconds_bucket{stage="a",le="1"} 2', lines)
+        self.assertIn('demo_seconds_bucket{stage="a",le="+Inf"} 3', lines)
+        self.assertIn('demo_seconds_count{stage="a"} 3', lines)
+
+    def test_metrics_endpoint_reports_stages(self):
+        client = TestClient(app)
+        self.assertEqual(client.post("/api/sif/generate", json=sample_payload(payer_account="metrics")).status_code, 200)
+
+        body = client.get("/metrics").text
+        for stage_name in ("validate", "normalize", "rows", "xlsx"):
+            self.assertIn(f'sif_stage_seconds_count{{stage="{stage_name}"}}', body)
+        self.assertIn('sif_http_requests_total{method="POST",route="/api/sif/generate",status="200"}', body)
+        self.assertIn("sif_employees_per_file_count", body)
+        self.assertIn("sif_http_requests_in_flight", body)
+
+    def test_server_timing_header_lists_stages(self):
+        demo = FastAPI()
+        demo.add_middleware(MetricsMiddleware, server_timing_enabled=True)
+
+        @demo.post("/work")
+        async def work(payload: dict) -> dict:
+            record_validation()
+            with stage("normalize"):
+                pass
+            return payload
+
+        response = TestClient(demo).post("/work", json={})
+        timing = response.headers["server-timing"]
+        self.assertIn("validate;dur=", timing)
+        self.assertIn("normalize;dur=", timing)
+        self.assertIn("app;dur=", timing)
+
+    def test_profiler_writes_profile_for_sampled_jobs(self):
+        with tempfile.TemporaryDirectory() as directory:
+            executor = SIFExecutor(mode="thread", max_concurrency=1)
+            executor.profiler = Profiler(1.0, Path(directory))
+            self.assertEqual(asyncio.run(executor.run(sum, [1, 2, 3])), 6)
+            executor.shutdown()
+            self.assertEqual(len(list(Path(directory).glob("sum-*.prof"))), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import gzip
+import importlib.util
+import json
+import tracemalloc
+import unittest
+import zlib
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.payloads import MalformedPayload, decode_body
+from tests.test_api import sample_payload
+
+HAS_MSGPACK = importlib.util.find_spec("msgpack") is not None
+HAS_BROTLI = importlib.util.find_spec("brotli") is not None
+
+
+def columnar(payload: dict) -> dict:
+    employees = payload.pop("employees")
+    payload["employee_columns"] = {field: [row.get(field, "0") for row in employees] for field in employees[0]}
+    return payload
+
+
+class PayloadEncodingTests(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(app)
+        self.expected = self.client.post("/api/sif/preview", json=sample_payload()).json()
+
+    def post(self, body: bytes, **headers):
+        return self.client.post("/api/sif/preview", content=body, headers=headers)
+
+    def test_gzip_and_deflate_bodies(self):
+        body = json.dumps(columnar(sample_payload())).encode()
+        raw_deflate = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+        encoded = {
+            "gzip": gzip.compress(body),
+            "deflate": zlib.compress(body),
+            "identity": body,
+        }
+        encoded["x-gzip"] = encoded["gzip"]
+        for encoding, content in encoded.items():
+            response = self.post(content, **{"Content-Type": "application/json", "Content-Encoding": encoding})
+            self.assertEqual(response.status_code, 200, encoding)
+            self.assertEqual(response.json(), self.expected, encoding)
+
+        raw = raw_deflate.compress(body) + raw_deflate.flush()
+        response = self.post(raw, **{"Content-Type": "application/json", "Content-Encoding": "deflate"})
+        self.assertEqual(response.json(), self.expected)
+
+    def test_transport_errors(self):
+        body = json.dumps(sample_payload()).encode()
+        self.assertEqual(self.post(b"not gzip", **{"Content-Encoding": "gzip"}).status_code, 400)
+        self.assertEqual(self.post(body, **{"Content-Encoding": "compress"}).status_code, 415)
+        self.assertEqual(self.post(body, **{"Content-Type": "text/csv"}).status_code, 415)
+        self.assertEqual(self.post(b"{", **{"Content-Type": "application/json"}).status_code, 422)
+
+    def test_decompressed_size_is_limited(self):
+        with self.assertRaises(MalformedPayload):
+            decode_body(gzip.compress(b"x" * 100), "gzip", limit=10)
+        self.assertEqual(decode_body(gzip.compress(b"x" * 10), "gzip", limit=10), b"x" * 10)
+
+    @unittest.skipUnless(HAS_BROTLI, "brotli is not installed")
+    def test_brotli_size_is_limited(self):
+        import brotli  # type: ignore
+
+        bomb = brotli.compress(b"x" * (64 * 1024 * 1024))
+        tracemalloc.start()
+        try:
+            with self.assertRaisesRegex(MalformedPayload, "exceeds"):
+                decode_body(bomb, "br", limit=1024 * 1024)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        self.assertLess(peak, 8 * 1024 * 1024)
+        self.assertEqual(decode_body(brotli.compress(b"x" * 10), "br", limit=10), b"x" * 10)
+        large = bytes(range(256)) * 16 * 1024
+        self.assertEqual(decode_body(brotli.compress(large), "br", limit=len(large)), large)
+        with self.assertRaises(MalformedPayload):
+            decode_body(brotli.compress(b"x" * 10)[:-1], "br", limit=10)
+
+    def test_msgpack_body(self):
+        if not HAS_MSGPACK:
+            response = self.post(b"\x80", **{"Content-Type": "application/msgpack"})
+            self.assertEqual(response.status_code, 415)
+            return
+        import msgpack  # type: ignore
+
+        response = self.post(msgpack.packb(columnar(sample_payload())), **{"Content-Type": "application/msgpack"})
+        self.assertEqual(response.json(), self.expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
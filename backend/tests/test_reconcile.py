@@ -0,0 +1,124 @@
+import io
+import json
+import unittest
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models import SIFRequest
+from app.reconcile import reconcile
+from app.sif import build_output_bytes, build_sif_rows
+from app.uploads import UploadFormatError, iter_sif_records
+from tests.test_api import sample_payload
+
+
+def employee(employee_id, account, salary, bic="BMUSOMRX", name=None):
+    return {
+        "employee_id": employee_id,
+        "employee_name": name or f"Employee {employee_id}",
+        "employee_account": account,
+        "employee_bic_code": bic,
+        "basic_salary": salary,
+    }
+
+
+PREVIOUS = [
+    employee("1", "A1", "500"),
+    employee("2", "A2", "400"),
+    employee("3", "A3", "300"),
+    employee("4", "A4", "200"),
+    employee("5", "A5", "100"),
+]
+CURRENT = [
+    employee("1", "A1", "500"),  # unchanged
+    employee("2", "A2", "450"),  # +50
+    employee("3", "B3", "300"),  # new account
+    employee("4", "A4", "200.5", bic="NBOMOMRX"),  # bank and a small raise
+    employee("6", "A6", "600"),  # new
+]
+
+
+def previous_file(format_name="xlsx"):
+    rows = build_sif_rows(SIFRequest.model_validate(sample_payload(employees=PREVIOUS)))[0]
+    return build_output_bytes(rows, "Sheet1", format_name)
+
+
+class ReconcileTests(unittest.TestCase):
+    def diff(self, format_name="xlsx", **options):
+        records = iter_sif_records(io.BytesIO(previous_file(format_name)), format_name)
+        current = SIFRequest.model_validate(sample_payload(employees=CURRENT))
+        return json.loads(reconcile(current, records, "previous." + format_name, **options))
+
+    def test_reports_added_removed_salary_and_bank_changes(self):
+        for format_name in ("xlsx", "csv"):
+            report = self.diff(format_name)
+            self.assertEqual(
+                [report[key] for key in ("unchanged_count", "added_count", "removed_count", "salary_change_count", "bank_change_count")],
+                [1, 1, 1, 2, 2],
+            )
+            self.assertEqual(report["previous_total_salaries"], "1500.000")
+            self.assertEqual(report["total_salaries"], "2050.500")
+            self.assertEqual([item["employee_id"] for item in report["added"]], ["6"])
+            self.assertEqual([(item["employee_id"], item["previous_row"]) for item in report["removed"]], [("5", 8)])
+            self.assertEqual([(item["employee_id"], item["row"]) for item in report["added"]], [("6", 8)])
+            self.assertEqual(
+                [(item["employee_id"], item["row"], item["previous_row"]) for item in report["salary_changes"]],
+                [("2", 5, 5), ("4", 7, 7)],
+            )
+            self.assertEqual([(item["employee_id"], item["difference"]) for item in report["salary_changes"]], [("2", "50.000"), ("4", "0.500")])
+            self.assertEqual(
+                [(item["employee_id"], item["previous_account"], item["employee_account"], item["employee_bic_code"]) for item in report["bank_changes"]],
+                [("3", "A3", "B3", "BMUSOMRX"), ("4", "A4", "A4", "NBOMOMRX")],
+            )
+
+    def test_thresholds_and_listing_cap(self):
+        report = self.diff(threshold="1")
+        self.assertEqual([item["employee_id"] for item in report["salary_changes"]], ["2"])
+        report = self.diff(threshold_percent=20.0)
+        self.assertEqual(report["salary_change_count"], 0)
+        report = self.diff(max_listed=1)
+        self.assertEqual((report["salary_change_count"], len(report["salary_changes"])), (2, 1))
+        self.assertEqual(report["salary_changes"][0]["employee_id"], "2")
+
+    def test_rejects_files_that_are_not_sifs(self):
+        with self.assertRaises(UploadFormatError):
+            iter_sif_records(io.BytesIO(b"employee_id,basic_salary\n1,2\n"), "csv")
+
+
+class ReconcileApiTests(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(app)
+
+    def post(self, payload, content=None, **data):
+        files = {
+            "payload": ("payload.json", json.dumps(payload), "application/json"),
+            "previous": ("SIF_prev.xlsx", content or previous_file(), "application/octet-stream"),
+        }
+        return self.client.post("/api/sif/reconcile", data=data, files=files)
+
+    def test_reconcile_endpoint(self):
+        response = self.post(sample_payload(employees=CURRENT), salary_threshold="10")
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body["previous_filename"], "SIF_prev.xlsx")
+        self.assertEqual(body["salary_change_count"], 1)
+        self.assertEqual(body["previous_number_of_records"], 5)
+
+    def test_reconcile_accepts_payloads_over_a_megabyte(self):
+        employees = [employee(str(index), f"A{index}", "100", name="N" * 200) for index in range(5000)]
+        payload = sample_payload(employees=employees)
+        self.assertGreater(len(json.dumps(payload)), 1024 * 1024)
+        response = self.post(payload)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["number_of_records"], 5000)
+
+    def test_reconcile_validation_errors(self):
+        response = self.post(sample_payload(employees=CURRENT, salary_month=13))
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(response.json()["detail"][0]["loc"][:3], ["body", "payload", "salary_month"])
+        self.assertEqual(self.post(sample_payload(), salary_threshold="-1").status_code, 422)
+        self.assertEqual(self.post(sample_payload(), content=b"not a workbook").status_code, 422)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from app import main
+from app.models import SIFRequest
+from app.roster import RosterError, RosterStore, roster_request
+from app.sif import employee_records
+from tests.test_api import sample_payload
+
+ROSTER = [
+    {
+        "employee_id": "1001",
+        "employee_name": " Maryam Al Balushi ",
+        "employee_bic_code": "bmusomrx",
+        "employee_account": "0123456789",
+        "reference_number": "REF-1",
+    },
+    {"employee_id": "1002", "employee_name": "Said", "employee_account": "9876543210", "salary_frequency": "b"},
+]
+
+
+def monthly_payload(**fields):
+    payload = sample_payload(
+        roster=True, employee_columns={"employee_id": ["1002", "1001"], "basic_salary": ["300", "500.5"]}
+    )
+    del payload["employees"]
+    payload.update(fields)
+    return payload
+
+
+class RosterStoreTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = RosterStore(Path(self.directory.name) / "roster.sqlite3")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def save(self, employees, replace=False):
+        request = SIFRequest.model_validate(sample_payload(employees=employees))
+        return self.store.save(request.employer_cr, employee_records(request.employees), replace=replace)
+
+    def test_static_fields_are_stored_normalized_and_upserted(self):
+        self.assertEqual(self.save(ROSTER), 2)
+        self.assertEqual(self.save([{**ROSTER[1], "employee_account": "111"}]), 1)
+        roster = self.store.load(" fg67 ")
+        self.assertEqual(roster["1001"][3:5], ("Maryam Al Balushi", "BMUSOMRX"))
+        self.assertEqual((roster["1002"][5], roster["1002"][6]), ("111", "B"))
+
+        self.assertEqual(self.save([ROSTER[0]], replace=True), 1)
+        self.assertEqual(self.store.count("fg67"), 1)
+        self.assertEqual(self.store.delete("fg67"), 1)
+        self.assertEqual(self.store.load("fg67"), {})
+
+    def test_join_fills_static_columns(self):
+        self.save(ROSTER)
+        joined = roster_request(SIFRequest.model_validate(monthly_payload()), self.store)
+        self.assertFalse(joined.roster)
+        columns = joined.employee_columns
+        assert columns is not None
+        self.assertEqual(columns.employee_account, ["9876543210", "0123456789"])
+        self.assertEqual(columns.basic_salary, ["300", "500.5"])
+        self.assertIsNone(columns.deductions)
+
+        unknown = SIFRequest.model_validate(monthly_payload(employee_columns={"employee_id": ["1001", "2000"]}))
+        with self.assertRaisesRegex(RosterError, "1 employees are not on the roster: 2000"):
+            roster_request(unknown, self.store)
+
+
+class RosterApiTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.original_store = main.roster_store
+        main.roster_store = RosterStore(Path(self.directory.name) / "roster.sqlite3")
+        self.client = TestClient(main.app)
+
+    def tearDown(self):
+        main.roster_store = self.original_store
+        self.directory.cleanup()
+
+    def test_roster_lifecycle_and_monthly_generate(self):
+        self.assertEqual(self.client.post("/api/sif/preview", json=monthly_payload()).status_code, 422)
+
+        saved = self.client.put("/api/rosters/fg67", json={"employees": ROSTER}).json()
+        self.assertEqual(saved, {"employer_cr": "fg67", "stored": 2, "number_of_employees": 2})
+        listed = self.client.get("/api/rosters/fg67").json()
+        self.assertEqual([employee["employee_id"] for employee in listed["employees"]], ["1001", "1002"])
+
+        preview = self.client.post("/api/sif/preview", json=monthly_payload()).json()
+        self.assertEqual(
+            [(row["employee_id"], row["employee_name"], row["net_salary"]) for row in preview["normalized_employees"]],
+            [("1002", "Said", "300.000"), ("1001", "Maryam Al Balushi", "500.500")],
+        )
+        full = sample_payload(
+            employees=[
+                {**ROSTER[1], "basic_salary": "300"},
+                {**ROSTER[0], "basic_salary": "500.5"},
+            ]
+        )
+        generated = self.client.post("/api/sif/generate", json=monthly_payload(format="csv"))
+        self.assertEqual(generated.content, self.client.post("/api/sif/generate", json={**full, "format": "csv"}).content)
+
+        self.assertEqual(self.client.delete("/api/rosters/fg67").status_code, 204)
+        self.assertEqual(self.client.get("/api/rosters/fg67").status_code, 404)
+        self.assertEqual(self.client.delete("/api/rosters/fg67").status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
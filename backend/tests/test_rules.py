@@ -0,0 +1,135 @@
+import unittest
+from datetime import date
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models import SIFHeader
+from app.rules import WPS_PROFILE, ColumnRule, compile_column, compile_profile, profile_for, rules_for
+from app.sif import EMPLOYEE_DEFAULTS, EMPLOYEE_FIELDS, PayrollNormalizer
+from tests.test_api import sample_payload
+
+
+def employee(**fields):
+    values = {
+        "employee_id": "1001",
+        "employee_name": "Maryam",
+        "employee_account": "0123456789",
+        "basic_salary": "500",
+    }
+    values.update(fields)
+    return values
+
+
+def header(**fields):
+    values = {key: value for key, value in sample_payload(**fields).items() if key != "employees"}
+    return SIFHeader.model_validate(values)
+
+
+class ColumnRuleTests(unittest.TestCase):
+    def codes(self, rule, values):
+        check = compile_column(rule)
+        return [None if failure is None else failure[0] for failure in map(check, values)]
+
+    def test_decimal_rules(self):
+        rule = ColumnRule("basic_salary", "Basic Salary", mandatory=True, decimal=(9, 3))
+        self.assertEqual(
+            self.codes(rule, ["", "500", "0.125", "0.1250", "0.1255", "-1", "-0", "1234567890", "abc", "."]),
+            [
+                "missing",
+                None,
+                None,
+                None,
+                "amount_rounded",
+                "negative_amount",
+                None,
+                "amount_too_large",
+                "invalid_amount",
+                "invalid_amount",
+            ],
+        )
+
+    def test_choice_size_and_digit_rules(self):
+        choice = ColumnRule("salary_frequency", "Salary Frequency", mandatory=True, choices=("M", "B"))
+        self.assertEqual(self.codes(choice, ["m", "B", "W"]), [None, None, "invalid_choice"])
+        size = ColumnRule("employee_id", "Employee ID", size=3)
+        self.assertEqual(self.codes(size, ["", "123", "1234"]), [None, None, "too_long"])
+        digits = ColumnRule("number_of_working_days", "Number Of Working days", digits=3)
+        self.assertEqual(self.codes(digits, ["30", "1000", "3.5"]), [None, "invalid_number", "invalid_number"])
+
+
+class RuleProfileTests(unittest.TestCase):
+    def normalize(self, employees, payment_type="Salary"):
+        normalizer = PayrollNormalizer()
+        normalizer.apply_rules(header(payment_type=payment_type), rules_for("BMCT"))
+        for values in employees:
+            merged = {**employee(), **values}
+            record = tuple(merged.get(field, default) for field, default in zip(EMPLOYEE_FIELDS, EMPLOYEE_DEFAULTS))
+            normalizer.add(record)
+        return normalizer
+
+    def test_rows_are_checked_in_the_normalization_pass(self):
+        normalizer = self.normalize(
+            [
+                {},
+                {"employee_id_type": "X", "employee_name": "", "net_salary": "99"},
+                {"basic_salary": "0"},
+            ]
+        )
+        self.assertEqual(
+            [(issue["row"], issue["field"], issue["code"]) for issue in normalizer.issues],
+            [
+                (1, "employee_id_type", "invalid_choice"),
+                (1, "employee_name", "missing"),
+                (1, "net_salary", "net_salary_recalculated"),
+                (2, "notes_comments", "notes_required"),
+                (2, "basic_salary", "basic_salary_required"),
+            ],
+        )
+        self.assertEqual(normalizer.issues[0]["corrected"], "C")
+        self.assertEqual(normalizer.error_count, 3)
+
+    def test_basic_salary_must_be_zero_for_other_payment_types(self):
+        normalizer = self.normalize([{"basic_salary": "0", "extra_income": "50"}, {}], payment_type="Bonus")
+        self.assertEqual([(issue["row"], issue["code"]) for issue in normalizer.issues], [(1, "basic_salary_not_zero")])
+
+    def test_bank_profiles(self):
+        self.assertIs(profile_for("BMCT"), WPS_PROFILE)
+        profile = profile_for("misr")
+        self.assertEqual(profile.name, "dhofar-islamic")
+        self.assertIs(compile_profile(profile), rules_for("MISR"))
+
+        rules = rules_for("MISR")
+        self.assertEqual(rules.check_header(header(salary_month=2, processing_date="2026-04-20"), date(2026, 4, 20)), [])
+        issues = rules.check_header(header(salary_month=1, processing_date="2026-06-01"), date(2026, 5, 20))
+        self.assertEqual([issue["code"] for issue in issues], ["salary_month_out_of_range", "processing_date_too_far"])
+        # The salary month window is measured from the day of validation, not the processing date.
+        issues = rules.check_header(header(salary_month=1, processing_date="2026-01-31"), date(2026, 5, 20))
+        self.assertEqual([issue["code"] for issue in issues], ["salary_month_out_of_range"])
+        self.assertEqual(rules_for("BMCT").check_header(header(salary_month=2, processing_date="2026-06-01")), [])
+
+
+class ValidateEndpointTests(unittest.TestCase):
+    def test_validate_reports_errors_and_warnings(self):
+        today = date.today()
+        payload = sample_payload(
+            payer_bank_short="maisarah islamic banking services",
+            salary_year=today.year,
+            salary_month=today.month,
+            employees=[employee(), employee(employee_id="1" * 20, basic_salary="0.1234"), employee(employee_account="")],
+        )
+        body = TestClient(app).post("/api/sif/validate", json=payload).json()
+        self.assertEqual(body["profile"], "dhofar-islamic")
+        self.assertFalse(body["valid"])
+        self.assertEqual((body["number_of_records"], body["error_count"], body["warning_count"]), (3, 1, 3))
+        self.assertEqual(
+            [(issue["row"], issue["code"]) for issue in body["issues"]],
+            [(None, "payer_bank_corrected"), (1, "too_long"), (1, "amount_rounded"), (2, "missing")],
+        )
+
+        valid = TestClient(app).post("/api/sif/validate", json=sample_payload(employees=[employee()])).json()
+        self.assertEqual((valid["profile"], valid["valid"], valid["issue_count"]), ("wps", True, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
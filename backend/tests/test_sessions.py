@@ -0,0 +1,102 @@
+import time
+import unittest
+from datetime import date
+from io import BytesIO
+
+from fastapi.testclient import TestClient
+from openpyxl import load_workbook
+
+from app.main import app
+from app.models import EmployeeRow, SessionPatchRequest, SIFRequest
+from app.sessions import SessionNotFound, SessionPatchError, SessionStore
+from tests.test_api import sample_payload
+
+
+def sample_request(count: int = 3) -> SIFRequest:
+    return SIFRequest(
+        employer_cr="fg67",
+        payer_cr="fg67",
+        payer_bank_short="BMCT",
+        payer_account="123",
+        salary_year=2026,
+        salary_month=2,
+        processing_date=date(2026, 2, 13),
+        employees=[EmployeeRow(employee_id=str(index), basic_salary="100") for index in range(count)],
+    )
+
+
+class PreviewSessionTests(unittest.TestCase):
+    def test_patches_update_totals_incrementally(self):
+        session = SessionStore().create(sample_request())
+        changes = session.apply(
+            SessionPatchRequest.model_validate(
+                {
+                    "patches": [
+                        {"op": "update", "employee_id": "1", "fields": {"basic_salary": "250.5"}},
+                        {"op": "insert", "index": 0, "employee": {"employee_id": "9", "basic_salary": 1}},
+                        {"op": "delete", "index": 3},
+                    ]
+                }
+            )
+        )
+        self.assertEqual([(change["op"], change["index"]) for change in changes], [("update", 1), ("insert", 0), ("delete", 3)])
+        self.assertEqual(session.total_salaries(), "351.500")
+        self.assertEqual([row[1] for row in session.rows], ["9", "0", "1"])
+        self.assertEqual(session.version, 1)
+
+    def test_failed_patch_rolls_back(self):
+        session = SessionStore().create(sample_request())
+        request = SessionPatchRequest.model_validate(
+            {"patches": [{"op": "delete", "index": 0}, {"op": "update", "employee_id": "missing"}]}
+        )
+        with self.assertRaises(SessionPatchError):
+            session.apply(request)
+        self.assertEqual(session.number_of_records, 3)
+        self.assertEqual(session.total_salaries(), "300.000")
+        self.assertEqual(session.version, 0)
+
+    def test_store_evicts_by_lru_and_ttl(self):
+        store = SessionStore(max_sessions=2, ttl_seconds=60)
+        first = store.create(sample_request(1))
+        second = store.create(sample_request(1))
+        store.get(first.session_id)
+        store.create(sample_request(1))
+        with self.assertRaises(SessionNotFound):
+            store.get(second.session_id)
+
+        first.touched_at = time.monotonic() - 61
+        with self.assertRaises(SessionNotFound):
+            store.get(first.session_id)
+
+
+class PreviewSessionApiTests(unittest.TestCase):
+    def test_session_round_trip(self):
+        client = TestClient(app)
+        created = client.post("/api/sif/sessions", json=sample_payload())
+        self.assertEqual(created.status_code, 200)
+        session_id = created.json()["session_id"]
+        self.assertEqual(created.json()["total_salaries"], "794.625")
+
+        patched = client.patch(
+            f"/api/sif/sessions/{session_id}",
+            json={"patches": [{"op": "update", "index": 1, "fields": {"basic_salary": "0"}}]},
+        )
+        self.assertEqual(patched.status_code, 200)
+        body = patched.json()
+        self.assertEqual(body["total_salaries"], "474.500")
+        self.assertEqual(len(body["changes"]), 1)
+        self.assertEqual(body["changes"][0]["employee"]["notes_comments"], "Net salary is 0")
+
+        generated = client.post(f"/api/sif/sessions/{session_id}/generate")
+        ws = load_workbook(filename=BytesIO(generated.content)).active
+        assert ws is not None
+        self.assertEqual(ws.cell(row=2, column=7).value, "474.500")
+
+        bad = client.patch(f"/api/sif/sessions/{session_id}", json={"patches": [{"op": "delete"}]})
+        self.assertEqual(bad.status_code, 422)
+        self.assertEqual(client.delete(f"/api/sif/sessions/{session_id}").status_code, 204)
+        self.assertEqual(client.get(f"/api/sif/sessions/{session_id}").status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
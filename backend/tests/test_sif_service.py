@@ -4,8 +4,20 @@ from io import BytesIO
 
 from openpyxl import load_workbook
 
+from app.cache import content_key
+from app.formats import iter_csv_chunks
 from app.models import EmployeeRow, SIFRequest
-from app.sif import build_sif_rows, build_xlsx_bytes, default_filename
+from app.sif import (
+    build_sif_rows,
+    build_xlsx_bytes,
+    default_filename,
+    normalize_payroll,
+    prepare_sif,
+    q2,
+    q3,
+    request_pipeline,
+)
+from app.xlsx import iter_xlsx_chunks
 
 
 class SIFServiceTests(unittest.TestCase):
@@ -50,6 +62,33 @@ class SIFServiceTests(unittest.TestCase):
         self.assertEqual(len(rows[1]), 15)
         self.assertEqual(len(rows[2]), 15)
 
+    def test_pipeline_defers_header_until_rows_are_normalized(self):
+        payload = SIFRequest(
+            employer_cr="fg67",
+            payer_cr="fg67",
+            payer_bank_short="BMCT",
+            payer_account="123",
+            salary_year=2026,
+            salary_month=2,
+            processing_date=date(2026, 2, 13),
+            employees=[EmployeeRow(employee_name="A", basic_salary="10"), EmployeeRow(employee_name="B", basic_salary="2.5")],
+        )
+        pipeline = request_pipeline(payload)
+        employee_rows = pipeline.employee_rows()
+        self.assertEqual(next(employee_rows)[3], "A")
+        with self.assertRaises(RuntimeError):
+            pipeline.header_rows()
+        self.assertEqual([row[3] for row in employee_rows], ["B"])
+        self.assertEqual(pipeline.header_rows()[1][6:8], ["12.500", "2"])
+
+        rows = list(request_pipeline(payload).rows())
+        self.assertEqual(rows, build_sif_rows(payload)[0])
+        prepared = prepare_sif(payload, format_name="csv")
+        self.assertEqual(list(prepared.rows()), rows)
+        self.assertEqual(prepared.key, prepare_sif(payload, format_name="csv").key)
+        self.assertNotEqual(prepared.key, prepare_sif(payload).key)
+        self.assertNotEqual(prepared.key, content_key("csv", "Sheet1", rows[:-1]))
+
     def test_workbook_single_sheet_and_headers(self):
         payload = SIFRequest(
             employer_cr="fg67",
@@ -73,6 +112,44 @@ class SIFServiceTests(unittest.TestCase):
         self.assertEqual(ws.cell(row=1, column=1).value, "Employer CR-NO")
         self.assertEqual(ws.cell(row=3, column=1).value, "Employee ID Type")
 
+    def test_streaming_writer_emits_chunks_and_round_trips(self):
+        rows = [["Employee Name", "Notes / Comments"]]
+        rows += [[f"<Employee & {index}> محمد", "" if index % 2 else " spaced "] for index in range(5000)]
+        chunks = list(iter_xlsx_chunks(rows, "Payroll/Feb"))
+        self.assertGreater(len(chunks), 1)
+
+        wb = load_workbook(filename=BytesIO(b"".join(chunks)), read_only=True)
+        self.assertEqual(wb.sheetnames, ["PayrollFeb"])
+        values = list(wb[wb.sheetnames[0]].iter_rows(values_only=True))
+        self.assertEqual(len(values), 5001)
+        self.assertEqual(values[1], ("<Employee & 0> محمد", " spaced "))
+        self.assertEqual(values[2], ("<Employee & 1> محمد", None))
+
+    def test_fixed_point_normalization_matches_decimal_rounding(self):
+        values = ["", "0", "1.0005", "-1.0005", "2.675", "-0.0004", "1e3", "abc", "+.5", "5.", 1.005, 12, "NaN"]
+        records = []
+        for value in values:
+            record = [field for field in EmployeeRow().model_dump().values()]
+            record[9:14] = [value, value, value, "0", "0"]
+            records.append(record)
+
+        rows, total = normalize_payroll(records)
+        for value, row in zip(values, rows):
+            self.assertEqual(row[9], q3(value))
+            self.assertEqual(row[10], q2(value))
+            self.assertEqual(row[11], q3(value))
+        self.assertEqual(rows[5][8], "-0.000")
+        self.assertEqual(total, "NaN")
+        self.assertEqual(normalize_payroll(records[:5])[1], "5.350")
+        self.assertEqual(normalize_payroll([])[1], "0.000")
+
+    def test_csv_writer_is_deterministic_and_quotes_minimally(self):
+        rows = [["a", "b,c", 'say "hi"'], ["محمد", "", "line\nbreak"]] * 5000
+        first = b"".join(iter_csv_chunks(rows))
+        self.assertEqual(first, b"".join(iter_csv_chunks(iter(rows))))
+        self.assertGreater(len(list(iter_csv_chunks(rows))), 1)
+        self.assertTrue(first.startswith('a,"b,c","say ""hi"""\r\nمحمد,,"line\nbreak"\r\n'.encode("utf-8")))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,37 @@
+import asyncio
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+
+from app import main
+from app.startup import StartupReport, process_age
+
+
+class StartupTests(unittest.TestCase):
+    def test_heavy_modules_are_not_imported_with_the_app(self):
+        code = "import sys, app.main; print(sorted(m for m in ('openpyxl', 'multiprocessing', 'cProfile') if m in sys.modules))"
+        result = subprocess.run(
+            [sys.executable, "-c", code], cwd=Path(__file__).resolve().parents[1], capture_output=True, text=True, check=True
+        )
+        self.assertEqual(result.stdout.strip(), "[]")
+
+    def test_warm_up_records_phases_and_exports_them(self):
+        report = StartupReport()
+        report.record_boot()
+        asyncio.run(main.warm_up(report))
+        phases = report.as_dict()
+        self.assertEqual([name for name in phases if name != "boot"], ["banks", "runtime", "pipeline"])
+        if process_age() is not None:
+            self.assertGreater(phases["boot"], 0)
+        self.assertIn("SIF startup: ", report.summary())
+        self.assertIn('sif_startup_seconds{phase="pipeline"}', main.metrics_registry.render())
+
+    def test_repeated_phases_report_the_latest_duration(self):
+        for seconds in (2.0, 0.5):
+            StartupReport().record("test-phase", seconds)
+        self.assertIn('sif_startup_seconds{phase="test-phase"} 0.5\n', main.metrics_registry.render())
+
+
+if __name__ == "__main__":
+    unittest.main()
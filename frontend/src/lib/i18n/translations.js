@@ -3,6 +3,7 @@ export const translations = {
     appTitle: 'Oman WPS (SIF) Excel Generator',
     themeToggle: 'Toggle Theme',
     languageToggle: 'عربية',
+    loadSif: 'Load SIF',
     sections: {
       employerPayer: 'Employer / Payer Details',
       employees: 'Employees',
@@ -49,6 +50,7 @@ export const translations = {
     appTitle: 'مولد ملف إكسل نظام حماية الأجور (SIF) - عُمان',
     themeToggle: 'تبديل النمط',
     languageToggle: 'EN',
+    loadSif: 'فتح ملف SIF',
     sections: {
       employerPayer: 'بيانات صاحب العمل / الدافع',
       employees: 'الموظفون',
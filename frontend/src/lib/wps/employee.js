@@ -61,3 +61,30 @@ export function createEmployee() {
     notes_comments: ''
   };
 }
+
+const EMPLOYEE_DEFAULTS = createEmployee();
+
+// Sends each field name once instead of once per row; the API accepts this as `employee_columns`.
+export function toEmployeeColumns(employees) {
+  const columns = {};
+  for (const key of employeeFieldKeys) {
+    columns[key] = employees.map((employee) => employee[key] ?? EMPLOYEE_DEFAULTS[key]);
+  }
+  return columns;
+}
+
+const GZIP_THRESHOLD = 64 * 1024;
+
+// JSON request init, gzip-compressed when the payload is large and the browser supports it.
+export async function jsonRequestInit(payload) {
+  const json = JSON.stringify(payload);
+  if (json.length < GZIP_THRESHOLD || typeof CompressionStream === 'undefined') {
+    return { method: 'POST', headers: { 'Content-Type': 'application/json' }, body: json };
+  }
+  const compressed = new Blob([json]).stream().pipeThrough(new CompressionStream('gzip'));
+  return {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json', 'Content-Encoding': 'gzip' },
+    body: await new Response(compressed).arrayBuffer()
+  };
+}